@@ -1,14 +1,25 @@
 from __future__ import annotations
 
+from dataclasses import replace
 from functools import lru_cache
 
-from src.core.agents import AgentBundle, build_llm_client
+from src.core.agents import AgentBundle, HeuristicClient, LLMClient, MeteredLLMClient, build_llm_client
+from src.core.checkpoint import ThreadedSqliteSaver
 from src.core.config import Settings, get_settings
+from src.core.batch import BatchRunner
 from src.core.graph import DueDiligenceGraph
+from src.core.jobs import JobManager
+from src.core.llm_cache import CachingLLMClient
+from src.core.llm_router import build_llm_router
+from src.core.report_cache import ReportCache
+from src.memory.ingest import MemoryIngestQueue
 from src.memory.memory_manager import MemoryManager
+from src.rag.packing import ContextPacker
 from src.rag.vectorstore import FaissVectorStore
+from src.tools.cache import JsonCache, SearchCache
 from src.tools.fetch import FetchTool
-from src.tools.search import DuckDuckGoSearchTool
+from src.tools.ratelimit import TokenBucket
+from src.tools.search import DuckDuckGoSearchTool, LocalCorpusBackend
 
 
 @lru_cache(maxsize=1)
@@ -16,23 +27,165 @@ def get_app_settings() -> Settings:
     return get_settings()
 
 
+def build_llm(settings: Settings) -> LLMClient:
+    cache = None
+    if settings.llm_cache_enabled:
+        cache = JsonCache(
+            settings.cache_dir / "llm.sqlite3",
+            "completions",
+            ttl_seconds=settings.llm_cache_ttl_seconds,
+            max_entries=settings.llm_cache_max_entries,
+        )
+
+    def wrap(llm: LLMClient) -> LLMClient:
+        # Metered inside the cache, so latency and tokens reflect real model calls only.
+        llm = MeteredLLMClient(llm)
+        return CachingLLMClient(llm, cache) if cache is not None else llm
+
+    if settings.llm_routing:
+        # Wrapped per backend, so a fail-over reply is metered and cached under the model that wrote it.
+        return build_llm_router(settings, wrap=wrap)
+    llm = build_llm_client(settings)
+    return llm if isinstance(llm, HeuristicClient) else wrap(llm)
+
+
+def build_search_tool(settings: Settings) -> DuckDuckGoSearchTool:
+    if settings.search_backend == "local":
+        return DuckDuckGoSearchTool(
+            enabled=True,
+            max_workers=settings.search_max_workers,
+            backend=LocalCorpusBackend(settings.search_corpus_dir),
+        )
+    search_cache = SearchCache(
+        settings.cache_dir / "search.sqlite3",
+        ttl_seconds=settings.search_cache_ttl_seconds,
+        max_entries=settings.search_cache_max_entries,
+    )
+    return DuckDuckGoSearchTool(
+        enabled=settings.enable_web_search,
+        max_workers=settings.search_max_workers,
+        cache=search_cache,
+        rate_limiter=TokenBucket(settings.search_rate_per_second, settings.search_rate_burst),
+        max_retries=settings.search_max_retries,
+        backoff_seconds=settings.search_backoff_seconds,
+    )
+
+
+def build_report_cache(settings: Settings) -> ReportCache | None:
+    if not settings.report_cache_enabled:
+        return None
+    cache = JsonCache(
+        settings.cache_dir / "reports.sqlite3",
+        "reports",
+        ttl_seconds=settings.report_cache_ttl_seconds,
+        max_entries=settings.report_cache_max_entries,
+    )
+    return ReportCache(cache)
+
+
+def build_checkpointer(settings: Settings) -> ThreadedSqliteSaver | None:
+    if not settings.checkpoint_enabled:
+        return None
+    checkpointer = ThreadedSqliteSaver.open(
+        settings.checkpoint_path,
+        retention_seconds=settings.checkpoint_retention_seconds,
+        prune_interval_seconds=settings.checkpoint_prune_interval_seconds,
+    )
+    if settings.checkpoint_retention_seconds > 0:
+        checkpointer.prune(settings.checkpoint_retention_seconds)
+    return checkpointer
+
+
+def build_packer(settings: Settings, llm: LLMClient) -> ContextPacker | None:
+    if not settings.context_packing:
+        return None
+    budget = settings.context_token_budgets.get(getattr(llm, "model", ""), settings.context_token_budget)
+    return ContextPacker(token_budget=int(budget))
+
+
+def build_agents(settings: Settings, llm: LLMClient) -> AgentBundle:
+    return AgentBundle(
+        llm=llm,
+        analyst_mode=settings.analyst_mode,
+        section_group_size=settings.analyst_section_group_size,
+        section_concurrency=settings.analyst_max_concurrency,
+        packer=build_packer(settings, llm),
+    )
+
+
+def build_agents_for_model(settings: Settings, provider: str, model: str) -> AgentBundle:
+    if provider == "openai":
+        if not settings.openai_api_key:
+            raise ValueError("OPENAI_API_KEY is not configured")
+        settings = replace(settings, openai_model=model, llm_routing=False)
+    else:
+        settings = replace(settings, openai_api_key=None, ollama_model=model, llm_routing=False)
+    return build_agents(settings, build_llm(settings))
+
+
 @lru_cache(maxsize=1)
 def get_graph_runner() -> DueDiligenceGraph:
     settings = get_app_settings()
-    llm = build_llm_client(settings)
-    agents = AgentBundle(llm=llm)
+    agents = build_agents(settings, build_llm(settings))
     vectorstore = FaissVectorStore(settings.faiss_dir)
-    memory = MemoryManager(vectorstore)
-    search_tool = DuckDuckGoSearchTool(enabled=settings.enable_web_search)
+    ingest = None
+    if settings.memory_write_behind:
+        ingest = MemoryIngestQueue(
+            vectorstore,
+            batch_size=settings.memory_ingest_batch_size,
+            flush_interval_seconds=settings.memory_ingest_flush_seconds,
+            persist_interval_seconds=settings.memory_persist_interval_seconds,
+        )
+    memory = MemoryManager(vectorstore, ingest=ingest)
+    search_tool = build_search_tool(settings)
     fetch_tool = FetchTool(
         cache_dir=settings.cache_dir,
         timeout_seconds=settings.fetch_timeout_seconds,
         min_chars=settings.min_clean_chars,
         max_chars=settings.max_fetch_chars,
+        max_workers=settings.fetch_max_workers,
+        per_host_limit=settings.fetch_per_host_limit,
+        stage_deadline_seconds=settings.fetch_stage_deadline_seconds,
+        cache_ttl_seconds=settings.fetch_cache_ttl_seconds,
+        cache_max_bytes=settings.fetch_cache_max_bytes,
+        cache_compress=settings.fetch_cache_compress,
+        negative_ttls=settings.fetch_negative_ttls,
+        breaker_threshold=settings.fetch_breaker_threshold,
+        breaker_cooldown_seconds=settings.fetch_breaker_cooldown_seconds,
+        max_bytes=settings.fetch_max_bytes,
+        extractor=settings.html_extractor,
+        clean_workers=settings.clean_workers,
+        clean_task_max_bytes=settings.clean_task_max_bytes,
+        local_corpus_dir=settings.search_corpus_dir if settings.search_backend == "local" else None,
     )
     return DueDiligenceGraph(
         agents=agents,
         memory_manager=memory,
         search_tool=search_tool,
         fetch_tool=fetch_tool,
+        near_duplicate_distance=settings.near_duplicate_distance,
+        pipelined=settings.graph_pipelined,
+        checkpointer=build_checkpointer(settings),
+        report_cache=build_report_cache(settings),
+        default_deadline_seconds=settings.default_deadline_seconds or None,
+        analyst_full_context_seconds=settings.analyst_full_context_seconds,
+        memory_retrieve_workers=settings.memory_retrieve_workers,
+    )
+
+
+
+@lru_cache(maxsize=1)
+def get_job_manager() -> JobManager:
+    settings = get_app_settings()
+    return JobManager(
+        get_graph_runner().run,
+        workers=settings.job_workers,
+        max_queue=settings.job_max_queue,
+        retention_seconds=settings.job_retention_seconds,
     )
+
+
+
+@lru_cache(maxsize=1)
+def get_batch_runner() -> BatchRunner:
+    return BatchRunner(get_graph_runner(), max_concurrency=get_app_settings().batch_max_concurrency)
@@ -1,10 +1,12 @@
 from __future__ import annotations
 
+from contextlib import asynccontextmanager
 import logging
 import time
 
 from fastapi import FastAPI, Request
 
+from apps.api.deps import get_batch_runner, get_graph_runner, get_job_manager
 from apps.api.routes import router
 from src.core.logging import configure_logging
 
@@ -12,7 +14,22 @@ from src.core.logging import configure_logging
 configure_logging()
 logger = logging.getLogger(__name__)
 
-app = FastAPI(title="Enterprise AI Due Diligence Agent", version="1.0.0")
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    yield
+    if get_job_manager.cache_info().currsize:
+        get_job_manager().shutdown(timeout=5)
+    if get_batch_runner.cache_info().currsize:
+        get_batch_runner().shutdown()
+    # Drain queued memory writes on shutdown, but never build the graph just to do so.
+    if get_graph_runner.cache_info().currsize:
+        ingest = get_graph_runner().memory_manager.ingest
+        if ingest is not None:
+            ingest.close()
+
+
+app = FastAPI(title="Enterprise AI Due Diligence Agent", version="1.0.0", lifespan=lifespan)
 app.include_router(router)
 
 
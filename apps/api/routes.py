@@ -1,13 +1,34 @@
 from __future__ import annotations
 
+import json
 import logging
 
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Depends, HTTPException, Response
+from fastapi.responses import StreamingResponse
 
-from apps.api.deps import get_app_settings, get_graph_runner
-from apps.api.schemas import HealthResponse, ResearchRequest, ResearchResponse
+from apps.api.deps import (
+    build_agents_for_model,
+    get_app_settings,
+    get_batch_runner,
+    get_graph_runner,
+    get_job_manager,
+)
+from apps.api.schemas import (
+    BatchResearchRequest,
+    HealthResponse,
+    JobStatus,
+    JobSubmitted,
+    ReanalyzeRequest,
+    ResearchRequest,
+    ResearchResponse,
+)
 from src.core.config import Settings
-from src.core.graph import DueDiligenceGraph
+from src.core import metrics
+from src.core.batch import BatchRunner
+from src.core.graph import DueDiligenceGraph, RunNotFoundError
+from src.core.jobs import JobManager, QueueFullError
+from src.core.state import ResearchState
+from src.core.streaming import sse_event
 
 
 logger = logging.getLogger(__name__)
@@ -19,25 +40,178 @@ def health(settings: Settings = Depends(get_app_settings)) -> HealthResponse:
     return HealthResponse(ok=True, service=settings.service_name)
 
 
+@router.get("/metrics", include_in_schema=False)
+def prometheus_metrics() -> Response:
+    body, content_type = metrics.render()
+    return Response(content=body, media_type=content_type)
+
+
+@router.get("/cache/stats")
+def cache_stats(graph: DueDiligenceGraph = Depends(get_graph_runner)) -> dict[str, dict]:
+    return graph.cache_stats()
+
+
+@router.get("/memory/ingest")
+def memory_ingest_status(graph: DueDiligenceGraph = Depends(get_graph_runner)) -> dict:
+    return graph.ingest_status()
+
+
+@router.get("/llm/health")
+def llm_health(graph: DueDiligenceGraph = Depends(get_graph_runner)) -> dict[str, dict]:
+    return graph.llm_health()
+
+
 @router.post("/research", response_model=ResearchResponse)
-def research(
+async def research(
     payload: ResearchRequest,
+    response: Response,
     graph: DueDiligenceGraph = Depends(get_graph_runner),
 ) -> ResearchResponse:
     try:
         logger.info("Research request company=%s depth=%s focus=%s", payload.company, payload.depth, payload.focus)
-        state = graph.run(
+        state = await graph.arun(
             company=payload.company,
             focus=payload.focus,
             depth=payload.depth,
             use_memory=payload.use_memory,
+            use_cache=not payload.refresh,
+            deadline_seconds=payload.deadline_seconds,
         )
-        report = state.get("report")
-        if report is None:
-            raise HTTPException(status_code=500, detail="Failed to generate report")
-        return ResearchResponse.model_validate(report.model_dump())
+        response.headers["X-Report-Cache"] = state.get("report_cache", "bypass")
+        return _research_response(state)
     except HTTPException:
         raise
     except Exception as exc:
         logger.exception("Research pipeline failed")
         raise HTTPException(status_code=500, detail=f"Research pipeline failed: {exc}")
+
+
+@router.post("/research/batch")
+def research_batch(payload: BatchResearchRequest, batch: BatchRunner = Depends(get_batch_runner)) -> StreamingResponse:
+    logger.info("Batch research request for %s companies", len(payload.requests))
+    requests = [
+        {
+            "company": r.company,
+            "focus": r.focus,
+            "depth": r.depth,
+            "use_memory": r.use_memory,
+            "use_cache": not r.refresh,
+            "deadline_seconds": r.deadline_seconds,
+        }
+        for r in payload.requests
+    ]
+    return StreamingResponse(
+        (json.dumps(result.to_dict()) + "\n" for result in batch.run(requests)),
+        media_type="application/x-ndjson",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+
+@router.post("/research/jobs", response_model=JobSubmitted, status_code=202)
+def submit_research_job(payload: ResearchRequest, jobs: JobManager = Depends(get_job_manager)) -> JobSubmitted:
+    try:
+        job = jobs.submit(
+            company=payload.company,
+            focus=payload.focus,
+            depth=payload.depth,
+            use_memory=payload.use_memory,
+            use_cache=not payload.refresh,
+            deadline_seconds=payload.deadline_seconds,
+        )
+    except QueueFullError as exc:
+        raise HTTPException(status_code=429, detail=str(exc), headers={"Retry-After": "30"})
+    return JobSubmitted(job_id=job.job_id, status=job.status, queue_position=jobs.queue_position(job.job_id))
+
+
+@router.get("/research/jobs/{job_id}", response_model=JobStatus)
+def get_research_job(job_id: str, jobs: JobManager = Depends(get_job_manager)) -> JobStatus:
+    job = jobs.get(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail=f"Unknown job {job_id}")
+    report = None
+    error = job.error
+    if job.status == "succeeded":
+        try:
+            report = _research_response(job.result or {})
+        except HTTPException as exc:
+            error = str(exc.detail)
+    return JobStatus(
+        job_id=job.job_id,
+        status=job.status,
+        created_at=job.created_at,
+        started_at=job.started_at,
+        finished_at=job.finished_at,
+        queue_position=jobs.queue_position(job_id),
+        error=error,
+        report=report,
+    )
+
+
+@router.post("/research/{run_id}/resume", response_model=ResearchResponse)
+def resume_research(run_id: str, graph: DueDiligenceGraph = Depends(get_graph_runner)) -> ResearchResponse:
+    logger.info("Resume request run_id=%s", run_id)
+    try:
+        return _research_response(graph.resume(run_id))
+    except RunNotFoundError as exc:
+        raise HTTPException(status_code=404, detail=str(exc.args[0]))
+    except HTTPException:
+        raise
+    except Exception as exc:
+        logger.exception("Resuming run %s failed", run_id)
+        raise HTTPException(status_code=500, detail=f"Research pipeline failed: {exc}")
+
+
+@router.post("/research/{run_id}/reanalyze", response_model=ResearchResponse)
+def reanalyze_research(
+    run_id: str,
+    payload: ReanalyzeRequest,
+    graph: DueDiligenceGraph = Depends(get_graph_runner),
+    settings: Settings = Depends(get_app_settings),
+) -> ResearchResponse:
+    logger.info("Reanalyze request run_id=%s provider=%s model=%s", run_id, payload.provider, payload.model)
+    try:
+        agents = build_agents_for_model(settings, payload.provider, payload.model)
+        return _research_response(graph.reanalyze(run_id, agents))
+    except RunNotFoundError as exc:
+        raise HTTPException(status_code=404, detail=str(exc.args[0]))
+    except ValueError as exc:
+        raise HTTPException(status_code=400, detail=str(exc))
+    except HTTPException:
+        raise
+    except Exception as exc:
+        logger.exception("Re-analysis of run %s failed", run_id)
+        raise HTTPException(status_code=500, detail=f"Research pipeline failed: {exc}")
+
+
+def _research_response(state: ResearchState) -> ResearchResponse:
+    report = state.get("report")
+    if report is None:
+        raise HTTPException(status_code=500, detail="Failed to generate report")
+    return ResearchResponse.model_validate(
+        {
+            **report.model_dump(),
+            "run_id": state.get("run_id"),
+            "served_from_cache": state.get("report_cache") in ("hit", "coalesced"),
+            "timings": state.get("node_timings", {}),
+        }
+    )
+
+
+@router.post("/research/stream")
+def research_stream(
+    payload: ResearchRequest,
+    graph: DueDiligenceGraph = Depends(get_graph_runner),
+) -> StreamingResponse:
+    logger.info("Streaming research request company=%s depth=%s focus=%s", payload.company, payload.depth, payload.focus)
+    events = graph.stream_run(
+        company=payload.company,
+        focus=payload.focus,
+        depth=payload.depth,
+        use_memory=payload.use_memory,
+        deadline_seconds=payload.deadline_seconds,
+    )
+    return StreamingResponse(
+        (sse_event(event, data) for event, data in events),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
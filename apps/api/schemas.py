@@ -31,11 +31,23 @@ class ResearchRequest(BaseModel):
     focus: list[str] = Field(default_factory=list)
     depth: Literal["quick", "standard", "deep"] = "standard"
     use_memory: bool = True
+    refresh: bool = False
+    deadline_seconds: float | None = Field(default=None, gt=0, le=3600)
+
+
+class BatchResearchRequest(BaseModel):
+    requests: list[ResearchRequest] = Field(min_length=1, max_length=200)
+
+
+class ReanalyzeRequest(BaseModel):
+    provider: Literal["openai", "ollama"]
+    model: str = Field(min_length=1)
 
 
 class MemoryUpdates(BaseModel):
     added_docs: int
     added_sources: int
+    queued_docs: int = 0
 
 
 class ResearchResponse(BaseModel):
@@ -45,6 +57,27 @@ class ResearchResponse(BaseModel):
     sections: list[SectionOut]
     memory_used: bool
     memory_updates: MemoryUpdates
+    degraded: list[str] = Field(default_factory=list)
+    run_id: str | None = None
+    served_from_cache: bool = False
+    timings: dict[str, dict[str, float]] = Field(default_factory=dict)
+
+
+class JobSubmitted(BaseModel):
+    job_id: str
+    status: str
+    queue_position: int | None = None
+
+
+class JobStatus(BaseModel):
+    job_id: str
+    status: Literal["queued", "running", "succeeded", "failed"]
+    created_at: float
+    started_at: float | None = None
+    finished_at: float | None = None
+    queue_position: int | None = None
+    error: str | None = None
+    report: ResearchResponse | None = None
 
 
 class HealthResponse(BaseModel):
@@ -0,0 +1,81 @@
+from __future__ import annotations
+
+import argparse
+import json
+import logging
+from pathlib import Path
+import sys
+
+from pydantic import ValidationError
+
+from apps.api.deps import get_batch_runner
+from apps.api.schemas import ResearchRequest
+from src.core.logging import configure_logging
+
+
+logger = logging.getLogger(__name__)
+
+
+def load_requests(path: Path, defaults: dict) -> list[dict]:
+    # One request per line: a JSON ResearchRequest object, or just a company name.
+    requests: list[dict] = []
+    for lineno, line in enumerate(path.read_text(encoding="utf-8").splitlines(), start=1):
+        line = line.strip()
+        if not line or line.startswith("#"):
+            continue
+        raw = json.loads(line) if line.startswith("{") else {"company": line}
+        try:
+            req = ResearchRequest.model_validate({**defaults, **raw})
+        except ValidationError as exc:
+            raise SystemExit(f"{path}:{lineno}: invalid request: {exc}") from exc
+        requests.append(
+            {
+                "company": req.company,
+                "focus": req.focus,
+                "depth": req.depth,
+                "use_memory": req.use_memory,
+                "use_cache": not req.refresh,
+                "deadline_seconds": req.deadline_seconds,
+            }
+        )
+    return requests
+
+
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(prog="python -m apps.cli", description="Due diligence research from the command line")
+    sub = parser.add_subparsers(dest="command", required=True)
+    batch = sub.add_parser("batch", help="Research a portfolio of companies, writing one JSON result per line")
+    batch.add_argument("input", type=Path, help="File with one company name or JSON request per line")
+    batch.add_argument("-o", "--output", type=Path, help="Write NDJSON results here instead of stdout")
+    batch.add_argument("--depth", choices=["quick", "standard", "deep"], default="standard")
+    batch.add_argument("--focus", default="", help="Comma separated focus areas for lines that do not set their own")
+    batch.add_argument("--no-memory", action="store_true")
+    batch.add_argument("--refresh", action="store_true", help="Bypass the report cache")
+    batch.add_argument("--deadline", type=float, help="Per-company time budget in seconds")
+    args = parser.parse_args(argv)
+
+    configure_logging()
+    defaults = {
+        "depth": args.depth,
+        "focus": [f.strip() for f in args.focus.split(",") if f.strip()],
+        "use_memory": not args.no_memory,
+        "refresh": args.refresh,
+        "deadline_seconds": args.deadline,
+    }
+    requests = load_requests(args.input, defaults)
+    out = args.output.open("w", encoding="utf-8") if args.output else sys.stdout
+    failed = 0
+    try:
+        for result in get_batch_runner().run(requests):
+            failed += result.error is not None
+            out.write(json.dumps(result.to_dict()) + "\n")
+            out.flush()
+    finally:
+        if out is not sys.stdout:
+            out.close()
+    logger.info("Researched %s companies, %s failed", len(requests), failed)
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
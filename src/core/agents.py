@@ -1,16 +1,24 @@
 from __future__ import annotations
 
+import asyncio
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from dataclasses import dataclass
 from datetime import datetime, timezone
 import json
 import logging
-from typing import Any
+import time
+from typing import Any, Callable, Iterator
+import weakref
 
-from openai import OpenAI
+import httpx
+from openai import AsyncOpenAI, OpenAI
 import requests
+from requests.adapters import HTTPAdapter
 
+from src.core import metrics
 from src.core.config import Settings
 from src.core.state import Citation, Report, ReportSection, Source
+from src.rag.packing import ContextPacker, estimate_tokens
 
 
 logger = logging.getLogger(__name__)
@@ -26,69 +34,246 @@ SECTION_TITLES = [
     "Opportunities",
 ]
 
+SECTION_KEYWORDS = {
+    "Company Overview": ["overview", "founded", "headquarter", "about", "mission", "employees", "ceo"],
+    "Business Model": ["business model", "platform", "subscription", "customers", "product", "services"],
+    "Revenue Streams": ["revenue", "fees", "pricing", "income", "sales", "monetiz"],
+    "Market": ["market", "industry", "growth", "share", "segment", "demand"],
+    "Competitors": ["competitor", "competition", "rival", "versus", "alternative", "landscape"],
+    "SWOT": ["strength", "weakness", "opportunit", "threat", "advantage"],
+    "Risks": ["risk", "regulat", "lawsuit", "litigation", "fine", "compliance", "security"],
+    "Opportunities": ["opportunit", "expansion", "launch", "new market", "partnership", "growth"],
+}
+
 
 class LLMClient:
     def complete(self, system_prompt: str, user_prompt: str, temperature: float = 0.2) -> str:
         raise NotImplementedError
 
+    async def acomplete(self, system_prompt: str, user_prompt: str, temperature: float = 0.2) -> str:
+        return await asyncio.to_thread(self.complete, system_prompt, user_prompt, temperature)
+
+    def stream(self, system_prompt: str, user_prompt: str, temperature: float = 0.2) -> Iterator[str]:
+        yield self.complete(system_prompt, user_prompt, temperature)
+
+    def health_check(self, timeout_seconds: float = 3.0) -> bool:
+        return True
+
+
+class _PerLoop:
+    # asyncio clients and semaphores are bound to the loop that first uses them.
+    def __init__(self, factory: Callable[[], Any]) -> None:
+        self.factory = factory
+        self._values: weakref.WeakKeyDictionary = weakref.WeakKeyDictionary()
+
+    def get(self) -> Any:
+        loop = asyncio.get_running_loop()
+        value = self._values.get(loop)
+        if value is None:
+            value = self.factory()
+            self._values[loop] = value
+        return value
+
 
 class OpenAIClient(LLMClient):
-    def __init__(self, api_key: str, model: str) -> None:
-        self.client = OpenAI(api_key=api_key)
+    def __init__(
+        self, api_key: str, model: str, max_in_flight: int = 8, timeout_seconds: float = 600.0, max_retries: int = 2
+    ) -> None:
+        self.client = OpenAI(api_key=api_key, timeout=timeout_seconds, max_retries=max_retries)
         self.model = model
+        self.max_in_flight = max(1, max_in_flight)
+        self._async = _PerLoop(
+            lambda: (
+                AsyncOpenAI(api_key=api_key, timeout=timeout_seconds, max_retries=max_retries),
+                asyncio.Semaphore(self.max_in_flight),
+            )
+        )
+
+    def _messages(self, system_prompt: str, user_prompt: str) -> list[dict[str, str]]:
+        return [
+            {"role": "system", "content": system_prompt},
+            {"role": "user", "content": user_prompt},
+        ]
 
     def complete(self, system_prompt: str, user_prompt: str, temperature: float = 0.2) -> str:
         resp = self.client.chat.completions.create(
             model=self.model,
             temperature=temperature,
-            messages=[
-                {"role": "system", "content": system_prompt},
-                {"role": "user", "content": user_prompt},
-            ],
+            messages=self._messages(system_prompt, user_prompt),
         )
         return resp.choices[0].message.content or ""
 
+    def stream(self, system_prompt: str, user_prompt: str, temperature: float = 0.2) -> Iterator[str]:
+        chunks = self.client.chat.completions.create(
+            model=self.model,
+            temperature=temperature,
+            messages=self._messages(system_prompt, user_prompt),
+            stream=True,
+        )
+        for chunk in chunks:
+            if chunk.choices and chunk.choices[0].delta.content:
+                yield chunk.choices[0].delta.content
+
+    async def acomplete(self, system_prompt: str, user_prompt: str, temperature: float = 0.2) -> str:
+        client, slots = self._async.get()
+        async with slots:
+            resp = await client.chat.completions.create(
+                model=self.model,
+                temperature=temperature,
+                messages=self._messages(system_prompt, user_prompt),
+            )
+        return resp.choices[0].message.content or ""
+
+    def health_check(self, timeout_seconds: float = 3.0) -> bool:
+        self.client.with_options(timeout=timeout_seconds, max_retries=0).models.retrieve(self.model)
+        return True
+
 
 class OllamaClient(LLMClient):
-    def __init__(self, base_url: str, model: str, timeout_seconds: int = 60) -> None:
+    def __init__(self, base_url: str, model: str, timeout_seconds: float = 60, max_in_flight: int = 8) -> None:
         self.base_url = base_url.rstrip("/")
         self.model = model
         self.timeout_seconds = timeout_seconds
+        self.max_in_flight = max(1, max_in_flight)
+        self.session = requests.Session()
+        self.session.mount("http://", HTTPAdapter(pool_maxsize=self.max_in_flight))
+        self.session.mount("https://", HTTPAdapter(pool_maxsize=self.max_in_flight))
+        self._async = _PerLoop(self._async_client)
+
+    def _async_client(self) -> tuple[httpx.AsyncClient, asyncio.Semaphore]:
+        client = httpx.AsyncClient(
+            base_url=self.base_url,
+            timeout=self.timeout_seconds,
+            limits=httpx.Limits(max_connections=self.max_in_flight, max_keepalive_connections=self.max_in_flight),
+        )
+        return client, asyncio.Semaphore(self.max_in_flight)
 
-    def complete(self, system_prompt: str, user_prompt: str, temperature: float = 0.2) -> str:
-        payload = {
+    def _payload(self, system_prompt: str, user_prompt: str, temperature: float, stream: bool = False) -> dict[str, Any]:
+        return {
             "model": self.model,
             "messages": [
                 {"role": "system", "content": system_prompt},
                 {"role": "user", "content": user_prompt},
             ],
-            "stream": False,
+            "stream": stream,
             "options": {"temperature": temperature},
         }
-        resp = requests.post(
+
+    def complete(self, system_prompt: str, user_prompt: str, temperature: float = 0.2) -> str:
+        resp = self.session.post(
             f"{self.base_url}/api/chat",
-            json=payload,
+            json=self._payload(system_prompt, user_prompt, temperature),
             timeout=self.timeout_seconds,
         )
         resp.raise_for_status()
         data = resp.json()
         return data.get("message", {}).get("content", "")
 
+    def stream(self, system_prompt: str, user_prompt: str, temperature: float = 0.2) -> Iterator[str]:
+        with self.session.post(
+            f"{self.base_url}/api/chat",
+            json=self._payload(system_prompt, user_prompt, temperature, stream=True),
+            timeout=self.timeout_seconds,
+            stream=True,
+        ) as resp:
+            resp.raise_for_status()
+            for line in resp.iter_lines():
+                if not line:
+                    continue
+                data = json.loads(line)
+                content = data.get("message", {}).get("content", "")
+                if content:
+                    yield content
+                if data.get("done"):
+                    break
+
+    async def acomplete(self, system_prompt: str, user_prompt: str, temperature: float = 0.2) -> str:
+        client, slots = self._async.get()
+        async with slots:
+            resp = await client.post("/api/chat", json=self._payload(system_prompt, user_prompt, temperature))
+        resp.raise_for_status()
+        data = resp.json()
+        return data.get("message", {}).get("content", "")
+
+    def health_check(self, timeout_seconds: float = 3.0) -> bool:
+        resp = self.session.get(f"{self.base_url}/api/tags", timeout=timeout_seconds)
+        resp.raise_for_status()
+        names = {m.get("name") for m in resp.json().get("models", [])}
+        return not names or self.model in names or f"{self.model}:latest" in names
+
 
 class HeuristicClient(LLMClient):
     def complete(self, system_prompt: str, user_prompt: str, temperature: float = 0.2) -> str:
         return "{}"
 
+    async def acomplete(self, system_prompt: str, user_prompt: str, temperature: float = 0.2) -> str:
+        return "{}"
+
+
+class MeteredLLMClient(LLMClient):
+    def __init__(self, inner: LLMClient) -> None:
+        self.inner = inner
+        self.model = getattr(inner, "model", "")
+        self.label = self.model or type(inner).__name__
+
+    def complete(self, system_prompt: str, user_prompt: str, temperature: float = 0.2) -> str:
+        start = self._started(system_prompt, user_prompt)
+        try:
+            text = self.inner.complete(system_prompt, user_prompt, temperature)
+        except Exception:
+            self._finished("complete", start, failed=True)
+            raise
+        self._finished("complete", start, text)
+        return text
+
+    async def acomplete(self, system_prompt: str, user_prompt: str, temperature: float = 0.2) -> str:
+        start = self._started(system_prompt, user_prompt)
+        try:
+            text = await self.inner.acomplete(system_prompt, user_prompt, temperature)
+        except Exception:
+            self._finished("acomplete", start, failed=True)
+            raise
+        self._finished("acomplete", start, text)
+        return text
+
+    def stream(self, system_prompt: str, user_prompt: str, temperature: float = 0.2) -> Iterator[str]:
+        start = self._started(system_prompt, user_prompt)
+        parts: list[str] = []
+        failed = False
+        try:
+            for token in self.inner.stream(system_prompt, user_prompt, temperature):
+                parts.append(token)
+                yield token
+        except Exception:
+            failed = True
+            raise
+        finally:
+            self._finished("stream", start, "".join(parts), failed=failed)
+
+    def health_check(self, timeout_seconds: float = 3.0) -> bool:
+        return self.inner.health_check(timeout_seconds)
+
+    def _started(self, system_prompt: str, user_prompt: str) -> float:
+        metrics.LLM_IN_FLIGHT.labels(model=self.label).inc()
+        metrics.LLM_TOKENS.labels(model=self.label, kind="prompt").inc(estimate_tokens(system_prompt + user_prompt))
+        return time.perf_counter()
+
+    def _finished(self, op: str, start: float, text: str = "", failed: bool = False) -> None:
+        metrics.LLM_IN_FLIGHT.labels(model=self.label).dec()
+        metrics.LLM_SECONDS.labels(model=self.label, op=op).observe(time.perf_counter() - start)
+        metrics.LLM_TOKENS.labels(model=self.label, kind="completion").inc(estimate_tokens(text))
+        if failed:
+            metrics.LLM_ERRORS.labels(model=self.label).inc()
 
 
 def build_llm_client(settings: Settings) -> LLMClient:
     if settings.openai_api_key:
         try:
-            return OpenAIClient(settings.openai_api_key, settings.openai_model)
+            return OpenAIClient(settings.openai_api_key, settings.openai_model, max_in_flight=settings.llm_max_in_flight)
         except Exception as exc:
             logger.warning("Failed to initialize OpenAI client: %s", exc)
     try:
-        return OllamaClient(settings.ollama_base_url, settings.ollama_model)
+        return OllamaClient(settings.ollama_base_url, settings.ollama_model, max_in_flight=settings.llm_max_in_flight)
     except Exception as exc:
         logger.warning("Failed to initialize Ollama client: %s", exc)
     return HeuristicClient()
@@ -112,8 +297,33 @@ def safe_json_load(text: str) -> dict[str, Any]:
 @dataclass
 class AgentBundle:
     llm: LLMClient
+    analyst_mode: str = "single"
+    section_group_size: int = 2
+    section_concurrency: int = 4
+    section_retries: int = 1
+    section_sources: int = 8
+    packer: ContextPacker | None = None
+    context_scale: float = 1.0
 
     def planner(self, company: str, focus: list[str], depth: str) -> list[str]:
+        sys_prompt, user_prompt, target_count = self._planner_prompts(company, focus, depth)
+        raw = ""
+        try:
+            raw = self.llm.complete(sys_prompt, user_prompt)
+        except Exception as exc:
+            logger.warning("Planner model call failed: %s", exc)
+        return self._planner_queries(raw, company, focus, target_count)
+
+    async def aplanner(self, company: str, focus: list[str], depth: str) -> list[str]:
+        sys_prompt, user_prompt, target_count = self._planner_prompts(company, focus, depth)
+        raw = ""
+        try:
+            raw = await self.llm.acomplete(sys_prompt, user_prompt)
+        except Exception as exc:
+            logger.warning("Planner model call failed: %s", exc)
+        return self._planner_queries(raw, company, focus, target_count)
+
+    def _planner_prompts(self, company: str, focus: list[str], depth: str) -> tuple[str, str, int]:
         target_count = {"quick": 4, "standard": 8, "deep": 12}.get(depth, 8)
         sys_prompt = (
             "You are a due diligence planning agent. Return only valid JSON with key 'queries' containing a list of search queries."
@@ -124,12 +334,15 @@ class AgentBundle:
             f"Depth: {depth}\n"
             f"Need exactly {target_count} focused queries across business model, pricing, financials, competitors, market, risks."
         )
+        return sys_prompt, user_prompt, target_count
+
+    def _planner_queries(self, raw: str, company: str, focus: list[str], target_count: int) -> list[str]:
         queries: list[str] = []
         try:
-            data = safe_json_load(self.llm.complete(sys_prompt, user_prompt))
+            data = safe_json_load(raw)
             queries = [str(q).strip() for q in data.get("queries", []) if str(q).strip()]
         except Exception as exc:
-            logger.warning("Planner model call failed: %s", exc)
+            logger.warning("Planner output could not be parsed: %s", exc)
 
         if not queries:
             base = [
@@ -159,6 +372,13 @@ class AgentBundle:
             deduped.append(q)
         return deduped[:target_count]
 
+    def fallback_queries(self, company: str, focus: list[str], depth: str) -> list[str]:
+        _, _, target_count = self._planner_prompts(company, focus, depth)
+        return self._planner_queries("", company, focus, target_count)
+
+    def fallback_analysis(self, company: str, sources: list[Source]) -> dict[str, Any]:
+        return self._analysis_or_fallback({}, company, sources)
+
     def expand_queries(self, company: str, focus: list[str], existing: list[str]) -> list[str]:
         extra = [
             f"{company} annual report",
@@ -176,65 +396,264 @@ class AgentBundle:
         focus: list[str],
         sources: list[Source],
         memory_docs: list[dict],
+        on_token: Callable[[str], None] | None = None,
     ) -> dict[str, Any]:
-        source_rows = [
-            {
-                "url": s.url,
-                "title": s.title,
-                "snippet": s.snippet,
-                "excerpt": s.text[:500],
-            }
-            for s in sources[:25]
-        ]
+        if self.analyst_mode == "sections":
+            return self._sectioned_analysis(company, focus, sources, memory_docs, on_token)
+        sys_prompt, user_prompt = self._analyst_prompts(company, focus, sources, memory_docs)
+        parsed: dict[str, Any] = {}
+        try:
+            if on_token is None:
+                raw = self.llm.complete(sys_prompt, user_prompt)
+            else:
+                parts: list[str] = []
+                for token in self.llm.stream(sys_prompt, user_prompt):
+                    parts.append(token)
+                    on_token(token)
+                raw = "".join(parts)
+            parsed = safe_json_load(raw)
+        except Exception as exc:
+            logger.warning("Analyst model call failed: %s", exc)
+        return {**self._analysis_or_fallback(parsed, company, sources), "context_tokens": estimate_tokens(user_prompt)}
+
+    async def aanalyst(
+        self,
+        company: str,
+        focus: list[str],
+        sources: list[Source],
+        memory_docs: list[dict],
+    ) -> dict[str, Any]:
+        if self.analyst_mode == "sections":
+            return await self._asectioned_analysis(company, focus, sources, memory_docs)
+        # Packing encodes with the embedding model; keep it off the event loop.
+        sys_prompt, user_prompt = await asyncio.to_thread(self._analyst_prompts, company, focus, sources, memory_docs)
+        parsed: dict[str, Any] = {}
+        try:
+            parsed = safe_json_load(await self.llm.acomplete(sys_prompt, user_prompt))
+        except Exception as exc:
+            logger.warning("Analyst model call failed: %s", exc)
+        return {**self._analysis_or_fallback(parsed, company, sources), "context_tokens": estimate_tokens(user_prompt)}
+
+    def _analyst_prompts(
+        self,
+        company: str,
+        focus: list[str],
+        sources: list[Source],
+        memory_docs: list[dict],
+        sections: list[str] | None = None,
+        with_summary: bool = True,
+        token_budget: int | None = None,
+    ) -> tuple[str, str]:
+        # context_scale < 1 shrinks the evidence when a request deadline leaves little time for the model.
+        scale = min(1.0, max(0.1, self.context_scale))
+        if self.packer is not None:
+            query_terms = [company] + focus + [k for t in sections or [] for k in SECTION_KEYWORDS.get(t, [t.lower()])]
+            budget = max(1, int((token_budget or self.packer.token_budget) * scale))
+            packed = self.packer.pack(" ".join(query_terms), sources, memory_docs, budget)
+            source_rows, memory_rows = packed.sources, packed.memory
+        else:
+            source_rows = [
+                {
+                    "url": s.url,
+                    "title": s.title,
+                    "snippet": s.snippet,
+                    "excerpt": s.text[:500],
+                }
+                for s in sources[: max(1, int(25 * scale))]
+            ]
+            memory_rows = memory_docs[: max(1, int(8 * scale))]
         sys_prompt = (
             "You are an enterprise due diligence analyst. Use only provided evidence. "
             "If evidence is weak, include '[Not fully confirmed]'. Return strict JSON only."
         )
+        output_format: dict[str, Any] = {
+            "executive_summary": "string",
+            "sections": [
+                {
+                    "title": "one of required_sections",
+                    "content": "markdown text",
+                    "citation_urls": ["url1", "url2"],
+                }
+            ],
+        }
+        if not with_summary:
+            output_format.pop("executive_summary")
         user_prompt = json.dumps(
             {
                 "company": company,
                 "focus": focus,
-                "required_sections": SECTION_TITLES,
+                "required_sections": sections or SECTION_TITLES,
                 "sources": source_rows,
-                "memory": memory_docs[:8],
-                "format": {
-                    "executive_summary": "string",
-                    "sections": [
-                        {
-                            "title": "one of required_sections",
-                            "content": "markdown text",
-                            "citation_urls": ["url1", "url2"],
-                        }
-                    ],
-                },
+                "memory": memory_rows,
+                "format": output_format,
             },
             ensure_ascii=True,
         )
+        return sys_prompt, user_prompt
 
-        parsed: dict[str, Any] = {}
-        try:
-            parsed = safe_json_load(self.llm.complete(sys_prompt, user_prompt))
-        except Exception as exc:
-            logger.warning("Analyst model call failed: %s", exc)
-
+    def _analysis_or_fallback(self, parsed: dict[str, Any], company: str, sources: list[Source]) -> dict[str, Any]:
         if parsed.get("sections"):
             return parsed
+        return {
+            "executive_summary": self._fallback_summary(company),
+            "sections": [self._fallback_section(title, company, sources) for title in SECTION_TITLES],
+        }
 
-        fallback_sections = []
-        default_urls = [s.url for s in sources[:3] if s.url]
-        for title in SECTION_TITLES:
-            fallback_sections.append(
-                {
-                    "title": title,
-                    "content": f"[Not fully confirmed] Limited evidence available for {title.lower()} for {company}.",
-                    "citation_urls": default_urls,
-                }
+    def _fallback_summary(self, company: str) -> str:
+        return f"[Not fully confirmed] Automated due diligence draft for {company} generated from limited available evidence."
+
+    def _fallback_section(self, title: str, company: str, sources: list[Source]) -> dict[str, Any]:
+        return {
+            "title": title,
+            "content": f"[Not fully confirmed] Limited evidence available for {title.lower()} for {company}.",
+            "citation_urls": [s.url for s in sources[:3] if s.url],
+        }
+
+    def _section_groups(self) -> list[list[str]]:
+        size = max(1, self.section_group_size)
+        return [SECTION_TITLES[i : i + size] for i in range(0, len(SECTION_TITLES), size)]
+
+    def _relevant(self, rows: list, titles: list[str], text_of: Callable[[Any], str], limit: int) -> list:
+        keywords = [k for title in titles for k in SECTION_KEYWORDS.get(title, [title.lower()])]
+        scored = []
+        for idx, row in enumerate(rows):
+            haystack = text_of(row).lower()
+            scored.append((-sum(haystack.count(k) for k in keywords), idx, row))
+        scored.sort(key=lambda item: (item[0], item[1]))
+        return [row for _, _, row in scored[:limit]]
+
+    def _group_prompts(
+        self,
+        company: str,
+        focus: list[str],
+        titles: list[str],
+        sources: list[Source],
+        memory_docs: list[dict],
+    ) -> tuple[str, str]:
+        with_summary = titles[0] == SECTION_TITLES[0]
+        if self.packer is not None:
+            # A group covers a slice of the report, so it gets a matching slice of the budget (never below half).
+            share = self.packer.token_budget * len(titles) // len(SECTION_TITLES)
+            budget = max(share, self.packer.token_budget // 2)
+            return self._analyst_prompts(
+                company, focus, sources, memory_docs, sections=titles, with_summary=with_summary, token_budget=budget
             )
+        group_sources = self._relevant(sources, titles, lambda s: f"{s.title} {s.snippet} {s.text}", self.section_sources)
+        group_memory = self._relevant(memory_docs, titles, lambda d: str(d.get("text", "")), 4)
+        return self._analyst_prompts(company, focus, group_sources, group_memory, sections=titles, with_summary=with_summary)
+
+    def _group_result(self, raw: str, titles: list[str]) -> tuple[dict[str, Any], bool]:
+        parsed = safe_json_load(raw)
+        rows = [r for r in parsed.get("sections", []) if isinstance(r, dict) and str(r.get("title", "")).strip() in titles]
+        result: dict[str, Any] = {"sections": rows}
+        if titles[0] == SECTION_TITLES[0] and str(parsed.get("executive_summary", "")).strip():
+            result["executive_summary"] = parsed["executive_summary"]
+        complete = {str(r.get("title", "")).strip() for r in rows} >= set(titles)
+        if titles[0] == SECTION_TITLES[0]:
+            complete = complete and "executive_summary" in result
+        return result, complete
+
+    def _group_fallback(self, result: dict[str, Any], titles: list[str], company: str, sources: list[Source]) -> dict[str, Any]:
+        covered = {str(r.get("title", "")).strip() for r in result.get("sections", [])}
+        missing = [t for t in titles if t not in covered]
+        if missing:
+            logger.warning("Analyst sections %s fell back to placeholders for %s", missing, company)
+        sections = result.get("sections", []) + [self._fallback_section(t, company, sources) for t in missing]
+        return {**result, "sections": sections}
+
+    def _run_group(
+        self,
+        company: str,
+        focus: list[str],
+        titles: list[str],
+        sources: list[Source],
+        memory_docs: list[dict],
+    ) -> dict[str, Any]:
+        sys_prompt, user_prompt = self._group_prompts(company, focus, titles, sources, memory_docs)
+        best: dict[str, Any] = {"sections": []}
+        for attempt in range(self.section_retries + 1):
+            try:
+                result, complete = self._group_result(self.llm.complete(sys_prompt, user_prompt), titles)
+            except Exception as exc:
+                logger.warning("Analyst call for %s failed (attempt %s): %s", titles, attempt + 1, exc)
+                continue
+            if len(result["sections"]) >= len(best["sections"]):
+                best = result
+            if complete:
+                break
+        return {**self._group_fallback(best, titles, company, sources), "context_tokens": estimate_tokens(user_prompt)}
+
+    async def _arun_group(
+        self,
+        company: str,
+        focus: list[str],
+        titles: list[str],
+        sources: list[Source],
+        memory_docs: list[dict],
+    ) -> dict[str, Any]:
+        sys_prompt, user_prompt = await asyncio.to_thread(self._group_prompts, company, focus, titles, sources, memory_docs)
+        best: dict[str, Any] = {"sections": []}
+        for attempt in range(self.section_retries + 1):
+            try:
+                result, complete = self._group_result(await self.llm.acomplete(sys_prompt, user_prompt), titles)
+            except Exception as exc:
+                logger.warning("Analyst call for %s failed (attempt %s): %s", titles, attempt + 1, exc)
+                continue
+            if len(result["sections"]) >= len(best["sections"]):
+                best = result
+            if complete:
+                break
+        return {**self._group_fallback(best, titles, company, sources), "context_tokens": estimate_tokens(user_prompt)}
+
+    def _merge_groups(self, results: list[dict[str, Any]], company: str) -> dict[str, Any]:
+        by_title: dict[str, dict] = {}
+        summary = ""
+        for result in results:
+            summary = summary or str(result.get("executive_summary", "")).strip()
+            for row in result.get("sections", []):
+                by_title.setdefault(str(row.get("title", "")).strip(), row)
         return {
-            "executive_summary": f"[Not fully confirmed] Automated due diligence draft for {company} generated from limited available evidence.",
-            "sections": fallback_sections,
+            "executive_summary": summary or self._fallback_summary(company),
+            "sections": [by_title[t] for t in SECTION_TITLES if t in by_title],
+            "context_tokens": sum(int(r.get("context_tokens", 0)) for r in results),
         }
 
+    def _sectioned_analysis(
+        self,
+        company: str,
+        focus: list[str],
+        sources: list[Source],
+        memory_docs: list[dict],
+        on_token: Callable[[str], None] | None = None,
+    ) -> dict[str, Any]:
+        groups = self._section_groups()
+        results: list[dict[str, Any]] = []
+        with ThreadPoolExecutor(max_workers=max(1, self.section_concurrency), thread_name_prefix="analyst") as pool:
+            futures = [pool.submit(self._run_group, company, focus, titles, sources, memory_docs) for titles in groups]
+            for future in as_completed(futures):
+                result = future.result()
+                results.append(result)
+                if on_token is not None:
+                    # Each finished group is a complete JSON document for the token stream parser.
+                    on_token(json.dumps(result, ensure_ascii=True))
+        return self._merge_groups(results, company)
+
+    async def _asectioned_analysis(
+        self,
+        company: str,
+        focus: list[str],
+        sources: list[Source],
+        memory_docs: list[dict],
+    ) -> dict[str, Any]:
+        slots = asyncio.Semaphore(max(1, self.section_concurrency))
+
+        async def bounded(titles: list[str]) -> dict[str, Any]:
+            async with slots:
+                return await self._arun_group(company, focus, titles, sources, memory_docs)
+
+        results = await asyncio.gather(*(bounded(titles) for titles in self._section_groups()))
+        return self._merge_groups(list(results), company)
+
     def writer(
         self,
         company: str,
@@ -0,0 +1,84 @@
+from __future__ import annotations
+
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
+from contextlib import nullcontext
+from dataclasses import dataclass
+import logging
+import time
+from typing import Any, Iterator
+
+from src.core.graph import DueDiligenceGraph
+from src.core.state import ResearchState
+
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class BatchResult:
+    index: int
+    request: dict[str, Any]
+    state: ResearchState | None = None
+    error: str | None = None
+    elapsed_ms: float = 0.0
+
+    def to_dict(self) -> dict[str, Any]:
+        out: dict[str, Any] = {
+            "index": self.index,
+            "company": self.request.get("company"),
+            "status": "failed" if self.error else "succeeded",
+            "elapsed_ms": self.elapsed_ms,
+        }
+        if self.error:
+            out["error"] = self.error
+            return out
+        state = self.state or {}
+        out["run_id"] = state.get("run_id")
+        out["served_from_cache"] = state.get("report_cache") in ("hit", "coalesced")
+        out["timings"] = state.get("node_timings", {})
+        out["report"] = state["report"].model_dump()
+        return out
+
+
+class BatchRunner:
+    # All batches share the graph's fetch pool, search rate limiter and caches, and one
+    # executor, so max_concurrency bounds runs across every batch in the process.
+    def __init__(self, graph: DueDiligenceGraph, max_concurrency: int = 4) -> None:
+        self.graph = graph
+        self.max_concurrency = max(1, max_concurrency)
+        self._executor = ThreadPoolExecutor(max_workers=self.max_concurrency, thread_name_prefix="batch")
+
+    def run(self, requests: list[dict[str, Any]], flush_timeout_seconds: float | None = 60.0) -> Iterator[BatchResult]:
+        ingest = self.graph.memory_manager.ingest
+        start = time.perf_counter()
+        pending: set[Future] = set()
+        with ingest.hold() if ingest is not None else nullcontext():
+            try:
+                pending = {self._executor.submit(self._run_one, idx, req) for idx, req in enumerate(requests)}
+                while pending:
+                    done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                    for future in done:
+                        yield future.result()
+            finally:
+                # A consumer that stops early (e.g. a disconnected client) drops the queued companies.
+                for future in pending:
+                    future.cancel()
+        if ingest is not None:
+            ingest.flush(flush_timeout_seconds)
+        logger.info("Batch of %s companies finished in %.2fs", len(requests), time.perf_counter() - start)
+
+    def shutdown(self) -> None:
+        self._executor.shutdown(wait=False, cancel_futures=True)
+
+    def _run_one(self, index: int, request: dict[str, Any]) -> BatchResult:
+        start = time.perf_counter()
+        try:
+            state = self.graph.run(**request)
+            if state.get("report") is None:
+                raise RuntimeError("Failed to generate report")
+            result = BatchResult(index=index, request=request, state=state)
+        except Exception as exc:
+            logger.exception("Batch research for %s failed", request.get("company"))
+            result = BatchResult(index=index, request=request, error=str(exc))
+        result.elapsed_ms = round((time.perf_counter() - start) * 1000, 2)
+        return result
@@ -0,0 +1,116 @@
+from __future__ import annotations
+
+import asyncio
+from pathlib import Path
+import sqlite3
+import time
+from typing import Any, AsyncIterator
+
+from langchain_core.runnables import RunnableConfig
+from langgraph.checkpoint.base import ChannelVersions, Checkpoint, CheckpointMetadata, CheckpointTuple
+from langgraph.checkpoint.sqlite import SqliteSaver
+
+
+class ThreadedSqliteSaver(SqliteSaver):
+    # SqliteSaver is sync-only; its async methods run the sync ones on a worker
+    # thread so the same store backs both invoke() and ainvoke().
+    retention_seconds = 0.0
+    prune_interval_seconds = 3600.0
+    _last_prune = float("-inf")
+
+    @classmethod
+    def open(cls, path: Path, retention_seconds: float = 0.0, prune_interval_seconds: float = 3600.0) -> "ThreadedSqliteSaver":
+        path.parent.mkdir(parents=True, exist_ok=True)
+        saver = cls(sqlite3.connect(str(path), check_same_thread=False))
+        saver.retention_seconds = retention_seconds
+        saver.prune_interval_seconds = prune_interval_seconds
+        return saver
+
+    def setup(self) -> None:
+        if self.is_setup:
+            return
+        super().setup()
+        # Last write per run, so finished runs can be pruned once they are older than the retention.
+        self.conn.execute("CREATE TABLE IF NOT EXISTS run_activity (thread_id TEXT PRIMARY KEY, updated_at REAL NOT NULL)")
+        self.conn.commit()
+
+    def put(
+        self,
+        config: RunnableConfig,
+        checkpoint: Checkpoint,
+        metadata: CheckpointMetadata,
+        new_versions: ChannelVersions,
+    ) -> RunnableConfig:
+        saved = super().put(config, checkpoint, metadata, new_versions)
+        with self.cursor() as cur:
+            cur.execute(
+                "INSERT OR REPLACE INTO run_activity (thread_id, updated_at) VALUES (?, ?)",
+                (str(config["configurable"]["thread_id"]), time.time()),
+            )
+        self._maybe_prune()
+        return saved
+
+    def _maybe_prune(self) -> None:
+        # A long-running process keeps writing; expire old runs as it goes, not only at startup.
+        if self.retention_seconds <= 0:
+            return
+        with self.lock:
+            if time.monotonic() - self._last_prune < self.prune_interval_seconds:
+                return
+            self._last_prune = time.monotonic()
+        self.prune(self.retention_seconds)
+
+    def prune(self, max_age_seconds: float) -> int:
+        cutoff = time.time() - max_age_seconds
+        self._last_prune = time.monotonic()
+        with self.cursor() as cur:
+            # Runs checkpointed before activity was tracked start their retention now.
+            cur.execute(
+                "INSERT OR IGNORE INTO run_activity (thread_id, updated_at) SELECT DISTINCT thread_id, ? FROM checkpoints",
+                (time.time(),),
+            )
+            expired = [row[0] for row in cur.execute("SELECT thread_id FROM run_activity WHERE updated_at < ?", (cutoff,))]
+        for thread_id in expired:
+            self.delete_thread(thread_id)
+        return len(expired)
+
+    def delete_thread(self, thread_id: str) -> None:
+        super().delete_thread(thread_id)
+        with self.cursor() as cur:
+            cur.execute("DELETE FROM run_activity WHERE thread_id = ?", (str(thread_id),))
+
+    async def aget_tuple(self, config: RunnableConfig) -> CheckpointTuple | None:
+        return await asyncio.to_thread(self.get_tuple, config)
+
+    async def alist(
+        self,
+        config: RunnableConfig | None,
+        *,
+        filter: dict[str, Any] | None = None,
+        before: RunnableConfig | None = None,
+        limit: int | None = None,
+    ) -> AsyncIterator[CheckpointTuple]:
+        rows = await asyncio.to_thread(lambda: list(self.list(config, filter=filter, before=before, limit=limit)))
+        for row in rows:
+            yield row
+
+    async def aput(
+        self,
+        config: RunnableConfig,
+        checkpoint: Checkpoint,
+        metadata: CheckpointMetadata,
+        new_versions: ChannelVersions,
+    ) -> RunnableConfig:
+        return await asyncio.to_thread(self.put, config, checkpoint, metadata, new_versions)
+
+    async def aput_writes(
+        self,
+        config: RunnableConfig,
+        writes: list[tuple[str, Any]],
+        task_id: str,
+        task_path: str = "",
+    ) -> None:
+        await asyncio.to_thread(self.put_writes, config, writes, task_id, task_path)
+
+    async def adelete_thread(self, thread_id: str) -> None:
+        await asyncio.to_thread(self.delete_thread, thread_id)
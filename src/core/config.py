@@ -1,6 +1,6 @@
 from __future__ import annotations
 
-from dataclasses import dataclass
+from dataclasses import dataclass, field
 from pathlib import Path
 import os
 
@@ -10,6 +10,16 @@ from dotenv import load_dotenv
 load_dotenv()
 
 
+
+def _float_map(raw: str) -> dict[str, float]:
+    out: dict[str, float] = {}
+    for part in raw.split(","):
+        name, sep, value = part.partition("=")
+        if sep and name.strip() and value.strip():
+            out[name.strip()] = float(value)
+    return out
+
+
 @dataclass(frozen=True)
 class Settings:
     service_name: str = "enterprise-ai-due-diligence-agent"
@@ -17,11 +27,72 @@ class Settings:
     openai_model: str = os.getenv("OPENAI_MODEL", "gpt-4.1-mini")
     ollama_model: str = os.getenv("OLLAMA_MODEL", "llama3.1:8b")
     ollama_base_url: str = os.getenv("OLLAMA_BASE_URL", "http://localhost:11434")
+    llm_max_in_flight: int = int(os.getenv("LLM_MAX_IN_FLIGHT", "8"))
+    llm_routing: bool = os.getenv("LLM_ROUTING", "true").lower() == "true"
+    llm_call_timeout_seconds: float = float(os.getenv("LLM_CALL_TIMEOUT_SECONDS", "45"))
+    llm_breaker_threshold: int = int(os.getenv("LLM_BREAKER_THRESHOLD", "3"))
+    llm_breaker_cooldown_seconds: float = float(os.getenv("LLM_BREAKER_COOLDOWN_SECONDS", "60"))
+    llm_probe_interval_seconds: float = float(os.getenv("LLM_PROBE_INTERVAL_SECONDS", "15"))
+    analyst_mode: str = os.getenv("ANALYST_MODE", "single")
+    analyst_section_group_size: int = int(os.getenv("ANALYST_SECTION_GROUP_SIZE", "2"))
+    analyst_max_concurrency: int = int(os.getenv("ANALYST_MAX_CONCURRENCY", "4"))
+    context_packing: bool = os.getenv("CONTEXT_PACKING", "true").lower() == "true"
+    context_token_budget: int = int(os.getenv("CONTEXT_TOKEN_BUDGET", "3000"))
+    context_token_budgets: dict[str, float] = field(
+        default_factory=lambda: _float_map(os.getenv("CONTEXT_TOKEN_BUDGETS", ""))
+    )
+    llm_cache_enabled: bool = os.getenv("LLM_CACHE_ENABLED", "true").lower() == "true"
+    llm_cache_ttl_seconds: float = float(os.getenv("LLM_CACHE_TTL_SECONDS", "604800"))
+    llm_cache_max_entries: int = int(os.getenv("LLM_CACHE_MAX_ENTRIES", "2000"))
     request_timeout_seconds: int = int(os.getenv("REQUEST_TIMEOUT_SECONDS", "15"))
     fetch_timeout_seconds: int = int(os.getenv("FETCH_TIMEOUT_SECONDS", "12"))
     max_fetch_chars: int = int(os.getenv("MAX_FETCH_CHARS", "20000"))
+    graph_pipelined: bool = os.getenv("GRAPH_PIPELINED", "false").lower() == "true"
+    near_duplicate_distance: int = int(os.getenv("NEAR_DUPLICATE_DISTANCE", "3"))
     min_clean_chars: int = int(os.getenv("MIN_CLEAN_CHARS", "400"))
+    fetch_max_bytes: int = int(os.getenv("FETCH_MAX_BYTES", "2000000"))
+    html_extractor: str = os.getenv("HTML_EXTRACTOR", "auto")
+    clean_workers: int = int(os.getenv("CLEAN_WORKERS", "0"))
+    clean_task_max_bytes: int = int(os.getenv("CLEAN_TASK_MAX_BYTES", "4000000"))
+    fetch_max_workers: int = int(os.getenv("FETCH_MAX_WORKERS", "8"))
+    fetch_per_host_limit: int = int(os.getenv("FETCH_PER_HOST_LIMIT", "2"))
+    fetch_stage_deadline_seconds: float = float(os.getenv("FETCH_STAGE_DEADLINE_SECONDS", "30"))
+    fetch_cache_ttl_seconds: float = float(os.getenv("FETCH_CACHE_TTL_SECONDS", "604800"))
+    fetch_cache_max_bytes: int = int(os.getenv("FETCH_CACHE_MAX_BYTES", str(256 * 1024 * 1024)))
+    fetch_cache_compress: bool = os.getenv("FETCH_CACHE_COMPRESS", "true").lower() == "true"
+    fetch_negative_ttls: dict[str, float] = field(
+        default_factory=lambda: _float_map(os.getenv("FETCH_NEGATIVE_TTLS", ""))
+    )
+    fetch_breaker_threshold: int = int(os.getenv("FETCH_BREAKER_THRESHOLD", "3"))
+    fetch_breaker_cooldown_seconds: float = float(os.getenv("FETCH_BREAKER_COOLDOWN_SECONDS", "300"))
     enable_web_search: bool = os.getenv("ENABLE_WEB_SEARCH", "true").lower() == "true"
+    search_max_workers: int = int(os.getenv("SEARCH_MAX_WORKERS", "4"))
+    search_cache_ttl_seconds: float = float(os.getenv("SEARCH_CACHE_TTL_SECONDS", "86400"))
+    search_cache_max_entries: int = int(os.getenv("SEARCH_CACHE_MAX_ENTRIES", "5000"))
+    search_backend: str = os.getenv("SEARCH_BACKEND", "duckduckgo")
+    search_corpus_dir: Path = Path(os.getenv("SEARCH_CORPUS_DIR", "data/corpus"))
+    search_rate_per_second: float = float(os.getenv("SEARCH_RATE_PER_SECOND", "1.0"))
+    search_rate_burst: int = int(os.getenv("SEARCH_RATE_BURST", "4"))
+    search_max_retries: int = int(os.getenv("SEARCH_MAX_RETRIES", "3"))
+    search_backoff_seconds: float = float(os.getenv("SEARCH_BACKOFF_SECONDS", "1.0"))
+    memory_write_behind: bool = os.getenv("MEMORY_WRITE_BEHIND", "true").lower() == "true"
+    memory_ingest_batch_size: int = int(os.getenv("MEMORY_INGEST_BATCH_SIZE", "256"))
+    memory_ingest_flush_seconds: float = float(os.getenv("MEMORY_INGEST_FLUSH_SECONDS", "2"))
+    memory_persist_interval_seconds: float = float(os.getenv("MEMORY_PERSIST_INTERVAL_SECONDS", "30"))
+    memory_retrieve_workers: int = int(os.getenv("MEMORY_RETRIEVE_WORKERS", "4"))
+    report_cache_enabled: bool = os.getenv("REPORT_CACHE_ENABLED", "true").lower() == "true"
+    report_cache_ttl_seconds: float = float(os.getenv("REPORT_CACHE_TTL_SECONDS", "900"))
+    report_cache_max_entries: int = int(os.getenv("REPORT_CACHE_MAX_ENTRIES", "500"))
+    job_workers: int = int(os.getenv("JOB_WORKERS", "2"))
+    job_max_queue: int = int(os.getenv("JOB_MAX_QUEUE", "32"))
+    job_retention_seconds: float = float(os.getenv("JOB_RETENTION_SECONDS", "3600"))
+    default_deadline_seconds: float = float(os.getenv("DEFAULT_DEADLINE_SECONDS", "0"))
+    analyst_full_context_seconds: float = float(os.getenv("ANALYST_FULL_CONTEXT_SECONDS", "30"))
+    batch_max_concurrency: int = int(os.getenv("BATCH_MAX_CONCURRENCY", "4"))
+    checkpoint_enabled: bool = os.getenv("CHECKPOINT_ENABLED", "true").lower() == "true"
+    checkpoint_path: Path = Path(os.getenv("CHECKPOINT_PATH", "data/checkpoints.sqlite3"))
+    checkpoint_retention_seconds: float = float(os.getenv("CHECKPOINT_RETENTION_SECONDS", str(7 * 24 * 3600)))
+    checkpoint_prune_interval_seconds: float = float(os.getenv("CHECKPOINT_PRUNE_INTERVAL_SECONDS", "3600"))
     data_dir: Path = Path(os.getenv("DATA_DIR", "data"))
     faiss_dir: Path = Path(os.getenv("FAISS_DIR", "data/faiss_index"))
     cache_dir: Path = Path(os.getenv("CACHE_DIR", "data/cache"))
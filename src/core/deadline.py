@@ -0,0 +1,49 @@
+from __future__ import annotations
+
+from concurrent.futures import Future
+import threading
+import time
+from typing import Callable, TypeVar
+
+from src.core.state import ResearchState
+
+
+T = TypeVar("T")
+
+# Each stage must be done by this fraction of the request budget, so a slow stage
+# spends its own share instead of the time the analyst and writer need.
+STAGE_CHECKPOINTS = {
+    "planner": 0.15,
+    "retry": 0.3,
+    "search": 0.4,
+    "fetch": 0.65,
+    "memory": 0.7,
+    "analyst": 0.95,
+    "done": 1.0,
+}
+
+
+def stage_window(state: ResearchState, stage: str) -> float | None:
+    # Seconds left until the stage's checkpoint; None when the request has no deadline.
+    deadline_at = state.get("deadline_at")
+    if not deadline_at:
+        return None
+    budget = deadline_at - state.get("started_at", deadline_at)
+    checkpoint = deadline_at - (1.0 - STAGE_CHECKPOINTS[stage]) * budget
+    return checkpoint - time.time()
+
+
+def call_with_deadline(func: Callable[[], T], timeout: float | None) -> T:
+    if timeout is None:
+        return func()
+    future: Future = Future()
+
+    def target() -> None:
+        try:
+            future.set_result(func())
+        except BaseException as exc:
+            future.set_exception(exc)
+
+    # A daemon thread rather than a pool worker: an abandoned call must not hold a slot other runs need.
+    threading.Thread(target=target, name="deadline-call", daemon=True).start()
+    return future.result(timeout=max(0.0, timeout))
@@ -1,22 +1,43 @@
 from __future__ import annotations
 
+import asyncio
+from collections import Counter
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
+from dataclasses import replace
+import inspect
+import math
 import logging
 import json
-from typing import Any
+import queue
+import threading
+import time
+import uuid
+from typing import Any, Awaitable, Callable, Iterator
 
-from langgraph.graph import END, StateGraph
+from langchain_core.runnables import RunnableConfig, RunnableLambda
+from langgraph.checkpoint.base import BaseCheckpointSaver
+from langgraph.graph import END, START, StateGraph
 
+from src.core import metrics
 from src.core.agents import AgentBundle
-from src.core.state import MemDoc, ResearchState, Source
+from src.core.deadline import call_with_deadline, stage_window
+from src.core.report_cache import ReportCache, report_key
+from src.core.state import MemDoc, Report, ResearchState, Source
+from src.core.streaming import AnalystTokenStream
 from src.memory.memory_manager import MemoryManager
-from src.tools.fetch import FetchTool
+from src.tools.dedupe import near_duplicate_indices
+from src.tools.fetch import FetchResult, FetchTool
 from src.tools.search import DuckDuckGoSearchTool
-from src.tools.utils import dedupe_urls
+from src.tools.utils import canonicalize_url, dedupe_urls
 
 
 logger = logging.getLogger(__name__)
 
 
+class RunNotFoundError(KeyError):
+    pass
+
+
 class DueDiligenceGraph:
     def __init__(
         self,
@@ -24,142 +45,724 @@ class DueDiligenceGraph:
         memory_manager: MemoryManager,
         search_tool: DuckDuckGoSearchTool,
         fetch_tool: FetchTool,
+        near_duplicate_distance: int = 3,
+        pipelined: bool = False,
+        checkpointer: BaseCheckpointSaver | None = None,
+        report_cache: ReportCache | None = None,
+        default_deadline_seconds: float | None = None,
+        analyst_full_context_seconds: float = 30.0,
+        memory_retrieve_workers: int = 4,
     ) -> None:
         self.agents = agents
         self.memory_manager = memory_manager
         self.search_tool = search_tool
         self.fetch_tool = fetch_tool
+        self.near_duplicate_distance = near_duplicate_distance
+        self.pipelined = pipelined
+        self.checkpointer = checkpointer
+        self.report_cache = report_cache
+        self.default_deadline_seconds = default_deadline_seconds
+        self.analyst_full_context_seconds = analyst_full_context_seconds
+        self._memory_pool = ThreadPoolExecutor(max_workers=max(1, memory_retrieve_workers), thread_name_prefix="memory")
+        # Late memory writes get their own worker so they never queue ahead of other runs' retrievals.
+        self._late_write_pool = ThreadPoolExecutor(max_workers=1, thread_name_prefix="memory-late")
+        self._memory_jobs: dict[str, Future] = {}
+        self._lock = threading.Lock()
         self.graph = self._build_graph()
 
     def _build_graph(self):
         workflow = StateGraph(ResearchState)
-        workflow.add_node("planner", self.planner_node)
-        workflow.add_node("search", self.search_node)
-        workflow.add_node("retry_plan", self.retry_plan_node)
-        workflow.add_node("fetch_clean", self.fetch_clean_node)
-        workflow.add_node("memory_retrieve", self.memory_retrieve_node)
-        workflow.add_node("analyst", self.analyst_node)
-        workflow.add_node("writer", self.writer_node)
-        workflow.add_node("memory_update", self.memory_update_node)
-
-        workflow.set_entry_point("planner")
-        workflow.add_edge("planner", "search")
-        workflow.add_conditional_edges(
-            "search",
-            self.search_router,
-            {"retry": "retry_plan", "continue": "fetch_clean"},
-        )
-        workflow.add_edge("retry_plan", "search")
-        workflow.add_edge("fetch_clean", "memory_retrieve")
-        workflow.add_edge("memory_retrieve", "analyst")
+        workflow.add_node("planner", self._timed("planner", self.planner_node, self.aplanner_node))
+        workflow.add_node("memory_retrieve", self._timed("memory_retrieve", self.memory_retrieve_node))
+        workflow.add_node("memory_join", self._timed("memory_join", self.memory_join_node))
+        workflow.add_node("analyst", self._timed("analyst", self.analyst_node, self.aanalyst_node))
+        workflow.add_node("writer", self._timed("writer", self.writer_node))
+        workflow.add_node("memory_update", self._timed("memory_update", self.memory_update_node))
+
+        # memory_retrieve only needs company/focus: it starts the vector search in the
+        # background at the first step and memory_join collects it before the analyst.
+        # (A plain parallel branch would still wait at every superstep barrier.)
+        workflow.add_edge(START, "planner")
+        workflow.add_edge(START, "memory_retrieve")
+        if self.pipelined:
+            workflow.add_node("search_fetch", self._timed("search_fetch", self.search_fetch_node))
+            workflow.add_edge("planner", "search_fetch")
+            evidence_node = "search_fetch"
+        else:
+            workflow.add_node("search", self._timed("search", self.search_node))
+            workflow.add_node("retry_plan", self._timed("retry_plan", self.retry_plan_node))
+            workflow.add_node("fetch_clean", self._timed("fetch_clean", self.fetch_clean_node))
+            workflow.add_edge("planner", "search")
+            workflow.add_conditional_edges(
+                "search",
+                self.search_router,
+                {"retry": "retry_plan", "continue": "fetch_clean"},
+            )
+            workflow.add_edge("retry_plan", "search")
+            evidence_node = "fetch_clean"
+        workflow.add_edge([evidence_node, "memory_retrieve"], "memory_join")
+        workflow.add_edge("memory_join", "analyst")
         workflow.add_edge("analyst", "writer")
         workflow.add_edge("writer", "memory_update")
         workflow.add_edge("memory_update", END)
-        return workflow.compile()
+        return workflow.compile(checkpointer=self.checkpointer)
+
+    def _timed(self, name: str, func: Callable[..., dict], afunc: Callable[..., Awaitable[dict]] | None = None):
+        wants_config = "config" in inspect.signature(func).parameters
+
+        def run(state: ResearchState, config: RunnableConfig) -> dict[str, Any]:
+            start = time.time()
+            state = self._with_window(state, config)
+            update = func(state, config=config) if wants_config else func(state)
+            return self._with_timing(name, state, start, update)
+
+        if afunc is None:
+            return run
+
+        async_wants_config = "config" in inspect.signature(afunc).parameters
+
+        async def arun(state: ResearchState, config: RunnableConfig) -> dict[str, Any]:
+            start = time.time()
+            state = self._with_window(state, config)
+            update = await (afunc(state, config=config) if async_wants_config else afunc(state))
+            return self._with_timing(name, state, start, update)
+
+        return RunnableLambda(run, afunc=arun)
+
+    def _with_window(self, state: ResearchState, config: RunnableConfig) -> ResearchState:
+        # Resumed runs carry a fresh deadline window in their config; the checkpointed one has usually passed.
+        window = (config or {}).get("configurable", {}).get("deadline_window")
+        return {**state, **window} if window else state
+
+    def _with_timing(self, name: str, state: ResearchState, start: float, update: dict[str, Any] | None) -> dict[str, Any]:
+        end = time.time()
+        metrics.NODE_SECONDS.labels(node=name).observe(end - start)
+        origin = state.get("started_at") or start
+        timing = {"start_ms": round((start - origin) * 1000, 2), "elapsed_ms": round((end - start) * 1000, 2)}
+        return {**(update or {}), "node_timings": {**(update or {}).get("node_timings", {}), name: timing}}
 
     def planner_node(self, state: ResearchState) -> dict[str, Any]:
-        queries = self.agents.planner(state["company"], state.get("focus", []), state.get("depth", "standard"))
+        args = (state["company"], state.get("focus", []), state.get("depth", "standard"))
+        try:
+            queries = call_with_deadline(lambda: self.agents.planner(*args), stage_window(state, "planner"))
+        except TimeoutError:
+            return self._fallback_plan(state)
+        return {"query_plan": queries, "retry_count": 0}
+
+    async def aplanner_node(self, state: ResearchState) -> dict[str, Any]:
+        args = (state["company"], state.get("focus", []), state.get("depth", "standard"))
+        window = stage_window(state, "planner")
+        try:
+            queries = await asyncio.wait_for(self.agents.aplanner(*args), None if window is None else max(0.0, window))
+        except TimeoutError:
+            return self._fallback_plan(state)
         return {"query_plan": queries, "retry_count": 0}
 
+    def _fallback_plan(self, state: ResearchState) -> dict[str, Any]:
+        logger.info("Planner for %s ran out of time; using default queries", state["company"])
+        queries = self.agents.fallback_queries(state["company"], state.get("focus", []), state.get("depth", "standard"))
+        return {"query_plan": queries, "retry_count": 0, "degraded": ["planner"]}
+
     def search_node(self, state: ResearchState) -> dict[str, Any]:
         depth = state.get("depth", "standard")
         per_query = {"quick": 2, "standard": 3, "deep": 4}.get(depth, 3)
 
-        found: list[Source] = []
-        for query in state.get("query_plan", []):
-            rows = self.search_tool.search(query, max_results=per_query)
+        searched = list(state.get("searched_queries", []))
+        pending = [q for q in state.get("query_plan", []) if q not in set(searched)]
+        degraded: list[str] = []
+        try:
+            batches = call_with_deadline(
+                lambda: self.search_tool.search_many(pending, max_results=per_query), stage_window(state, "search")
+            )
+        except TimeoutError:
+            logger.info("Search for %s ran out of time; continuing with %s sources", state["company"], len(state.get("sources", [])))
+            batches, degraded = [], ["search"]
+
+        found: list[Source] = list(state.get("sources", []))
+        for rows in batches:
             for row in rows:
                 url = str(row.get("url", "")).strip()
                 if not url:
                     continue
                 found.append(Source(url=url, title=row.get("title", ""), snippet=row.get("snippet", ""), text=""))
 
-        deduped_urls = dedupe_urls([s.url for s in found])
-        deduped_sources: list[Source] = []
-        first_by_url = {s.url: s for s in found}
-        for url in deduped_urls:
-            deduped_sources.append(first_by_url[url])
+        first_by_url: dict[str, Source] = {}
+        for source in found:
+            first_by_url.setdefault(source.url.strip(), source)
+        deduped_sources = [first_by_url[url] for url in dedupe_urls([s.url for s in found])]
+        dedupe_stats = dict(state.get("dedupe_stats", {}))
+        dedupe_stats["duplicate_urls"] = dedupe_stats.get("duplicate_urls", 0) + len(found) - len(deduped_sources)
 
-        return {"sources": deduped_sources}
+        return {
+            "sources": deduped_sources,
+            "searched_queries": searched + pending,
+            "dedupe_stats": dedupe_stats,
+            "degraded": degraded,
+        }
 
     def search_router(self, state: ResearchState) -> str:
         min_sources = {"quick": 3, "standard": 5, "deep": 8}.get(state.get("depth", "standard"), 5)
         retry_count = int(state.get("retry_count", 0))
         source_count = len(state.get("sources", []))
         if source_count < min_sources and retry_count < 1:
-            return "retry"
+            if not self._retry_too_late(state):
+                return "retry"
+            logger.info("Skipping the search retry for %s to meet the request deadline", state["company"])
         return "continue"
 
+    def _retry_too_late(self, state: ResearchState) -> bool:
+        window = stage_window(state, "retry")
+        return window is not None and window <= 0
+
     def retry_plan_node(self, state: ResearchState) -> dict[str, Any]:
         expanded = self.agents.expand_queries(state["company"], state.get("focus", []), state.get("query_plan", []))
         return {"query_plan": expanded, "retry_count": int(state.get("retry_count", 0)) + 1}
 
     def fetch_clean_node(self, state: ResearchState) -> dict[str, Any]:
         depth = state.get("depth", "standard")
-        max_pages = {"quick": 5, "standard": 10, "deep": 15}.get(depth, 10)
+        page_cap = {"quick": 5, "standard": 10, "deep": 15}.get(depth, 10)
+        max_pages, fetch_seconds = self._fetch_budget(state, page_cap)
+        sources = state.get("sources", [])
+        degraded = self._late_retry(state)
+        if fetch_seconds <= 0:
+            # No time to fetch: hand the analyst the search snippets instead of nothing.
+            logger.info("No time left to fetch pages for %s; using search snippets", state["company"])
+            return {"fetch_stats": {"skipped": len(sources)}, "degraded": degraded + ["fetch"]}
+        candidates = sources[:max_pages]
+        results = self.fetch_tool.fetch_many([s.url for s in candidates], deadline_seconds=fetch_seconds)
+        degraded += self._fetch_degraded(state, min(page_cap, len(sources)), max_pages, results)
+        return {**self._collect_pages(state, candidates, results), "degraded": degraded}
+
+    def _fetch_budget(self, state: ResearchState, max_pages: int) -> tuple[int, float]:
+        stage_deadline = self.fetch_tool.stage_deadline_seconds
+        window = stage_window(state, "fetch")
+        if window is None or window >= stage_deadline:
+            return max_pages, stage_deadline
+        # Less time than a full fetch stage: fetch proportionally fewer pages, and stop at the checkpoint.
+        pages = min(max_pages, max(2, math.ceil(max_pages * max(0.0, window) / stage_deadline)))
+        logger.info("Fetching up to %s of %s pages for %s within %.1fs", pages, max_pages, state["company"], window)
+        return pages, window
+
+    def _fetch_degraded(self, state: ResearchState, wanted: int, pages: int, results: list[FetchResult]) -> list[str]:
+        # Degraded only when the deadline cost pages: the budget cut the depth's page cap
+        # below what was available, or fetches were abandoned at the checkpoint.
+        if not state.get("deadline_at"):
+            return []
+        cut = pages < wanted or any(r.status == "deadline" for r in results)
+        return ["fetch"] if cut else []
+
+    def _late_retry(self, state: ResearchState) -> list[str]:
+        # search_router cannot write state, so the skipped retry is recorded here.
+        min_sources = {"quick": 3, "standard": 5, "deep": 8}.get(state.get("depth", "standard"), 5)
+        short = len(state.get("sources", [])) < min_sources and int(state.get("retry_count", 0)) < 1
+        return ["retry"] if short and self._retry_too_late(state) else []
+
+    def search_fetch_node(self, state: ResearchState) -> dict[str, Any]:
+        # Pipelined search -> fetch -> embed: each stage starts on an item as soon as the
+        # previous stage produces it instead of waiting for the whole batch.
+        company = state["company"]
+        depth = state.get("depth", "standard")
+        per_query = {"quick": 2, "standard": 3, "deep": 4}.get(depth, 3)
+        page_cap = {"quick": 5, "standard": 10, "deep": 15}.get(depth, 10)
+        min_sources = {"quick": 3, "standard": 5, "deep": 8}.get(depth, 5)
+        plan = list(state.get("query_plan", []))
+        searched = list(state.get("searched_queries", []))
+        retry_count = int(state.get("retry_count", 0))
+        max_pages, fetch_seconds = self._fetch_budget(state, page_cap)
+        degraded: list[str] = []
+        deadline = time.monotonic() + fetch_seconds
+        search_window = stage_window(state, "search")
+        search_deadline = None if search_window is None else time.monotonic() + search_window
+
+        found: list[Source] = []
+        seen: set[str] = set()
+        hits = 0
+        candidates: list[Source] = []
+        results: dict[int, FetchResult] = {}
+        pending: dict[Future, tuple[str, Any]] = {}
+        search_pool = ThreadPoolExecutor(max_workers=self.search_tool.max_workers, thread_name_prefix="pipeline")
+        embed_pool = ThreadPoolExecutor(max_workers=1, thread_name_prefix="embed")
+
+        def queue_searches(queries: list[str]) -> None:
+            for query in queries:
+                searched.append(query)
+                pending[search_pool.submit(search, query)] = ("search", query)
+
+        with self.search_tool.session(per_query) as search:
+            try:
+                queue_searches([q for q in plan if q not in set(searched)])
+                while pending:
+                    kinds = {kind for kind, _ in pending.values()}
+                    limits = ([deadline] if "fetch" in kinds else []) + (
+                        [search_deadline] if "search" in kinds and search_deadline is not None else []
+                    )
+                    timeout = max(0.0, min(limits) - time.monotonic()) if limits else None
+                    done, _ = wait(pending, timeout=timeout, return_when=FIRST_COMPLETED)
+                    if not done:
+                        now = time.monotonic()
+                        for future, (kind, payload) in list(pending.items()):
+                            if kind == "fetch" and now >= deadline:
+                                future.cancel()
+                                results[payload] = FetchResult(url=candidates[payload].url, status="deadline")
+                                del pending[future]
+                            elif kind == "search" and search_deadline is not None and now >= search_deadline:
+                                future.cancel()
+                                del pending[future]
+                                if "search" not in degraded:
+                                    degraded.append("search")
+                        logger.info("Pipeline deadline reached for %s", company)
+                        continue
+                    for future in done:
+                        kind, payload = pending.pop(future)
+                        if kind == "search":
+                            for row in future.result():
+                                url = str(row.get("url", "")).strip()
+                                if not url:
+                                    continue
+                                hits += 1
+                                key = canonicalize_url(url)
+                                if key in seen:
+                                    continue
+                                seen.add(key)
+                                source = Source(url=url, title=row.get("title", ""), snippet=row.get("snippet", ""), text="")
+                                found.append(source)
+                                if len(candidates) < max_pages:
+                                    candidates.append(source)
+                                    idx = len(candidates) - 1
+                                    if time.monotonic() < deadline:
+                                        pending[self.fetch_tool.submit(url)] = ("fetch", idx)
+                                    else:
+                                        results[idx] = FetchResult(url=url, status="deadline")
+                            searching = any(kind == "search" for kind, _ in pending.values())
+                            if not searching and len(found) < min_sources and retry_count < 1:
+                                if self._retry_too_late(state):
+                                    degraded.append("retry")
+                                else:
+                                    retry_count += 1
+                                    plan = self.agents.expand_queries(company, state.get("focus", []), plan)
+                                    queue_searches([q for q in plan if q not in set(searched)])
+                        else:
+                            source = candidates[payload]
+                            try:
+                                result = future.result()
+                            except Exception as exc:
+                                logger.warning("Fetch worker failed for %s: %s", source.url, exc)
+                                result = FetchResult(url=source.url, status="error")
+                            results[payload] = result
+                            if result.text:
+                                page = {"url": source.url, "title": source.title, "text": result.text}
+                                embed_pool.submit(self._prepare_memory, company, page)
+            finally:
+                # Searches still running use the backend session; let them finish before it closes.
+                search_pool.shutdown(wait=True, cancel_futures=True)
+                # Embedding keeps running behind memory_retrieve/analyst; memory_update reuses the vectors.
+                embed_pool.shutdown(wait=False)
+
+        fetched = [results.get(idx, FetchResult(url=s.url, status="deadline")) for idx, s in enumerate(candidates)]
+        update = self._collect_pages(state, candidates, fetched)
+        degraded += self._fetch_degraded(state, min(page_cap, len(found)), max_pages, fetched)
+        update["dedupe_stats"]["duplicate_urls"] = state.get("dedupe_stats", {}).get("duplicate_urls", 0) + hits - len(found)
+        return {**update, "query_plan": plan, "searched_queries": searched, "retry_count": retry_count, "degraded": degraded}
+
+    def _prepare_memory(self, company: str, page: dict) -> None:
+        try:
+            self.memory_manager.prepare_source_documents(company, [page])
+        except Exception as exc:
+            logger.debug("Embedding prefetch failed for %s: %s", page.get("url"), exc)
+
+    def _collect_pages(self, state: ResearchState, candidates: list[Source], results: list[FetchResult]) -> dict[str, Any]:
         updated: list[Source] = []
-        for source in state.get("sources", [])[:max_pages]:
-            text = self.fetch_tool.fetch(source.url)
-            if not text:
+        for source, result in zip(candidates, results):
+            if not result.text:
                 continue
-            updated.append(Source(url=source.url, title=source.title, snippet=source.snippet, text=text))
-        return {"sources": updated}
+            updated.append(Source(url=source.url, title=source.title, snippet=source.snippet, text=result.text))
+        duplicates = set(near_duplicate_indices([s.text for s in updated], self.near_duplicate_distance))
+        if duplicates:
+            logger.info("Collapsed %s near-duplicate pages for %s", len(duplicates), state["company"])
+            updated = [s for idx, s in enumerate(updated) if idx not in duplicates]
+        dedupe_stats = {**state.get("dedupe_stats", {}), "near_duplicate_pages": len(duplicates)}
+        fetch_stats = dict(Counter(r.status for r in results))
+        skipped = fetch_stats.get("negative_cached", 0) + fetch_stats.get("circuit_open", 0)
+        if skipped:
+            logger.info("Skipped %s known-bad pages for %s: %s", skipped, state["company"], fetch_stats)
+        return {"sources": updated, "fetch_stats": fetch_stats, "dedupe_stats": dedupe_stats}
 
     def memory_retrieve_node(self, state: ResearchState) -> dict[str, Any]:
         if not state.get("use_memory", True):
             return {"retrieved_memory": []}
+        job = self._memory_pool.submit(self._retrieve_memory, state)
+        with self._lock:
+            self._memory_jobs[state.get("run_id", "")] = job
+        return {}
+
+    def memory_join_node(self, state: ResearchState) -> dict[str, Any]:
+        if not state.get("use_memory", True):
+            return {"retrieved_memory": []}
+        with self._lock:
+            job = self._memory_jobs.pop(state.get("run_id", ""), None)
+        window = stage_window(state, "memory")
+        try:
+            if job is not None:
+                docs, timing = job.result(timeout=None if window is None else max(0.0, window))
+            else:
+                # No job when the run was resumed in another process; retrieve inline.
+                docs, timing = call_with_deadline(lambda: self._retrieve_memory(state), window)
+        except TimeoutError:
+            logger.info("Memory retrieval for %s ran out of time; continuing without memory", state["company"])
+            return {"retrieved_memory": [], "degraded": ["memory"]}
+        return {"retrieved_memory": docs, "node_timings": {"memory_search": timing}}
+
+    def _discard_memory_job(self, run_id: str) -> None:
+        # A run that failed before memory_join leaves its retrieval behind; drop it.
+        with self._lock:
+            job = self._memory_jobs.pop(run_id, None)
+        if job is not None:
+            job.cancel()
+
+    def _retrieve_memory(self, state: ResearchState) -> tuple[list[MemDoc], dict[str, float]]:
+        start = time.time()
         query = " ".join([state["company"]] + state.get("focus", []))
         rows = self.memory_manager.retrieve(query=query, company=state["company"], k=8)
         docs = [MemDoc(text=r["text"], score=r["score"], metadata=r["metadata"]) for r in rows]
-        return {"retrieved_memory": docs}
+        return docs, self._with_timing("memory_search", state, start, {})["node_timings"]["memory_search"]
 
-    def analyst_node(self, state: ResearchState) -> dict[str, Any]:
-        analysis = self.agents.analyst(
-            company=state["company"],
-            focus=state.get("focus", []),
-            sources=state.get("sources", []),
-            memory_docs=[d.model_dump() if hasattr(d, "model_dump") else d for d in state.get("retrieved_memory", [])],
-        )
-        return {"notes": json.dumps(analysis, ensure_ascii=True)}
+    def analyst_node(self, state: ResearchState, config: RunnableConfig | None = None) -> dict[str, Any]:
+        token_sink = (config or {}).get("configurable", {}).get("token_sink")
+        agents, window, degraded = self._analyst_budget(state, config)
+        if window is not None and window <= 0:
+            return self._fallback_analysis(state, agents, degraded)
+        abandoned = threading.Event()
+
+        def on_token(token: str) -> None:
+            # Tokens from a model call that outlived the deadline must not reach the stream.
+            if token_sink is not None and not abandoned.is_set():
+                token_sink(token)
+
+        try:
+            analysis = call_with_deadline(
+                lambda: agents.analyst(
+                    company=state["company"],
+                    focus=state.get("focus", []),
+                    sources=state.get("sources", []),
+                    memory_docs=[d.model_dump() if hasattr(d, "model_dump") else d for d in state.get("retrieved_memory", [])],
+                    on_token=on_token if token_sink is not None else None,
+                ),
+                window,
+            )
+        except TimeoutError:
+            abandoned.set()
+            return self._fallback_analysis(state, agents, degraded)
+        return {**self._analysis_update(state, analysis), "degraded": degraded}
+
+    async def aanalyst_node(self, state: ResearchState, config: RunnableConfig | None = None) -> dict[str, Any]:
+        agents, window, degraded = self._analyst_budget(state, config)
+        if window is not None and window <= 0:
+            return self._fallback_analysis(state, agents, degraded)
+        try:
+            analysis = await asyncio.wait_for(
+                agents.aanalyst(
+                    company=state["company"],
+                    focus=state.get("focus", []),
+                    sources=state.get("sources", []),
+                    memory_docs=[d.model_dump() if hasattr(d, "model_dump") else d for d in state.get("retrieved_memory", [])],
+                ),
+                window,
+            )
+        except TimeoutError:
+            return self._fallback_analysis(state, agents, degraded)
+        return {**self._analysis_update(state, analysis), "degraded": degraded}
+
+    def _analyst_budget(self, state: ResearchState, config: RunnableConfig | None) -> tuple[AgentBundle, float | None, list[str]]:
+        agents = self._agents(config)
+        window = stage_window(state, "analyst")
+        if window is None or window >= self.analyst_full_context_seconds:
+            return agents, window, []
+        # Less time than a full-context analyst call needs: shrink the evidence to match.
+        scale = max(0.25, window / self.analyst_full_context_seconds)
+        logger.info("Cutting analyst context for %s to %.0f%% to fit %.1fs", state["company"], scale * 100, window)
+        return replace(agents, context_scale=scale), window, ["context"]
+
+    def _fallback_analysis(self, state: ResearchState, agents: AgentBundle, degraded: list[str]) -> dict[str, Any]:
+        logger.info("Analyst for %s ran out of time; writing the heuristic report", state["company"])
+        analysis = agents.fallback_analysis(state["company"], state.get("sources", []))
+        return {"notes": json.dumps(analysis, ensure_ascii=True), "context_tokens": 0, "degraded": degraded + ["analyst"]}
+
+    def _analysis_update(self, state: ResearchState, analysis: dict[str, Any]) -> dict[str, Any]:
+        context_tokens = int(analysis.pop("context_tokens", 0))
+        logger.info("Analyst prompt for %s used ~%s context tokens", state["company"], context_tokens)
+        return {"notes": json.dumps(analysis, ensure_ascii=True), "context_tokens": context_tokens}
 
-    def writer_node(self, state: ResearchState) -> dict[str, Any]:
+    def _agents(self, config: RunnableConfig | None) -> AgentBundle:
+        # reanalyze() swaps in a bundle with a different model for the analyst/writer tail.
+        return (config or {}).get("configurable", {}).get("agents") or self.agents
+
+    def writer_node(self, state: ResearchState, config: RunnableConfig | None = None) -> dict[str, Any]:
         try:
             analysis = json.loads(state.get("notes", "{}"))
             if not isinstance(analysis, dict):
                 analysis = {}
         except Exception:
             analysis = {}
-        report = self.agents.writer(
+        report = self._agents(config).writer(
             company=state["company"],
             analysis=analysis,
             sources=state.get("sources", []),
             memory_used=bool(state.get("use_memory", True) and state.get("retrieved_memory")),
         )
+        report.degraded = list(state.get("degraded", []))
         return {"report": report}
 
     def memory_update_node(self, state: ResearchState) -> dict[str, Any]:
         report = state["report"]
         sources = [s.model_dump() if hasattr(s, "model_dump") else s for s in state.get("sources", [])]
-        added_docs = self.memory_manager.add_source_documents(state["company"], sources)
-        bullets = [section.content[:220] for section in report.sections[:5]]
-        added_summary = self.memory_manager.add_summary(state["company"], report.executive_summary, bullets)
-        updates = {"added_docs": added_docs + added_summary, "added_sources": len(sources)}
+        window = stage_window(state, "done")
+        if self.memory_manager.ingest is None and window is not None and window <= 0:
+            # Past the deadline, synchronous embedding would delay the report; finish it in the background.
+            self._late_write_pool.submit(self._write_memory_late, state["company"], sources, report)
+            updates = {"added_docs": 0, "added_sources": len(sources)}
+            report.memory_updates = updates
+            report.degraded = [*report.degraded, "memory_update"]
+            return {"report": report, "memory_updates": updates, "degraded": ["memory_update"]}
+        added = self._write_memory(state["company"], sources, report)
+        if self.memory_manager.ingest is not None:
+            updates = {"added_docs": 0, "queued_docs": added, "added_sources": len(sources)}
+        else:
+            updates = {"added_docs": added, "added_sources": len(sources)}
         report.memory_updates = updates
         return {"report": report, "memory_updates": updates}
 
-    def run(self, company: str, focus: list[str], depth: str, use_memory: bool) -> ResearchState:
-        initial: ResearchState = {
+    def _write_memory(self, company: str, sources: list[dict], report: Report) -> int:
+        added_docs = self.memory_manager.add_source_documents(company, sources)
+        bullets = [section.content[:220] for section in report.sections[:5]]
+        return added_docs + self.memory_manager.add_summary(company, report.executive_summary, bullets)
+
+    def _write_memory_late(self, company: str, sources: list[dict], report: Report) -> None:
+        try:
+            added = self._write_memory(company, sources, report)
+            logger.info("Stored %s memory records for %s after the deadline", added, company)
+        except Exception as exc:
+            logger.warning("Late memory update for %s failed: %s", company, exc)
+
+    def cache_stats(self) -> dict[str, dict]:
+        stats: dict[str, dict] = {}
+        llm_stats = self.agents.llm.stats() if hasattr(self.agents.llm, "stats") else {}
+        if llm_stats:
+            stats["llm"] = llm_stats
+        if getattr(self.search_tool, "cache", None) is not None:
+            stats["search"] = self.search_tool.cache.stats()
+        if getattr(self.fetch_tool, "cache", None) is not None:
+            stats["pages"] = self.fetch_tool.cache.stats()
+        if self.report_cache is not None:
+            stats["reports"] = self.report_cache.stats()
+        return stats
+
+    def ingest_status(self) -> dict[str, Any]:
+        if self.memory_manager.ingest is None:
+            return {"enabled": False}
+        return {"enabled": True, **self.memory_manager.ingest.status()}
+
+    def llm_health(self) -> dict[str, dict]:
+        llm = self.agents.llm
+        while hasattr(llm, "inner"):
+            llm = llm.inner
+        if hasattr(llm, "backend_stats"):
+            return llm.backend_stats()
+        return {}
+
+    def run(
+        self,
+        company: str,
+        focus: list[str],
+        depth: str,
+        use_memory: bool,
+        run_id: str | None = None,
+        use_cache: bool = True,
+        deadline_seconds: float | None = None,
+    ) -> ResearchState:
+        def execute() -> ResearchState:
+            state = self._initial_state(company, focus, depth, use_memory, run_id, deadline_seconds)
+            metrics.RESEARCH_IN_FLIGHT.inc()
+            try:
+                result = self.graph.invoke(state, config=self._run_config(state["run_id"]))
+            finally:
+                metrics.RESEARCH_IN_FLIGHT.dec()
+                self._discard_memory_job(state["run_id"])
+            self._log_completion(company, result)
+            return result
+
+        if self.report_cache is None or run_id is not None or not use_cache:
+            return execute()
+        # A run with a deadline may come back degraded, and must not wait on a run with more time,
+        # so it neither joins nor leads an in-flight run; cached (never degraded) reports still apply.
+        coalesce = not (deadline_seconds or self.default_deadline_seconds)
+        return self.report_cache.run(report_key(company, focus, depth, use_memory), execute, coalesce=coalesce)
+
+    async def arun(
+        self,
+        company: str,
+        focus: list[str],
+        depth: str,
+        use_memory: bool,
+        run_id: str | None = None,
+        use_cache: bool = True,
+        deadline_seconds: float | None = None,
+    ) -> ResearchState:
+        async def execute() -> ResearchState:
+            state = self._initial_state(company, focus, depth, use_memory, run_id, deadline_seconds)
+            metrics.RESEARCH_IN_FLIGHT.inc()
+            try:
+                result = await self.graph.ainvoke(state, config=self._run_config(state["run_id"]))
+            finally:
+                metrics.RESEARCH_IN_FLIGHT.dec()
+                self._discard_memory_job(state["run_id"])
+            self._log_completion(company, result)
+            return result
+
+        if self.report_cache is None or run_id is not None or not use_cache:
+            return await execute()
+        coalesce = not (deadline_seconds or self.default_deadline_seconds)
+        return await self.report_cache.arun(report_key(company, focus, depth, use_memory), execute, coalesce=coalesce)
+
+    def resume(self, run_id: str) -> ResearchState:
+        snapshot = self._snapshot(run_id)
+        if not snapshot.next:
+            return snapshot.values
+        logger.info("Resuming run %s at %s", run_id, list(snapshot.next))
+        try:
+            result = self.graph.invoke(None, config=self._run_config(run_id, **self._fresh_window(snapshot.values)))
+        finally:
+            self._discard_memory_job(run_id)
+        self._log_completion(result["company"], result)
+        return result
+
+    def reanalyze(self, run_id: str, agents: AgentBundle) -> ResearchState:
+        self._snapshot(run_id)
+        # Fork from the checkpoint taken just before the analyst ran; search, fetch and
+        # memory results are reused as-is. memory_update is skipped so a re-run does not
+        # write the same pages into memory twice.
+        fork = next((s for s in self.graph.get_state_history(self._run_config(run_id)) if s.next == ("analyst",)), None)
+        if fork is None:
+            raise RunNotFoundError(f"Run {run_id} never reached the analyst")
+        configurable = {**fork.config["configurable"], "agents": agents, **self._fresh_window(fork.values)}
+        config = {**fork.config, "configurable": configurable}
+        logger.info("Re-running analyst/writer for run %s", run_id)
+        return self.graph.invoke(None, config=config, interrupt_before=["memory_update"])
+
+    def _fresh_window(self, values: dict[str, Any]) -> dict[str, Any]:
+        # Give the remaining stages the run's original budget again, counted from now.
+        if not values.get("deadline_at"):
+            return {}
+        started_at = time.time()
+        budget = values["deadline_at"] - values.get("started_at", values["deadline_at"])
+        return {"deadline_window": {"started_at": started_at, "deadline_at": started_at + budget}}
+
+    def _snapshot(self, run_id: str):
+        if self.checkpointer is None:
+            raise RuntimeError("Checkpointing is disabled; runs cannot be resumed")
+        snapshot = self.graph.get_state(self._run_config(run_id))
+        if not snapshot.values:
+            raise RunNotFoundError(f"Unknown run {run_id}")
+        return snapshot
+
+    def _run_config(self, run_id: str, **configurable: Any) -> RunnableConfig:
+        return {"configurable": {"thread_id": run_id, **configurable}}
+
+    def _log_completion(self, company: str, result: ResearchState) -> None:
+        logger.info("Graph completed for %s with %s sources", company, len(result.get("sources", [])))
+        if result.get("degraded"):
+            logger.warning("Run for %s was degraded to meet its deadline: %s", company, ", ".join(result["degraded"]))
+        timings = sorted(result.get("node_timings", {}).items(), key=lambda item: item[1]["start_ms"])
+        logger.info(
+            "Node timings for %s: %s",
+            company,
+            ", ".join(f"{node}@{t['start_ms']:.0f}ms+{t['elapsed_ms']:.0f}ms" for node, t in timings),
+        )
+
+    def stream_run(
+        self,
+        company: str,
+        focus: list[str],
+        depth: str,
+        use_memory: bool,
+        run_id: str | None = None,
+        deadline_seconds: float | None = None,
+    ) -> Iterator[tuple[str, dict]]:
+        events: queue.Queue = queue.Queue()
+        done = object()
+        parser = AnalystTokenStream()
+
+        def on_token(token: str) -> None:
+            for event in parser.feed(token):
+                events.put(("token", event))
+
+        def worker() -> None:
+            start = time.perf_counter()
+            final: dict[str, Any] = {}
+            state = self._initial_state(company, focus, depth, use_memory, run_id, deadline_seconds)
+            metrics.RESEARCH_IN_FLIGHT.inc()
+            try:
+                events.put(("run", {"run_id": state["run_id"]}))
+                updates = self.graph.stream(
+                    state,
+                    config=self._run_config(state["run_id"], token_sink=on_token),
+                    stream_mode="updates",
+                )
+                for chunk in updates:
+                    for node, update in chunk.items():
+                        update = update or {}
+                        final.update(update)
+                        progress = {"node": node, "elapsed_ms": round((time.perf_counter() - start) * 1000, 2)}
+                        if node in update.get("node_timings", {}):
+                            progress["timing"] = update["node_timings"][node]
+                        if "sources" in update:
+                            progress["sources"] = len(update["sources"])
+                        events.put(("node", progress))
+                report = final.get("report")
+                if report is not None:
+                    events.put(("report", report.model_dump()))
+            except Exception as exc:
+                logger.exception("Streaming research run failed")
+                events.put(("error", {"detail": f"Research pipeline failed: {exc}"}))
+            finally:
+                metrics.RESEARCH_IN_FLIGHT.dec()
+                self._discard_memory_job(state["run_id"])
+                events.put(done)
+
+        threading.Thread(target=worker, name="research-stream", daemon=True).start()
+        while True:
+            item = events.get()
+            if item is done:
+                return
+            yield item
+
+    def _initial_state(
+        self,
+        company: str,
+        focus: list[str],
+        depth: str,
+        use_memory: bool,
+        run_id: str | None = None,
+        deadline_seconds: float | None = None,
+    ) -> ResearchState:
+        started_at = time.time()
+        deadline_seconds = deadline_seconds or self.default_deadline_seconds
+        state: ResearchState = {
             "company": company,
+            "run_id": run_id or uuid.uuid4().hex,
+            "started_at": started_at,
             "focus": focus,
             "depth": depth,
             "use_memory": use_memory,
             "query_plan": [],
+            "searched_queries": [],
             "sources": [],
             "retrieved_memory": [],
             "notes": "",
             "retry_count": 0,
+            "fetch_stats": {},
+            "dedupe_stats": {"duplicate_urls": 0, "near_duplicate_pages": 0},
             "memory_updates": {"added_docs": 0, "added_sources": 0},
         }
-        result = self.graph.invoke(initial)
-        logger.info("Graph completed for %s with %s sources", company, len(result.get("sources", [])))
-        return result
+        if deadline_seconds:
+            state["deadline_at"] = started_at + deadline_seconds
+        return state
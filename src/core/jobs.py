@@ -0,0 +1,144 @@
+from __future__ import annotations
+
+from dataclasses import dataclass, field
+import itertools
+import logging
+import queue
+import threading
+import time
+from typing import Any, Callable
+import uuid
+
+from src.core.state import ResearchState
+
+
+logger = logging.getLogger(__name__)
+
+DEPTH_PRIORITY = {"quick": 0, "standard": 1, "deep": 2}
+
+
+class QueueFullError(RuntimeError):
+    pass
+
+
+@dataclass
+class Job:
+    job_id: str
+    request: dict[str, Any]
+    priority: int
+    status: str = "queued"
+    created_at: float = field(default_factory=time.time)
+    started_at: float | None = None
+    finished_at: float | None = None
+    result: ResearchState | None = None
+    error: str | None = None
+
+
+class JobManager:
+    def __init__(
+        self,
+        run: Callable[..., ResearchState],
+        workers: int = 2,
+        max_queue: int = 32,
+        retention_seconds: float = 3600.0,
+        max_jobs: int = 1000,
+    ) -> None:
+        self.run = run
+        self.workers = max(1, workers)
+        self.max_queue = max(1, max_queue)
+        self.retention_seconds = retention_seconds
+        self.max_jobs = max(1, max_jobs)
+        self.running = 0
+        self._jobs: dict[str, Job] = {}
+        self._queue: queue.PriorityQueue = queue.PriorityQueue()
+        self._seq = itertools.count()
+        self._lock = threading.Lock()
+        self._threads: list[threading.Thread] = []
+        self._stopped = False
+
+    def submit(self, **request: Any) -> Job:
+        job = Job(job_id=uuid.uuid4().hex, request=request, priority=DEPTH_PRIORITY.get(request.get("depth", "standard"), 1))
+        with self._lock:
+            if self._stopped:
+                raise QueueFullError("Job manager is shutting down")
+            if self._queue.qsize() >= self.max_queue:
+                raise QueueFullError(f"Job queue is full ({self.max_queue} waiting)")
+            self._prune()
+            self._jobs[job.job_id] = job
+            # Same-priority jobs keep FIFO order via the sequence number.
+            self._queue.put((job.priority, next(self._seq), job.job_id))
+            self._ensure_workers()
+        logger.info("Queued job %s for %s (depth=%s)", job.job_id, request.get("company"), request.get("depth"))
+        return job
+
+    def get(self, job_id: str) -> Job | None:
+        with self._lock:
+            return self._jobs.get(job_id)
+
+    def queue_position(self, job_id: str) -> int | None:
+        with self._lock:
+            job = self._jobs.get(job_id)
+            if job is None or job.status != "queued":
+                return None
+            waiting = sorted(item for item in list(self._queue.queue) if item[2] in self._jobs)
+        return next((pos for pos, item in enumerate(waiting) if item[2] == job_id), None)
+
+    def stats(self) -> dict[str, int]:
+        with self._lock:
+            return {
+                "queued": self._queue.qsize(),
+                "running": self.running,
+                "workers": self.workers,
+                "max_queue": self.max_queue,
+                "tracked_jobs": len(self._jobs),
+            }
+
+    def shutdown(self, timeout: float | None = None) -> None:
+        with self._lock:
+            self._stopped = True
+            threads = list(self._threads)
+        for _ in threads:
+            self._queue.put((float("inf"), next(self._seq), None))
+        for thread in threads:
+            thread.join(timeout)
+
+    def _ensure_workers(self) -> None:
+        self._threads = [t for t in self._threads if t.is_alive()]
+        while len(self._threads) < self.workers:
+            thread = threading.Thread(target=self._work, name=f"research-job-{len(self._threads)}", daemon=True)
+            thread.start()
+            self._threads.append(thread)
+
+    def _work(self) -> None:
+        while True:
+            _, _, job_id = self._queue.get()
+            if job_id is None:
+                return
+            with self._lock:
+                job = self._jobs.get(job_id)
+                if job is None:
+                    continue
+                job.status = "running"
+                job.started_at = time.time()
+                self.running += 1
+            try:
+                result = self.run(**job.request)
+                status, error = "succeeded", None
+            except Exception as exc:
+                logger.exception("Job %s failed", job_id)
+                result, status, error = None, "failed", str(exc)
+            with self._lock:
+                job.result, job.status, job.error = result, status, error
+                job.finished_at = time.time()
+                self.running -= 1
+
+    def _prune(self) -> None:
+        # Forget finished jobs past their retention, and the oldest ones beyond max_jobs.
+        now = time.time()
+        finished = sorted(
+            (j for j in self._jobs.values() if j.finished_at is not None), key=lambda j: j.finished_at or 0.0
+        )
+        excess = max(0, len(self._jobs) + 1 - self.max_jobs)
+        for idx, job in enumerate(finished):
+            if idx < excess or now - (job.finished_at or now) > self.retention_seconds:
+                del self._jobs[job.job_id]
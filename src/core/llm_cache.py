@@ -0,0 +1,129 @@
+from __future__ import annotations
+
+import asyncio
+from hashlib import sha256
+import json
+import logging
+import threading
+import time
+from typing import Iterator
+
+from src.core.agents import LLMClient
+from src.tools.cache import JsonCache, SingleFlight
+
+
+logger = logging.getLogger(__name__)
+
+
+
+def model_id(client: LLMClient) -> str:
+    # Metering and caching wrappers answer with their inner client's model.
+    while hasattr(client, "inner"):
+        client = client.inner
+    return f"{type(client).__name__}:{getattr(client, 'model', '')}"
+
+
+
+def prompt_key(model: str, system_prompt: str, user_prompt: str, temperature: float) -> str:
+    payload = json.dumps([model, system_prompt, user_prompt, round(float(temperature), 4)], ensure_ascii=True)
+    return sha256(payload.encode("utf-8")).hexdigest()
+
+
+class CachingLLMClient(LLMClient):
+    def __init__(self, inner: LLMClient, cache: JsonCache) -> None:
+        self.inner = inner
+        self.cache = cache
+        self.model = getattr(inner, "model", "")
+        self.coalesced = 0
+        self.saved_seconds = 0.0
+        self._flights = SingleFlight()
+        self._async_flights: dict[tuple[int, str], asyncio.Future] = {}
+        self._lock = threading.Lock()
+
+    def complete(self, system_prompt: str, user_prompt: str, temperature: float = 0.2) -> str:
+        key = prompt_key(model_id(self.inner), system_prompt, user_prompt, temperature)
+        hit = self.cache.get(key)
+        if hit is not None:
+            self._saved(hit["elapsed"])
+            return hit["text"]
+
+        entry, shared = self._flights.do(key, lambda: self._call(key, system_prompt, user_prompt, temperature))
+        if shared:
+            with self._lock:
+                self.coalesced += 1
+            self._saved(entry["elapsed"])
+        return entry["text"]
+
+    async def acomplete(self, system_prompt: str, user_prompt: str, temperature: float = 0.2) -> str:
+        key = prompt_key(model_id(self.inner), system_prompt, user_prompt, temperature)
+        hit = self.cache.get(key)
+        if hit is not None:
+            self._saved(hit["elapsed"])
+            return hit["text"]
+
+        loop = asyncio.get_running_loop()
+        flight_key = (id(loop), key)
+        flight = self._async_flights.get(flight_key)
+        if flight is not None:
+            entry = await asyncio.shield(flight)
+            with self._lock:
+                self.coalesced += 1
+            self._saved(entry["elapsed"])
+            return entry["text"]
+
+        flight = loop.create_future()
+        self._async_flights[flight_key] = flight
+        try:
+            start = time.perf_counter()
+            text = await self.inner.acomplete(system_prompt, user_prompt, temperature)
+            entry = {"text": text, "elapsed": time.perf_counter() - start}
+            if text.strip():
+                self.cache.put(key, entry)
+            flight.set_result(entry)
+            return text
+        except BaseException as exc:
+            flight.set_exception(exc)
+            flight.exception()
+            raise
+        finally:
+            self._async_flights.pop(flight_key, None)
+
+    def stream(self, system_prompt: str, user_prompt: str, temperature: float = 0.2) -> Iterator[str]:
+        key = prompt_key(model_id(self.inner), system_prompt, user_prompt, temperature)
+        hit = self.cache.get(key)
+        if hit is not None:
+            self._saved(hit["elapsed"])
+            yield hit["text"]
+            return
+
+        start = time.perf_counter()
+        parts: list[str] = []
+        for token in self.inner.stream(system_prompt, user_prompt, temperature):
+            parts.append(token)
+            yield token
+        text = "".join(parts)
+        if text.strip():
+            self.cache.put(key, {"text": text, "elapsed": time.perf_counter() - start})
+
+    def stats(self) -> dict[str, float]:
+        stats = self.cache.stats()
+        lookups = stats["hits"] + stats["misses"]
+        with self._lock:
+            return {
+                **stats,
+                "hit_rate": round(stats["hits"] / lookups, 4) if lookups else 0.0,
+                "coalesced": self.coalesced,
+                "saved_seconds": round(self.saved_seconds, 3),
+            }
+
+    def _call(self, key: str, system_prompt: str, user_prompt: str, temperature: float) -> dict:
+        start = time.perf_counter()
+        text = self.inner.complete(system_prompt, user_prompt, temperature)
+        entry = {"text": text, "elapsed": time.perf_counter() - start}
+        if text.strip():
+            self.cache.put(key, entry)
+        return entry
+
+    def _saved(self, seconds: float) -> None:
+        with self._lock:
+            self.saved_seconds += float(seconds)
@@ -0,0 +1,263 @@
+from __future__ import annotations
+
+import asyncio
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+import logging
+import queue
+import threading
+import time
+from typing import Callable, Iterator
+
+from src.core.agents import HeuristicClient, LLMClient, OllamaClient, OpenAIClient
+from src.core.config import Settings
+from src.core.llm_cache import model_id
+from src.tools.circuit import CircuitBreaker
+
+
+logger = logging.getLogger(__name__)
+
+
+class LLMUnavailableError(RuntimeError):
+    pass
+
+
+class RouterLLMClient(LLMClient):
+    def __init__(
+        self,
+        backends: list[LLMClient],
+        call_timeout_seconds: float = 45.0,
+        breaker: CircuitBreaker | None = None,
+        probe_interval_seconds: float = 15.0,
+        probe_timeout_seconds: float = 3.0,
+        window: int = 20,
+        min_samples: int = 5,
+        max_error_rate: float = 0.5,
+        slow_seconds: float | None = None,
+        max_workers: int = 16,
+    ) -> None:
+        if not backends:
+            raise ValueError("RouterLLMClient needs at least one backend")
+        self.backends = backends
+        self.names = [f"{idx}:{model_id(b)}" for idx, b in enumerate(backends)]
+        self.model = getattr(backends[0], "model", "")
+        self.call_timeout_seconds = call_timeout_seconds
+        self.breaker = breaker or CircuitBreaker(failure_threshold=3, cooldown_seconds=60.0)
+        self.probe_interval_seconds = probe_interval_seconds
+        self.probe_timeout_seconds = probe_timeout_seconds
+        self.min_samples = max(1, min_samples)
+        self.max_error_rate = max_error_rate
+        self.slow_seconds = slow_seconds if slow_seconds is not None else call_timeout_seconds / 2
+        self._samples: dict[str, deque] = {name: deque(maxlen=max(1, window)) for name in self.names}
+        self._last_probe: dict[str, float] = {}
+        self._lock = threading.Lock()
+        # One pool per backend: abandoned calls to a hung backend must not take the healthy one's workers.
+        self._executors = [
+            ThreadPoolExecutor(max_workers=max(1, max_workers), thread_name_prefix=f"llm-{idx}") for idx in range(len(backends))
+        ]
+        self._probe_executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="llm-probe")
+
+    def complete(self, system_prompt: str, user_prompt: str, temperature: float = 0.2) -> str:
+        last_exc: Exception | None = None
+        for idx in self._available():
+            name = self.names[idx]
+            start = time.perf_counter()
+            future = self._executors[idx].submit(self.backends[idx].complete, system_prompt, user_prompt, temperature)
+            try:
+                text = future.result(timeout=self.call_timeout_seconds)
+            except Exception as exc:
+                future.cancel()
+                self._record(name, start, exc)
+                last_exc = exc
+                continue
+            self._record(name, start)
+            return text
+        raise LLMUnavailableError(f"No LLM backend available: {last_exc}")
+
+    async def acomplete(self, system_prompt: str, user_prompt: str, temperature: float = 0.2) -> str:
+        last_exc: Exception | None = None
+        for idx in self._available():
+            name = self.names[idx]
+            start = time.perf_counter()
+            try:
+                text = await asyncio.wait_for(
+                    self.backends[idx].acomplete(system_prompt, user_prompt, temperature),
+                    timeout=self.call_timeout_seconds,
+                )
+            except Exception as exc:
+                self._record(name, start, exc)
+                last_exc = exc
+                continue
+            self._record(name, start)
+            return text
+        raise LLMUnavailableError(f"No LLM backend available: {last_exc}")
+
+    def stream(self, system_prompt: str, user_prompt: str, temperature: float = 0.2) -> Iterator[str]:
+        last_exc: Exception | None = None
+        for idx in self._available():
+            name = self.names[idx]
+            start = time.perf_counter()
+            started = False
+            try:
+                for token in self._deadline_stream(idx, system_prompt, user_prompt, temperature):
+                    started = True
+                    yield token
+            except Exception as exc:
+                self._record(name, start, exc)
+                # Tokens already reached the caller, so switching backends would garble the output.
+                if started:
+                    raise
+                last_exc = exc
+                continue
+            self._record(name, start)
+            return
+        raise LLMUnavailableError(f"No LLM backend available: {last_exc}")
+
+    def stats(self) -> dict[str, float]:
+        # Cached backends share one completion store; add up what each one coalesced and saved.
+        per_backend = [b.stats() for b in self.backends if hasattr(b, "stats")]
+        if not per_backend:
+            return {}
+        merged = dict(per_backend[0])
+        merged["coalesced"] = sum(s.get("coalesced", 0) for s in per_backend)
+        merged["saved_seconds"] = round(sum(s.get("saved_seconds", 0.0) for s in per_backend), 3)
+        return merged
+
+    def backend_stats(self) -> dict[str, dict]:
+        out: dict[str, dict] = {}
+        with self._lock:
+            snapshot = {name: list(samples) for name, samples in self._samples.items()}
+        for name, samples in snapshot.items():
+            latencies = sorted(latency for latency, ok in samples if ok)
+            errors = sum(1 for _, ok in samples if not ok)
+            out[name] = {
+                "samples": len(samples),
+                "error_rate": round(errors / len(samples), 4) if samples else 0.0,
+                "mean_latency_seconds": round(sum(latencies) / len(latencies), 3) if latencies else 0.0,
+                "p95_latency_seconds": round(latencies[int(0.95 * (len(latencies) - 1))], 3) if latencies else 0.0,
+                "circuit_open": self.breaker.is_open(name),
+            }
+        return out
+
+    def _available(self) -> Iterator[int]:
+        ranked = []
+        for idx, name in enumerate(self.names):
+            if self.breaker.is_open(name):
+                self._maybe_probe(idx)
+            ranked.append((self._degraded(name), idx))
+        for _, idx in sorted(ranked):
+            if self.breaker.allow(self.names[idx]):
+                yield idx
+
+    def _degraded(self, name: str) -> bool:
+        with self._lock:
+            samples = list(self._samples[name])
+        if len(samples) < self.min_samples:
+            return False
+        errors = sum(1 for _, ok in samples if not ok)
+        latencies = [latency for latency, ok in samples if ok]
+        slow = bool(latencies) and sum(latencies) / len(latencies) > self.slow_seconds
+        return errors / len(samples) > self.max_error_rate or slow
+
+    def _record(self, name: str, start: float, exc: Exception | None = None) -> None:
+        elapsed = time.perf_counter() - start
+        with self._lock:
+            self._samples[name].append((elapsed, exc is None))
+        if exc is None:
+            self.breaker.record_success(name)
+            return
+        self.breaker.record_failure(name)
+        logger.warning("LLM backend %s failed after %.2fs, failing over: %r", name, elapsed, exc)
+
+    def _maybe_probe(self, idx: int) -> None:
+        name = self.names[idx]
+        now = time.monotonic()
+        with self._lock:
+            if now - self._last_probe.get(name, 0.0) < self.probe_interval_seconds:
+                return
+            self._last_probe[name] = now
+        self._probe_executor.submit(self._probe, idx)
+
+    def _probe(self, idx: int) -> None:
+        # A reachable endpoint says nothing about completions, so only a real (tiny) completion
+        # within the deadline closes the circuit; otherwise the next half-open call decides.
+        name = self.names[idx]
+        backend = self.backends[idx]
+        future = None
+        try:
+            if not backend.health_check(self.probe_timeout_seconds):
+                return
+            future = self._executors[idx].submit(backend.complete, "Reply with OK.", "ping", 0.0)
+            future.result(timeout=self.probe_timeout_seconds)
+        except Exception as exc:
+            if future is not None:
+                future.cancel()
+            logger.debug("Health probe for %s failed: %r", name, exc)
+            return
+        logger.info("LLM backend %s answered its probe completion; closing circuit", name)
+        self.breaker.record_success(name)
+
+    def _deadline_stream(self, idx: int, system_prompt: str, user_prompt: str, temperature: float) -> Iterator[str]:
+        backend = self.backends[idx]
+        # The deadline applies to the gap between tokens, so long but live generations are not cut off.
+        tokens: queue.Queue = queue.Queue()
+
+        def pump() -> None:
+            try:
+                for token in backend.stream(system_prompt, user_prompt, temperature):
+                    tokens.put(("token", token))
+                tokens.put(("done", None))
+            except Exception as exc:
+                tokens.put(("error", exc))
+
+        self._executors[idx].submit(pump)
+        while True:
+            try:
+                kind, value = tokens.get(timeout=self.call_timeout_seconds)
+            except queue.Empty:
+                raise TimeoutError(f"no token within {self.call_timeout_seconds}s") from None
+            if kind == "done":
+                return
+            if kind == "error":
+                raise value
+            yield value
+
+
+
+def build_llm_router(settings: Settings, wrap: Callable[[LLMClient], LLMClient] | None = None) -> LLMClient:
+    backends: list[LLMClient] = []
+    if settings.openai_api_key:
+        try:
+            backends.append(
+                OpenAIClient(
+                    settings.openai_api_key,
+                    settings.openai_model,
+                    max_in_flight=settings.llm_max_in_flight,
+                    timeout_seconds=settings.llm_call_timeout_seconds,
+                    max_retries=0,
+                )
+            )
+        except Exception as exc:
+            logger.warning("Failed to initialize OpenAI client: %s", exc)
+    try:
+        backends.append(
+            OllamaClient(
+                settings.ollama_base_url,
+                settings.ollama_model,
+                timeout_seconds=settings.llm_call_timeout_seconds,
+                max_in_flight=settings.llm_max_in_flight,
+            )
+        )
+    except Exception as exc:
+        logger.warning("Failed to initialize Ollama client: %s", exc)
+    if not backends:
+        return HeuristicClient()
+    if wrap is not None:
+        backends = [wrap(backend) for backend in backends]
+    return RouterLLMClient(
+        backends,
+        call_timeout_seconds=settings.llm_call_timeout_seconds,
+        breaker=CircuitBreaker(settings.llm_breaker_threshold, settings.llm_breaker_cooldown_seconds),
+        probe_interval_seconds=settings.llm_probe_interval_seconds,
+        max_workers=settings.llm_max_in_flight,
+    )
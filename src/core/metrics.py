@@ -0,0 +1,74 @@
+from __future__ import annotations
+
+from contextlib import contextmanager
+import time
+from typing import Any, Iterator
+
+try:
+    from prometheus_client import CONTENT_TYPE_LATEST, Counter, Gauge, Histogram, generate_latest
+except ImportError:  # prometheus-client is optional; without it every metric is a no-op
+    CONTENT_TYPE_LATEST = "text/plain; version=0.0.4; charset=utf-8"
+    generate_latest = None
+
+    class _NoopMetric:
+        def __init__(self, *args: Any, **kwargs: Any) -> None:
+            pass
+
+        def labels(self, *args: Any, **kwargs: Any) -> "_NoopMetric":
+            return self
+
+        def inc(self, amount: float = 1.0) -> None:
+            pass
+
+        def dec(self, amount: float = 1.0) -> None:
+            pass
+
+        def observe(self, amount: float) -> None:
+            pass
+
+    Counter = Gauge = Histogram = _NoopMetric
+
+
+ENABLED = generate_latest is not None
+
+_SECONDS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 20.0, 40.0, 80.0, 160.0)
+
+NODE_SECONDS = Histogram("dd_node_seconds", "Graph node latency", ["node"], buckets=_SECONDS)
+RESEARCH_IN_FLIGHT = Gauge("dd_research_in_flight", "Research runs executing")
+FETCH_SECONDS = Histogram("dd_fetch_seconds", "Page fetch latency by outcome", ["status"], buckets=_SECONDS)
+FETCH_BYTES = Counter("dd_fetch_bytes_total", "Response bytes read from the network")
+FETCH_IN_FLIGHT = Gauge("dd_fetch_in_flight", "Page fetches in progress")
+SEARCH_SECONDS = Histogram("dd_search_seconds", "Search backend query latency", buckets=_SECONDS)
+SEARCH_IN_FLIGHT = Gauge("dd_search_in_flight", "Search backend queries in progress")
+LLM_SECONDS = Histogram("dd_llm_seconds", "LLM call latency", ["model", "op"], buckets=_SECONDS)
+LLM_TOKENS = Counter("dd_llm_tokens_total", "Estimated LLM tokens", ["model", "kind"])
+LLM_ERRORS = Counter("dd_llm_errors_total", "Failed LLM calls", ["model"])
+LLM_IN_FLIGHT = Gauge("dd_llm_in_flight", "LLM calls in progress", ["model"])
+EMBED_SECONDS = Histogram("dd_embed_seconds", "Embedding model encode latency", buckets=_SECONDS)
+CHUNKS_EMBEDDED = Counter("dd_chunks_embedded_total", "Texts encoded by the embedding model")
+FAISS_SEARCH_SECONDS = Histogram("dd_faiss_search_seconds", "FAISS similarity search latency", buckets=_SECONDS)
+CACHE_LOOKUPS = Counter("dd_cache_lookups_total", "Cache lookups by result", ["cache", "result"])
+
+
+@contextmanager
+def timed(histogram: Any, in_flight: Any = None) -> Iterator[None]:
+    if in_flight is not None:
+        in_flight.inc()
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        histogram.observe(time.perf_counter() - start)
+        if in_flight is not None:
+            in_flight.dec()
+
+
+def cache_lookup(cache: str, hit: bool, count: int = 1) -> None:
+    if count:
+        CACHE_LOOKUPS.labels(cache=cache, result="hit" if hit else "miss").inc(count)
+
+
+def render() -> tuple[bytes, str]:
+    if generate_latest is None:
+        return b"# prometheus-client is not installed\n", CONTENT_TYPE_LATEST
+    return generate_latest(), CONTENT_TYPE_LATEST
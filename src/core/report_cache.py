@@ -0,0 +1,104 @@
+from __future__ import annotations
+
+import asyncio
+from hashlib import sha256
+import json
+import threading
+from typing import Awaitable, Callable
+
+from src.core.state import Report, ResearchState
+from src.tools.cache import JsonCache, SingleFlight, normalize_query
+
+
+HIT = "hit"
+MISS = "miss"
+COALESCED = "coalesced"
+
+
+
+def report_key(company: str, focus: list[str], depth: str, use_memory: bool) -> str:
+    normalized_focus = sorted({normalize_query(f) for f in focus if f.strip()})
+    payload = json.dumps([normalize_query(company), normalized_focus, depth, bool(use_memory)], ensure_ascii=True)
+    return sha256(payload.encode("utf-8")).hexdigest()
+
+
+class ReportCache:
+    def __init__(self, cache: JsonCache) -> None:
+        self.cache = cache
+        self.coalesced = 0
+        self._flights = SingleFlight()
+        self._async_flights: dict[tuple[int, str], asyncio.Future] = {}
+        self._lock = threading.Lock()
+
+    def get(self, key: str) -> ResearchState | None:
+        entry = self.cache.get(key)
+        if entry is None:
+            return None
+        return {
+            "company": entry["report"]["company"],
+            "run_id": entry.get("run_id"),
+            "report": Report.model_validate(entry["report"]),
+            "report_cache": HIT,
+        }
+
+    def put(self, key: str, state: ResearchState) -> None:
+        report = state.get("report")
+        # A report cut short by a request deadline must not be served to callers with more time.
+        if report is not None and not report.degraded:
+            self.cache.put(key, {"report": report.model_dump(), "run_id": state.get("run_id")})
+
+    def run(self, key: str, compute: Callable[[], ResearchState], coalesce: bool = True) -> ResearchState:
+        hit = self.get(key)
+        if hit is not None:
+            return hit
+        if not coalesce:
+            return self._compute(key, compute)
+        state, shared = self._flights.do(key, lambda: self._compute(key, compute))
+        if shared:
+            return self._coalesced(state)
+        return state
+
+    async def arun(
+        self, key: str, compute: Callable[[], Awaitable[ResearchState]], coalesce: bool = True
+    ) -> ResearchState:
+        hit = self.get(key)
+        if hit is not None:
+            return hit
+        if not coalesce:
+            state = {**await compute(), "report_cache": MISS}
+            self.put(key, state)
+            return state
+
+        loop = asyncio.get_running_loop()
+        flight_key = (id(loop), key)
+        flight = self._async_flights.get(flight_key)
+        if flight is not None:
+            return self._coalesced(await asyncio.shield(flight))
+
+        flight = loop.create_future()
+        self._async_flights[flight_key] = flight
+        try:
+            state = {**await compute(), "report_cache": MISS}
+            self.put(key, state)
+            flight.set_result(state)
+            return state
+        except BaseException as exc:
+            flight.set_exception(exc)
+            flight.exception()
+            raise
+        finally:
+            self._async_flights.pop(flight_key, None)
+
+    def stats(self) -> dict[str, float]:
+        with self._lock:
+            return {**self.cache.stats(), "coalesced": self.coalesced}
+
+    def _compute(self, key: str, compute: Callable[[], ResearchState]) -> ResearchState:
+        state = {**compute(), "report_cache": MISS}
+        self.put(key, state)
+        return state
+
+    def _coalesced(self, state: ResearchState) -> ResearchState:
+        with self._lock:
+            self.coalesced += 1
+        return {**state, "report_cache": COALESCED}
@@ -1,6 +1,6 @@
 from __future__ import annotations
 
-from typing import TypedDict
+from typing import Annotated, TypedDict
 
 from pydantic import BaseModel, Field
 
@@ -37,17 +37,45 @@ class Report(BaseModel):
     sections: list[ReportSection]
     memory_used: bool
     memory_updates: dict[str, int] = Field(default_factory=lambda: {"added_docs": 0, "added_sources": 0})
+    degraded: list[str] = Field(default_factory=list)
+
+
+def merge_timings(left: dict[str, dict], right: dict[str, dict]) -> dict[str, dict]:
+    # Nodes that run more than once (search on retry) keep every timing as name#2, name#3, ...
+    merged = dict(left or {})
+    for name, timing in (right or {}).items():
+        key, n = name, 2
+        while key in merged:
+            key, n = f"{name}#{n}", n + 1
+        merged[key] = timing
+    return merged
+
+
+def merge_degraded(left: list[str], right: list[str]) -> list[str]:
+    merged = list(left or [])
+    merged.extend(stage for stage in right or [] if stage not in merged)
+    return merged
 
 
 class ResearchState(TypedDict, total=False):
+    run_id: str
     company: str
+    started_at: float
+    deadline_at: float
     focus: list[str]
     depth: str
     use_memory: bool
     query_plan: list[str]
+    searched_queries: list[str]
     sources: list[Source]
     retrieved_memory: list[MemDoc]
     notes: str
+    context_tokens: int
     report: Report
     retry_count: int
+    fetch_stats: dict[str, int]
+    dedupe_stats: dict[str, int]
     memory_updates: dict[str, int]
+    node_timings: Annotated[dict[str, dict], merge_timings]
+    report_cache: str
+    degraded: Annotated[list[str], merge_degraded]
@@ -0,0 +1,115 @@
+from __future__ import annotations
+
+import json
+
+
+STREAMED_KEYS = {"executive_summary", "content"}
+_ESCAPES = {'"': '"', "\\": "\\", "/": "/", "b": "\b", "f": "\f", "n": "\n", "r": "\r", "t": "\t"}
+
+
+class AnalystTokenStream:
+    # Incrementally scans the analyst's JSON output and surfaces the text of
+    # "executive_summary" and section "content" strings as they are generated.
+    def __init__(self) -> None:
+        self._stack: list[str] = []
+        self._after_colon = False
+        self._last_key = ""
+        self._section: str | None = None
+        self._in_string = False
+        self._is_key = False
+        self._streaming = False
+        self._escape = False
+        self._unicode: str | None = None
+        self._chars: list[str] = []
+
+    def feed(self, chunk: str) -> list[dict]:
+        events: list[dict] = []
+        delta: list[str] = []
+        for ch in chunk:
+            if self._in_string:
+                decoded = self._string_char(ch)
+                if decoded is None:
+                    continue
+                if decoded is _END:
+                    self._flush(events, delta)
+                    self._end_string()
+                    continue
+                self._chars.append(decoded)
+                if self._streaming:
+                    delta.append(decoded)
+                continue
+            if ch == '"':
+                self._start_string()
+            elif ch in "{[":
+                self._stack.append(ch)
+                self._after_colon = False
+                if ch == "{":
+                    self._section = None
+            elif ch in "}]":
+                if self._stack:
+                    self._stack.pop()
+                self._after_colon = False
+            elif ch == ":":
+                self._after_colon = True
+            elif ch == ",":
+                self._after_colon = False
+        self._flush(events, delta)
+        return events
+
+    def _start_string(self) -> None:
+        in_object = bool(self._stack) and self._stack[-1] == "{"
+        self._in_string = True
+        self._is_key = in_object and not self._after_colon
+        self._streaming = in_object and self._after_colon and self._last_key in STREAMED_KEYS
+        self._chars = []
+
+    def _end_string(self) -> None:
+        text = "".join(self._chars)
+        if self._is_key:
+            self._last_key = text
+        elif self._last_key == "title" and self._stack and self._stack[-1] == "{":
+            self._section = text
+        if not self._is_key:
+            self._after_colon = False
+        self._in_string = False
+        self._streaming = False
+
+    def _string_char(self, ch: str):
+        if self._unicode is not None:
+            self._unicode += ch
+            if len(self._unicode) < 4:
+                return None
+            code, self._unicode = self._unicode, None
+            try:
+                return chr(int(code, 16))
+            except ValueError:
+                return ""
+        if self._escape:
+            self._escape = False
+            if ch == "u":
+                self._unicode = ""
+                return None
+            return _ESCAPES.get(ch, ch)
+        if ch == "\\":
+            self._escape = True
+            return None
+        if ch == '"':
+            return _END
+        return ch
+
+    def _flush(self, events: list[dict], delta: list[str]) -> None:
+        if not delta:
+            return
+        if self._last_key == "executive_summary":
+            events.append({"field": "executive_summary", "delta": "".join(delta)})
+        else:
+            events.append({"field": "section", "section": self._section, "delta": "".join(delta)})
+        delta.clear()
+
+
+_END = object()
+
+
+
+def sse_event(event: str, data: dict) -> str:
+    return f"event: {event}\ndata: {json.dumps(data, ensure_ascii=True)}\n\n"
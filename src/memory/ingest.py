@@ -0,0 +1,176 @@
+from __future__ import annotations
+
+from collections import deque
+from contextlib import contextmanager
+from dataclasses import dataclass
+import logging
+import threading
+import time
+from typing import Iterator
+
+from src.rag.vectorstore import FaissVectorStore
+
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class _Pending:
+    text: str
+    metadata: dict
+    queued_at: float
+
+
+class MemoryIngestQueue:
+    def __init__(
+        self,
+        vectorstore: FaissVectorStore,
+        batch_size: int = 256,
+        flush_interval_seconds: float = 2.0,
+        persist_interval_seconds: float = 30.0,
+    ) -> None:
+        self.vectorstore = vectorstore
+        self.batch_size = max(1, batch_size)
+        self.flush_interval_seconds = flush_interval_seconds
+        self.persist_interval_seconds = persist_interval_seconds
+        self.ingested = 0
+        self.batches = 0
+        self.errors = 0
+        self.last_ingest_at: float | None = None
+        self.last_persist_at: float | None = None
+        self._pending: deque[_Pending] = deque()
+        self._in_flight = 0
+        self._cond = threading.Condition()
+        self._flushing = 0
+        self._holds = 0
+        self._stopped = False
+        self._worker: threading.Thread | None = None
+
+    def enqueue(self, texts: list[str], metadatas: list[dict]) -> int:
+        now = time.time()
+        items = [_Pending(t.strip(), m, now) for t, m in zip(texts, metadatas) if t and t.strip()]
+        if not items:
+            return 0
+        with self._cond:
+            self._pending.extend(items)
+            self._ensure_worker()
+            self._cond.notify_all()
+        return len(items)
+
+    def flush(self, timeout: float | None = None) -> bool:
+        give_up_at = None if timeout is None else time.monotonic() + timeout
+        with self._cond:
+            self._flushing += 1
+            self._cond.notify_all()
+            try:
+                while self._pending or self._in_flight:
+                    remaining = None if give_up_at is None else give_up_at - time.monotonic()
+                    if remaining is not None and remaining <= 0:
+                        return False
+                    self._cond.wait(remaining)
+            finally:
+                self._flushing -= 1
+        self._persist()
+        return True
+
+    @contextmanager
+    def hold(self) -> Iterator[None]:
+        # While held, partial batches wait for more records instead of the flush
+        # interval, so a portfolio batch embeds across companies in full batches.
+        with self._cond:
+            self._holds += 1
+        try:
+            yield
+        finally:
+            with self._cond:
+                self._holds -= 1
+                self._cond.notify_all()
+
+    def close(self, timeout: float | None = 30.0) -> None:
+        self.flush(timeout)
+        with self._cond:
+            self._stopped = True
+            self._cond.notify_all()
+
+    def status(self) -> dict[str, float | int | None]:
+        now = time.time()
+        with self._cond:
+            queued = len(self._pending) + self._in_flight
+            oldest = self._pending[0].queued_at if self._pending else None
+        return {
+            "queued": queued,
+            "ingested": self.ingested,
+            "batches": self.batches,
+            "errors": self.errors,
+            "lag_seconds": round(now - oldest, 3) if oldest is not None else 0.0,
+            "unpersisted": self.vectorstore.dirty,
+            "seconds_since_persist": round(now - self.last_persist_at, 3) if self.last_persist_at else None,
+            "seconds_since_ingest": round(now - self.last_ingest_at, 3) if self.last_ingest_at else None,
+        }
+
+    def _ensure_worker(self) -> None:
+        if self._worker is None or not self._worker.is_alive():
+            self._worker = threading.Thread(target=self._run, name="memory-ingest", daemon=True)
+            self._worker.start()
+
+    def _run(self) -> None:
+        while True:
+            batch = self._next_batch()
+            if batch is None:
+                return
+            if batch:
+                self._ingest(batch)
+            if self._persist_due():
+                self._persist()
+            with self._cond:
+                self._in_flight = 0
+                self._cond.notify_all()
+
+    def _next_batch(self) -> list[_Pending] | None:
+        with self._cond:
+            if not self._pending and not self._stopped:
+                # Idle wake-ups double as the persist schedule.
+                self._cond.wait(self.persist_interval_seconds)
+            if self._stopped and not self._pending:
+                return None
+            if self._pending:
+                # Let small inserts from concurrent runs accumulate into one embedding batch.
+                flush_at = self._pending[0].queued_at + self.flush_interval_seconds
+                while len(self._pending) < self.batch_size and not self._stopped and not self._flushing:
+                    if self._holds:
+                        self._cond.wait()
+                        continue
+                    remaining = flush_at - time.time()
+                    if remaining <= 0:
+                        break
+                    self._cond.wait(remaining)
+            batch = [self._pending.popleft() for _ in range(min(self.batch_size, len(self._pending)))]
+            self._in_flight = len(batch)
+            return batch
+
+    def _ingest(self, batch: list[_Pending]) -> None:
+        try:
+            added = self.vectorstore.add_documents([p.text for p in batch], [p.metadata for p in batch], persist=False)
+        except Exception as exc:
+            self.errors += 1
+            logger.exception("Memory ingest batch of %s records failed: %s", len(batch), exc)
+            return
+        self.ingested += added
+        self.batches += 1
+        self.last_ingest_at = time.time()
+        logger.info("Ingested %s memory records (lag %.2fs)", added, self.last_ingest_at - batch[0].queued_at)
+
+    def _persist_due(self) -> bool:
+        if not self.vectorstore.dirty:
+            return False
+        return self.last_persist_at is None or time.time() - self.last_persist_at >= self.persist_interval_seconds
+
+    def _persist(self) -> None:
+        if not self.vectorstore.dirty:
+            return
+        try:
+            self.vectorstore.save()
+            self.last_persist_at = time.time()
+        except Exception as exc:
+            self.errors += 1
+            logger.exception("Persisting the memory index failed: %s", exc)
@@ -2,14 +2,16 @@ from __future__ import annotations
 
 from datetime import datetime, timezone
 
+from src.memory.ingest import MemoryIngestQueue
 from src.memory.schemas import MemoryRecord
 from src.rag.chunking import chunk_text
 from src.rag.vectorstore import FaissVectorStore
 
 
 class MemoryManager:
-    def __init__(self, vectorstore: FaissVectorStore) -> None:
+    def __init__(self, vectorstore: FaissVectorStore, ingest: MemoryIngestQueue | None = None) -> None:
         self.vectorstore = vectorstore
+        self.ingest = ingest
 
     def retrieve(self, query: str, company: str, k: int = 6) -> list[dict]:
         results = self.vectorstore.similarity_search(query=query, k=k, company=company)
@@ -19,6 +21,18 @@ class MemoryManager:
         ]
 
     def add_source_documents(self, company: str, sources: list[dict]) -> int:
+        texts, metas = self._source_records(company, sources)
+        return self._write(texts, metas)
+
+    def prepare_source_documents(self, company: str, sources: list[dict]) -> int:
+        # Embeds chunks ahead of add_source_documents so the later write hits the embedding cache.
+        texts, _ = self._source_records(company, sources)
+        texts = [t.strip() for t in texts if t and t.strip()]
+        if texts:
+            self.vectorstore.embed(texts)
+        return len(texts)
+
+    def _source_records(self, company: str, sources: list[dict]) -> tuple[list[str], list[dict]]:
         texts: list[str] = []
         metas: list[dict] = []
         now = datetime.now(timezone.utc).isoformat()
@@ -34,7 +48,7 @@ class MemoryManager:
                 )
                 texts.append(record.text)
                 metas.append(record.model_dump(exclude={"text"}))
-        return self.vectorstore.add_documents(texts, metas)
+        return texts, metas
 
     def add_summary(self, company: str, summary: str, bullets: list[str]) -> int:
         now = datetime.now(timezone.utc).isoformat()
@@ -52,4 +66,10 @@ class MemoryManager:
             if t and t.strip()
         ]
         real_texts = [t for t in texts if t and t.strip()]
-        return self.vectorstore.add_documents(real_texts, metas)
+        return self._write(real_texts, metas)
+
+    def _write(self, texts: list[str], metas: list[dict]) -> int:
+        # With an ingest queue the count is records queued, not yet searchable.
+        if self.ingest is not None:
+            return self.ingest.enqueue(texts, metas)
+        return self.vectorstore.add_documents(texts, metas)
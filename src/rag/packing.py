@@ -0,0 +1,127 @@
+from __future__ import annotations
+
+from dataclasses import dataclass
+import json
+import logging
+import re
+
+import numpy as np
+
+from src.core.state import Source
+from src.rag.chunking import chunk_text
+from src.rag.embeddings import get_embedding_model
+
+
+logger = logging.getLogger(__name__)
+
+CHARS_PER_TOKEN = 4
+ROW_OVERHEAD_TOKENS = 12
+
+
+
+def estimate_tokens(text: str) -> int:
+    return (len(text) + CHARS_PER_TOKEN - 1) // CHARS_PER_TOKEN
+
+
+@dataclass
+class PackedContext:
+    sources: list[dict]
+    memory: list[dict]
+    tokens: int
+
+
+@dataclass
+class _Chunk:
+    kind: str
+    owner: int
+    position: int
+    text: str
+    score: float = 0.0
+
+
+class ContextPacker:
+    def __init__(
+        self,
+        token_budget: int = 3000,
+        embedding_model_name: str = "sentence-transformers/all-MiniLM-L6-v2",
+        chunk_size: int = 600,
+        overlap: int = 80,
+        max_chunks_per_source: int = 20,
+    ) -> None:
+        self.token_budget = max(1, token_budget)
+        self.embedding_model_name = embedding_model_name
+        self.chunk_size = chunk_size
+        self.overlap = overlap
+        self.max_chunks_per_source = max(1, max_chunks_per_source)
+
+    def pack(
+        self,
+        query: str,
+        sources: list[Source],
+        memory_docs: list[dict],
+        token_budget: int | None = None,
+    ) -> PackedContext:
+        chunks = self._chunks(sources, memory_docs)
+        self._score(query, chunks)
+        budget = token_budget or self.token_budget
+        used = 0
+        picked: dict[tuple[str, int], list[_Chunk]] = {}
+        # Stable sort keeps document order among equally relevant chunks.
+        for chunk in sorted(chunks, key=lambda c: -c.score):
+            key = (chunk.kind, chunk.owner)
+            cost = estimate_tokens(chunk.text)
+            if key not in picked:
+                cost += self._header_tokens(chunk, sources, memory_docs)
+            if used + cost > budget:
+                continue
+            picked.setdefault(key, []).append(chunk)
+            used += cost
+
+        source_rows: list[dict] = []
+        memory_rows: list[dict] = []
+        for (kind, owner), selected in picked.items():
+            selected.sort(key=lambda c: c.position)
+            excerpt = " ... ".join(c.text for c in selected)
+            if kind == "source":
+                s = sources[owner]
+                source_rows.append({"url": s.url, "title": s.title, "snippet": s.snippet, "excerpt": excerpt})
+            else:
+                memory_rows.append({**memory_docs[owner], "text": excerpt})
+        return PackedContext(sources=source_rows, memory=memory_rows, tokens=used)
+
+    def _chunks(self, sources: list[Source], memory_docs: list[dict]) -> list[_Chunk]:
+        chunks: list[_Chunk] = []
+        for idx, s in enumerate(sources):
+            pieces = chunk_text(s.text or s.snippet, self.chunk_size, self.overlap)
+            for pos, piece in enumerate(pieces[: self.max_chunks_per_source]):
+                chunks.append(_Chunk("source", idx, pos, piece))
+        for idx, doc in enumerate(memory_docs):
+            text = str(doc.get("text", "")).strip()
+            if text:
+                chunks.append(_Chunk("memory", idx, 0, text[: self.chunk_size]))
+        return chunks
+
+    def _score(self, query: str, chunks: list[_Chunk]) -> None:
+        if not chunks:
+            return
+        try:
+            model = get_embedding_model(self.embedding_model_name)
+            vectors = np.array(model.encode([query] + [c.text for c in chunks], normalize_embeddings=True), dtype=np.float32)
+            scores = vectors[1:] @ vectors[0]
+        except Exception as exc:
+            logger.warning("Embedding scoring failed, falling back to lexical overlap: %s", exc)
+            terms = set(re.findall(r"\w+", query.lower()))
+            scores = [
+                len(terms & set(re.findall(r"\w+", c.text.lower()))) / (len(terms) or 1)
+                for c in chunks
+            ]
+        for chunk, score in zip(chunks, scores):
+            chunk.score = float(score)
+
+    def _header_tokens(self, chunk: _Chunk, sources: list[Source], memory_docs: list[dict]) -> int:
+        if chunk.kind == "source":
+            s = sources[chunk.owner]
+            header = f"{s.url}{s.title}{s.snippet}"
+        else:
+            header = json.dumps({k: v for k, v in memory_docs[chunk.owner].items() if k != "text"}, ensure_ascii=True, default=str)
+        return estimate_tokens(header) + ROW_OVERHEAD_TOKENS
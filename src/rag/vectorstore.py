@@ -1,12 +1,16 @@
 from __future__ import annotations
 
+from collections import OrderedDict
 from dataclasses import dataclass
+from hashlib import sha1
 from pathlib import Path
 import json
+import threading
 
 import faiss
 import numpy as np
 
+from src.core import metrics
 from src.rag.embeddings import get_embedding_model
 
 
@@ -18,7 +22,12 @@ class SearchResult:
 
 
 class FaissVectorStore:
-    def __init__(self, index_dir: Path, embedding_model_name: str = "sentence-transformers/all-MiniLM-L6-v2") -> None:
+    def __init__(
+        self,
+        index_dir: Path,
+        embedding_model_name: str = "sentence-transformers/all-MiniLM-L6-v2",
+        embedding_cache_size: int = 4096,
+    ) -> None:
         self.index_dir = index_dir
         self.index_path = self.index_dir / "index.faiss"
         self.meta_path = self.index_dir / "metadata.jsonl"
@@ -26,6 +35,11 @@ class FaissVectorStore:
         self.dimension = self.model.get_sentence_embedding_dimension()
         self.index = faiss.IndexFlatL2(self.dimension)
         self.metadata: list[dict] = []
+        self.embedding_cache_size = max(0, embedding_cache_size)
+        self._embeddings: OrderedDict[str, np.ndarray] = OrderedDict()
+        self._embed_lock = threading.Lock()
+        self._lock = threading.RLock()
+        self.dirty = False
         self.index_dir.mkdir(parents=True, exist_ok=True)
         self._load()
 
@@ -38,35 +52,72 @@ class FaissVectorStore:
                     self.metadata.append(json.loads(line))
 
     def save(self) -> None:
-        faiss.write_index(self.index, str(self.index_path))
-        with self.meta_path.open("w", encoding="utf-8") as f:
-            for record in self.metadata:
-                f.write(json.dumps(record, ensure_ascii=True) + "\n")
+        with self._lock:
+            # Write-then-rename so a crash mid-save never leaves a truncated index behind.
+            index_tmp = self.index_path.with_suffix(".faiss.tmp")
+            meta_tmp = self.meta_path.with_suffix(".jsonl.tmp")
+            faiss.write_index(self.index, str(index_tmp))
+            with meta_tmp.open("w", encoding="utf-8") as f:
+                for record in self.metadata:
+                    f.write(json.dumps(record, ensure_ascii=True) + "\n")
+            index_tmp.replace(self.index_path)
+            meta_tmp.replace(self.meta_path)
+            self.dirty = False
 
-    def add_documents(self, texts: list[str], metadatas: list[dict]) -> int:
+    def add_documents(self, texts: list[str], metadatas: list[dict], persist: bool = True) -> int:
         clean_pairs = [(t.strip(), m) for t, m in zip(texts, metadatas) if t and t.strip()]
         if not clean_pairs:
             return 0
-        emb = self.model.encode([p[0] for p in clean_pairs], normalize_embeddings=True)
-        vectors = np.array(emb, dtype=np.float32)
-        self.index.add(vectors)
-        for text, meta in clean_pairs:
-            entry = {"text": text, **meta}
-            self.metadata.append(entry)
-        self.save()
+        vectors = self.embed([p[0] for p in clean_pairs])
+        with self._lock:
+            self.index.add(vectors)
+            for text, meta in clean_pairs:
+                entry = {"text": text, **meta}
+                self.metadata.append(entry)
+            self.dirty = True
+            if persist:
+                self.save()
         return len(clean_pairs)
 
+    def embed(self, texts: list[str]) -> np.ndarray:
+        keys = [sha1(t.encode("utf-8")).hexdigest() for t in texts]
+        with self._embed_lock:
+            cached = {k: self._embeddings[k] for k in keys if k in self._embeddings}
+            for k in cached:
+                self._embeddings.move_to_end(k)
+        missing = {k: t for k, t in zip(keys, texts) if k not in cached}
+        metrics.cache_lookup("embeddings", True, len(keys) - len(missing))
+        metrics.cache_lookup("embeddings", False, len(missing))
+        if missing:
+            fresh = self._encode(list(missing.values()))
+            with self._embed_lock:
+                for k, vector in zip(missing, fresh):
+                    cached[k] = vector
+                    self._embeddings[k] = vector
+                while len(self._embeddings) > self.embedding_cache_size:
+                    self._embeddings.popitem(last=False)
+        if not texts:
+            return np.zeros((0, self.dimension), dtype=np.float32)
+        return np.array([cached[k] for k in keys], dtype=np.float32)
+
+    def _encode(self, texts: list[str]) -> np.ndarray:
+        with metrics.timed(metrics.EMBED_SECONDS):
+            vectors = np.array(self.model.encode(texts, normalize_embeddings=True), dtype=np.float32)
+        metrics.CHUNKS_EMBEDDED.inc(len(texts))
+        return vectors
+
     def similarity_search(self, query: str, k: int = 5, company: str | None = None) -> list[SearchResult]:
         if self.index.ntotal == 0 or not query.strip():
             return []
-        q_emb = self.model.encode([query], normalize_embeddings=True)
-        q_vec = np.array(q_emb, dtype=np.float32)
-        distances, indices = self.index.search(q_vec, max(k * 3, k))
+        q_vec = self._encode([query])
+        with self._lock, metrics.timed(metrics.FAISS_SEARCH_SECONDS):
+            distances, indices = self.index.search(q_vec, max(k * 3, k))
+            metadata = self.metadata
         out: list[SearchResult] = []
         for score, idx in zip(distances[0], indices[0]):
-            if idx < 0 or idx >= len(self.metadata):
+            if idx < 0 or idx >= len(metadata):
                 continue
-            meta = self.metadata[idx]
+            meta = metadata[idx]
             if company and str(meta.get("company", "")).lower() != company.lower():
                 continue
             out.append(SearchResult(text=meta.get("text", ""), score=float(score), metadata=meta))
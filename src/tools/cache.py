@@ -0,0 +1,372 @@
+from __future__ import annotations
+
+from dataclasses import dataclass
+import gzip
+import json
+import logging
+from pathlib import Path
+import sqlite3
+import threading
+import time
+
+from src.core import metrics
+from src.tools.utils import cache_key, cache_path, compact_whitespace
+
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class CachedPage:
+    url: str
+    text: str
+    fetched_at: float
+    expired: bool = False
+    etag: str | None = None
+    last_modified: str | None = None
+
+
+class PageCache:
+    def __init__(
+        self,
+        root: Path,
+        ttl_seconds: float = 7 * 24 * 3600,
+        max_bytes: int = 256 * 1024 * 1024,
+        compress: bool = True,
+    ) -> None:
+        self.root = root
+        self.ttl_seconds = ttl_seconds
+        self.max_bytes = max_bytes
+        self.compress = compress
+        self.root.mkdir(parents=True, exist_ok=True)
+        self._lock = threading.Lock()
+        self._db = sqlite3.connect(str(self.root / "index.sqlite3"), check_same_thread=False, isolation_level=None)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute(
+            "CREATE TABLE IF NOT EXISTS pages ("
+            "key TEXT PRIMARY KEY, url TEXT NOT NULL, path TEXT NOT NULL, size INTEGER NOT NULL, "
+            "fetched_at REAL NOT NULL, last_access REAL NOT NULL, hits INTEGER NOT NULL DEFAULT 0, "
+            "etag TEXT, last_modified TEXT)"
+        )
+        columns = {row[1] for row in self._db.execute("PRAGMA table_info(pages)")}
+        for column in ("etag", "last_modified"):
+            if column not in columns:
+                self._db.execute(f"ALTER TABLE pages ADD COLUMN {column} TEXT")
+        self._db.execute("CREATE INDEX IF NOT EXISTS pages_last_access ON pages(last_access)")
+        self._total_bytes = int(self._db.execute("SELECT COALESCE(SUM(size), 0) FROM pages").fetchone()[0])
+
+    def get(self, url: str) -> str | None:
+        page = self.lookup(url)
+        if page is None or page.expired:
+            return None
+        return page.text
+
+    def lookup(self, url: str) -> CachedPage | None:
+        key = cache_key(url)
+        with self._lock:
+            row = self._db.execute(
+                "SELECT path, fetched_at, etag, last_modified FROM pages WHERE key = ?",
+                (key,),
+            ).fetchone()
+        if row is None:
+            return self._migrate_legacy(url)
+        rel_path, fetched_at, etag, last_modified = row
+        text = self._read(self.root / rel_path)
+        with self._lock:
+            if text is None:
+                self._delete(key)
+                return None
+            self._db.execute(
+                "UPDATE pages SET hits = hits + 1, last_access = ? WHERE key = ?",
+                (time.time(), key),
+            )
+        expired = bool(self.ttl_seconds) and time.time() - fetched_at > self.ttl_seconds
+        return CachedPage(
+            url=url,
+            text=text,
+            fetched_at=fetched_at,
+            expired=expired,
+            etag=etag,
+            last_modified=last_modified,
+        )
+
+    def refresh(self, url: str, etag: str | None = None, last_modified: str | None = None) -> None:
+        now = time.time()
+        with self._lock:
+            self._db.execute(
+                "UPDATE pages SET fetched_at = ?, last_access = ?, "
+                "etag = COALESCE(?, etag), last_modified = COALESCE(?, last_modified) WHERE key = ?",
+                (now, now, etag, last_modified, cache_key(url)),
+            )
+
+    def put(
+        self,
+        url: str,
+        text: str,
+        fetched_at: float | None = None,
+        etag: str | None = None,
+        last_modified: str | None = None,
+    ) -> None:
+        key = cache_key(url)
+        rel_path = self._relative_path(key)
+        payload = text.encode("utf-8")
+        if self.compress:
+            payload = gzip.compress(payload, compresslevel=6)
+        path = self.root / rel_path
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = path.with_name(f"{path.name}.{threading.get_ident()}.tmp")
+        tmp.write_bytes(payload)
+        tmp.replace(path)
+
+        now = time.time()
+        with self._lock:
+            previous = self._db.execute("SELECT size FROM pages WHERE key = ?", (key,)).fetchone()
+            if previous is not None:
+                self._total_bytes -= int(previous[0])
+            self._db.execute(
+                "INSERT OR REPLACE INTO pages "
+                "(key, url, path, size, fetched_at, last_access, hits, etag, last_modified) "
+                "VALUES (?, ?, ?, ?, ?, ?, 0, ?, ?)",
+                (key, url, rel_path, len(payload), fetched_at or now, now, etag, last_modified),
+            )
+            self._total_bytes += len(payload)
+            self._evict()
+
+    def stats(self) -> dict[str, int]:
+        with self._lock:
+            entries, hits = self._db.execute("SELECT COUNT(*), COALESCE(SUM(hits), 0) FROM pages").fetchone()
+        return {"entries": int(entries), "bytes": self._total_bytes, "hits": int(hits)}
+
+    def _relative_path(self, key: str) -> str:
+        suffix = ".txt.gz" if self.compress else ".txt"
+        return f"{key[:2]}/{key[2:4]}/{key}{suffix}"
+
+    def _read(self, path: Path) -> str | None:
+        try:
+            payload = path.read_bytes()
+        except FileNotFoundError:
+            return None
+        if path.suffix == ".gz":
+            payload = gzip.decompress(payload)
+        return payload.decode("utf-8")
+
+    def _delete(self, key: str) -> None:
+        row = self._db.execute("SELECT path, size FROM pages WHERE key = ?", (key,)).fetchone()
+        if row is None:
+            return
+        (self.root / row[0]).unlink(missing_ok=True)
+        self._db.execute("DELETE FROM pages WHERE key = ?", (key,))
+        self._total_bytes -= int(row[1])
+
+    def _evict(self) -> None:
+        while self.max_bytes and self._total_bytes > self.max_bytes:
+            rows = self._db.execute("SELECT key FROM pages ORDER BY last_access ASC LIMIT 64").fetchall()
+            if not rows:
+                break
+            for (key,) in rows:
+                self._delete(key)
+                if self._total_bytes <= self.max_bytes:
+                    break
+
+    def _migrate_legacy(self, url: str) -> CachedPage | None:
+        # Pages cached by older releases live flat in the cache root as md5(url).txt.
+        legacy = cache_path(self.root, url)
+        if not legacy.exists():
+            return None
+        try:
+            text = legacy.read_text(encoding="utf-8")
+            self.put(url, text, fetched_at=legacy.stat().st_mtime)
+            legacy.unlink(missing_ok=True)
+        except Exception as exc:
+            logger.warning("Could not migrate legacy cache entry for %s: %s", url, exc)
+            return None
+        return self.lookup(url)
+
+
+DEFAULT_NEGATIVE_TTLS: dict[str, float] = {
+    "http_error": 6 * 3600,
+    "too_short": 24 * 3600,
+    "unsupported_type": 7 * 24 * 3600,
+    "timeout": 1800,
+    "error": 1800,
+}
+
+
+class NegativeCache:
+    def __init__(self, root: Path, ttls: dict[str, float] | None = None) -> None:
+        self.ttls = {**DEFAULT_NEGATIVE_TTLS, **(ttls or {})}
+        root.mkdir(parents=True, exist_ok=True)
+        self._lock = threading.Lock()
+        self._db = sqlite3.connect(str(root / "index.sqlite3"), check_same_thread=False, isolation_level=None)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute(
+            "CREATE TABLE IF NOT EXISTS failures ("
+            "key TEXT PRIMARY KEY, url TEXT NOT NULL, kind TEXT NOT NULL, "
+            "failed_at REAL NOT NULL, count INTEGER NOT NULL DEFAULT 1)"
+        )
+
+    def get(self, url: str) -> str | None:
+        with self._lock:
+            row = self._db.execute("SELECT kind, failed_at FROM failures WHERE key = ?", (cache_key(url),)).fetchone()
+        if row is None:
+            return None
+        kind, failed_at = row
+        if time.time() - failed_at >= self.ttls.get(kind, 0):
+            return None
+        return kind
+
+    def put(self, url: str, kind: str) -> None:
+        now = time.time()
+        with self._lock:
+            self._db.execute(
+                "INSERT INTO failures (key, url, kind, failed_at) VALUES (?, ?, ?, ?) "
+                "ON CONFLICT(key) DO UPDATE SET kind = excluded.kind, failed_at = excluded.failed_at, "
+                "count = failures.count + 1",
+                (cache_key(url), url, kind, now),
+            )
+            self._db.execute("DELETE FROM failures WHERE failed_at < ?", (now - max(self.ttls.values()),))
+
+    def discard(self, url: str) -> None:
+        with self._lock:
+            self._db.execute("DELETE FROM failures WHERE key = ?", (cache_key(url),))
+
+
+
+class JsonCache:
+    def __init__(self, path: Path, table: str, ttl_seconds: float = 86400, max_entries: int = 5000) -> None:
+        self.path = path
+        self.table = table
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        path.parent.mkdir(parents=True, exist_ok=True)
+        self._lock = threading.Lock()
+        self._db = sqlite3.connect(str(path), check_same_thread=False, isolation_level=None)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute(
+            f"CREATE TABLE IF NOT EXISTS {table} ("
+            "key TEXT PRIMARY KEY, value TEXT NOT NULL, created_at REAL NOT NULL, "
+            "last_access REAL NOT NULL, hits INTEGER NOT NULL DEFAULT 0)"
+        )
+        self._db.execute(f"CREATE INDEX IF NOT EXISTS {table}_last_access ON {table}(last_access)")
+
+    def get(self, key: str):
+        value = self._load(key)
+        self._record(value is not None)
+        return value
+
+    def put(self, key: str, value) -> None:
+        now = time.time()
+        payload = json.dumps(value, ensure_ascii=True)
+        with self._lock:
+            self._db.execute(
+                f"INSERT OR REPLACE INTO {self.table} (key, value, created_at, last_access, hits) VALUES (?, ?, ?, ?, 0)",
+                (key, payload, now, now),
+            )
+            self._evict()
+
+    def stats(self) -> dict[str, int]:
+        with self._lock:
+            entries = int(self._db.execute(f"SELECT COUNT(*) FROM {self.table}").fetchone()[0])
+            return {"entries": entries, "hits": self.hits, "misses": self.misses}
+
+    def _load(self, key: str):
+        with self._lock:
+            row = self._db.execute(f"SELECT value, created_at FROM {self.table} WHERE key = ?", (key,)).fetchone()
+            if row is None:
+                return None
+            if self.ttl_seconds and time.time() - row[1] > self.ttl_seconds:
+                self._db.execute(f"DELETE FROM {self.table} WHERE key = ?", (key,))
+                return None
+            self._db.execute(
+                f"UPDATE {self.table} SET hits = hits + 1, last_access = ? WHERE key = ?",
+                (time.time(), key),
+            )
+        return json.loads(row[0])
+
+    def _record(self, hit: bool) -> None:
+        metrics.cache_lookup(self.table, hit)
+        with self._lock:
+            if hit:
+                self.hits += 1
+            else:
+                self.misses += 1
+
+    def _evict(self) -> None:
+        if not self.max_entries:
+            return
+        count = int(self._db.execute(f"SELECT COUNT(*) FROM {self.table}").fetchone()[0])
+        if count <= self.max_entries:
+            return
+        self._db.execute(
+            f"DELETE FROM {self.table} WHERE key IN "
+            f"(SELECT key FROM {self.table} ORDER BY last_access ASC LIMIT ?)",
+            (count - self.max_entries,),
+        )
+
+
+class SearchCache(JsonCache):
+    def __init__(self, path: Path, ttl_seconds: float = 86400, max_entries: int = 5000) -> None:
+        super().__init__(path, "search_results", ttl_seconds=ttl_seconds, max_entries=max_entries)
+
+    def get_rows(self, query: str, max_results: int) -> list[dict] | None:
+        entry = self._load(normalize_query(query))
+        rows: list[dict] | None = None
+        if entry is not None:
+            # A result set smaller than its own max_results was exhausted, so it
+            # answers any request size; otherwise it covers requests up to its size.
+            complete = len(entry["rows"]) < entry["max_results"]
+            if complete or entry["max_results"] >= max_results:
+                rows = entry["rows"][:max_results]
+        self._record(rows is not None)
+        return rows
+
+    def put_rows(self, query: str, max_results: int, rows: list[dict]) -> None:
+        key = normalize_query(query)
+        existing = self._load(key)
+        if existing is not None and existing["max_results"] > max_results:
+            return
+        self.put(key, {"max_results": max_results, "rows": rows})
+
+
+
+def normalize_query(query: str) -> str:
+    return compact_whitespace(query).lower()
+
+
+class SingleFlight:
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self._calls: dict[str, _Flight] = {}
+
+    def do(self, key: str, fn):
+        # Returns (value, shared); shared callers waited on another caller's fn().
+        with self._lock:
+            flight = self._calls.get(key)
+            leader = flight is None
+            if leader:
+                flight = _Flight()
+                self._calls[key] = flight
+        if not leader:
+            flight.done.wait()
+            if flight.error is not None:
+                raise flight.error
+            return flight.value, True
+        try:
+            flight.value = fn()
+            return flight.value, False
+        except BaseException as exc:
+            flight.error = exc
+            raise
+        finally:
+            with self._lock:
+                self._calls.pop(key, None)
+            flight.done.set()
+
+
+class _Flight:
+    def __init__(self) -> None:
+        self.done = threading.Event()
+        self.value = None
+        self.error: BaseException | None = None
@@ -0,0 +1,54 @@
+from __future__ import annotations
+
+from dataclasses import dataclass
+import threading
+import time
+
+
+@dataclass
+class _Circuit:
+    failures: int = 0
+    opened_at: float | None = None
+    trial_in_flight: bool = False
+
+
+class CircuitBreaker:
+    def __init__(self, failure_threshold: int = 3, cooldown_seconds: float = 300.0) -> None:
+        self.failure_threshold = max(1, failure_threshold)
+        self.cooldown_seconds = cooldown_seconds
+        self._circuits: dict[str, _Circuit] = {}
+        self._lock = threading.Lock()
+
+    def allow(self, key: str) -> bool:
+        with self._lock:
+            circuit = self._circuits.get(key)
+            if circuit is None or circuit.opened_at is None:
+                return True
+            if time.monotonic() - circuit.opened_at < self.cooldown_seconds:
+                return False
+            # Half-open: let a single trial call through until it reports back.
+            if circuit.trial_in_flight:
+                return False
+            circuit.trial_in_flight = True
+            return True
+
+    def record_success(self, key: str) -> None:
+        with self._lock:
+            self._circuits.pop(key, None)
+
+    def record_failure(self, key: str) -> None:
+        with self._lock:
+            circuit = self._circuits.setdefault(key, _Circuit())
+            circuit.failures += 1
+            circuit.trial_in_flight = False
+            if circuit.opened_at is not None or circuit.failures >= self.failure_threshold:
+                circuit.opened_at = time.monotonic()
+
+    def is_open(self, key: str) -> bool:
+        with self._lock:
+            circuit = self._circuits.get(key)
+            return bool(circuit and circuit.opened_at is not None)
+
+    def open_keys(self) -> list[str]:
+        with self._lock:
+            return sorted(k for k, c in self._circuits.items() if c.opened_at is not None)
@@ -0,0 +1,46 @@
+from __future__ import annotations
+
+from hashlib import blake2b
+import re
+
+import numpy as np
+
+
+_TOKEN = re.compile(r"\w+")
+
+
+def simhash(text: str, shingle_size: int = 3) -> int:
+    tokens = _TOKEN.findall((text or "").lower())
+    if not tokens:
+        return 0
+    if len(tokens) < shingle_size:
+        shingles = tokens
+    else:
+        shingles = [" ".join(tokens[i : i + shingle_size]) for i in range(len(tokens) - shingle_size + 1)]
+    digests = b"".join(blake2b(s.encode("utf-8"), digest_size=8).digest() for s in shingles)
+    bits = np.unpackbits(np.frombuffer(digests, dtype=np.uint8).reshape(len(shingles), 8), axis=1)
+    votes = bits.astype(np.int32).sum(axis=0) * 2 - len(shingles)
+    fingerprint = 0
+    for bit in votes > 0:
+        fingerprint = (fingerprint << 1) | int(bit)
+    return fingerprint
+
+
+
+def hamming_distance(a: int, b: int) -> int:
+    return bin(a ^ b).count("1")
+
+
+
+def near_duplicate_indices(texts: list[str], max_distance: int = 3) -> list[int]:
+    kept: list[int] = []
+    prints: list[int] = []
+    duplicates: list[int] = []
+    for idx, text in enumerate(texts):
+        fingerprint = simhash(text)
+        if any(hamming_distance(fingerprint, other) <= max_distance for other in prints):
+            duplicates.append(idx)
+            continue
+        kept.append(idx)
+        prints.append(fingerprint)
+    return duplicates
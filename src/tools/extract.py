@@ -0,0 +1,140 @@
+from __future__ import annotations
+
+from html.parser import HTMLParser
+import logging
+import re
+
+from bs4 import BeautifulSoup
+
+from src.tools.utils import compact_whitespace
+
+try:
+    from lxml import etree as lxml_etree
+    from lxml import html as lxml_html
+except ImportError:  # lxml is an optional accelerator
+    lxml_etree = None
+    lxml_html = None
+
+
+logger = logging.getLogger(__name__)
+
+SKIP_TAGS = ("script", "style", "noscript", "header", "footer", "nav")
+HTML_CONTENT_TYPES = ("text/html", "application/xhtml+xml", "text/plain")
+_FEED_CHARS = 32 * 1024
+_META_CHARSET = re.compile(rb"""<meta[^>]+charset=["']?([A-Za-z0-9_\-]+)""", re.IGNORECASE)
+
+
+def is_html_content_type(content_type: str | None) -> bool:
+    if not content_type:
+        return True
+    mime = content_type.split(";", 1)[0].strip().lower()
+    return mime in HTML_CONTENT_TYPES
+
+
+
+def decode_html(raw: bytes, content_type: str | None = None) -> str:
+    encoding = None
+    if content_type and "charset=" in content_type.lower():
+        encoding = content_type.lower().split("charset=", 1)[1].split(";", 1)[0].strip().strip("\"'")
+    if not encoding:
+        match = _META_CHARSET.search(raw[:4096])
+        if match:
+            encoding = match.group(1).decode("ascii", "ignore")
+    try:
+        return raw.decode(encoding or "utf-8", errors="replace")
+    except LookupError:
+        return raw.decode("utf-8", errors="replace")
+
+
+
+def clean_html_bytes(raw: bytes, content_type: str | None, max_chars: int, backend: str = "auto") -> str:
+    # Module-level so process-pool workers can unpickle it by reference.
+    return extract_text(decode_html(raw, content_type), max_chars, backend=backend)
+
+
+
+def extract_text(html: str, max_chars: int, backend: str = "auto") -> str:
+    if backend == "auto":
+        backend = "lxml" if lxml_html is not None else "stream"
+    if backend == "lxml" and lxml_html is not None:
+        try:
+            return _lxml_text(html, max_chars)
+        except Exception as exc:
+            logger.debug("lxml extraction failed, falling back to BeautifulSoup: %s", exc)
+    elif backend == "stream":
+        try:
+            return _stream_text(html, max_chars)
+        except Exception as exc:
+            logger.debug("Streaming extraction failed, falling back to BeautifulSoup: %s", exc)
+    return _bs4_text(html, max_chars)
+
+
+
+def _bs4_text(html: str, max_chars: int) -> str:
+    soup = BeautifulSoup(html, "html.parser")
+    for tag in soup(list(SKIP_TAGS)):
+        tag.decompose()
+    text = soup.get_text(" ")
+    text = compact_whitespace(text)
+    return text[:max_chars]
+
+
+
+def _lxml_text(html: str, max_chars: int) -> str:
+    tree = lxml_html.fromstring(html)
+    lxml_etree.strip_elements(tree, *SKIP_TAGS, with_tail=False)
+    parts: list[str] = []
+    total = 0
+    for chunk in tree.itertext():
+        piece = compact_whitespace(chunk)
+        if not piece:
+            continue
+        parts.append(piece)
+        total += len(piece) + 1
+        if total >= max_chars:
+            break
+    return " ".join(parts)[:max_chars]
+
+
+class _Enough(Exception):
+    pass
+
+
+class _TextCollector(HTMLParser):
+    def __init__(self, max_chars: int) -> None:
+        super().__init__(convert_charrefs=True)
+        self.max_chars = max_chars
+        self.parts: list[str] = []
+        self.total = 0
+        self.skip_depth = 0
+
+    def handle_starttag(self, tag: str, attrs) -> None:
+        if tag in SKIP_TAGS:
+            self.skip_depth += 1
+
+    def handle_endtag(self, tag: str) -> None:
+        if tag in SKIP_TAGS and self.skip_depth:
+            self.skip_depth -= 1
+
+    def handle_data(self, data: str) -> None:
+        if self.skip_depth:
+            return
+        piece = compact_whitespace(data)
+        if not piece:
+            return
+        self.parts.append(piece)
+        self.total += len(piece) + 1
+        if self.total >= self.max_chars:
+            raise _Enough
+
+
+
+def _stream_text(html: str, max_chars: int) -> str:
+    collector = _TextCollector(max_chars)
+    try:
+        for start in range(0, len(html), _FEED_CHARS):
+            collector.feed(html[start : start + _FEED_CHARS])
+        collector.close()
+    except _Enough:
+        pass
+    return " ".join(collector.parts)[:max_chars]
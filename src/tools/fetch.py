@@ -1,51 +1,283 @@
 from __future__ import annotations
 
+from concurrent.futures import Future, ProcessPoolExecutor, ThreadPoolExecutor, wait
+from concurrent.futures.process import BrokenProcessPool
+from dataclasses import dataclass
 import logging
+import multiprocessing
 from pathlib import Path
+import threading
+import time
+from urllib.parse import urlsplit
+from urllib.request import url2pathname
 
-from bs4 import BeautifulSoup
 import requests
+from requests.adapters import HTTPAdapter
 
-from src.tools.utils import cache_path, compact_whitespace
+from src.core import metrics
+from src.tools.cache import NegativeCache, PageCache
+from src.tools.circuit import CircuitBreaker
+from src.tools.extract import clean_html_bytes, is_html_content_type
 
 
 logger = logging.getLogger(__name__)
 
+USER_AGENT = "Mozilla/5.0 (DueDiligenceAgent/1.0)"
+
+
+@dataclass
+class FetchResult:
+    url: str
+    text: str = ""
+    status: str = "ok"
+
 
 class FetchTool:
-    def __init__(self, cache_dir: Path, timeout_seconds: int = 12, min_chars: int = 400, max_chars: int = 20000) -> None:
+    def __init__(
+        self,
+        cache_dir: Path,
+        timeout_seconds: int = 12,
+        min_chars: int = 400,
+        max_chars: int = 20000,
+        max_workers: int = 8,
+        per_host_limit: int = 2,
+        stage_deadline_seconds: float = 30.0,
+        cache_ttl_seconds: float = 7 * 24 * 3600,
+        cache_max_bytes: int = 256 * 1024 * 1024,
+        cache_compress: bool = True,
+        negative_ttls: dict[str, float] | None = None,
+        breaker_threshold: int = 3,
+        breaker_cooldown_seconds: float = 300.0,
+        max_bytes: int = 2_000_000,
+        extractor: str = "auto",
+        clean_workers: int = 0,
+        clean_task_max_bytes: int = 4_000_000,
+        local_corpus_dir: Path | None = None,
+    ) -> None:
         self.cache_dir = cache_dir
         self.timeout_seconds = timeout_seconds
         self.min_chars = min_chars
         self.max_chars = max_chars
-        self.cache_dir.mkdir(parents=True, exist_ok=True)
+        self.max_workers = max(1, max_workers)
+        self.per_host_limit = max(1, per_host_limit)
+        self.stage_deadline_seconds = stage_deadline_seconds
+        self.max_bytes = max_bytes
+        self.extractor = extractor
+        self.clean_workers = max(0, clean_workers)
+        self.clean_task_max_bytes = clean_task_max_bytes
+        # file:// URLs are only served from the local search corpus, and only when it is configured.
+        self.local_corpus_dir = local_corpus_dir.resolve() if local_corpus_dir is not None else None
+        self.cache = PageCache(cache_dir, ttl_seconds=cache_ttl_seconds, max_bytes=cache_max_bytes, compress=cache_compress)
+        self.negative_cache = NegativeCache(cache_dir, ttls=negative_ttls)
+        self.breaker = CircuitBreaker(failure_threshold=breaker_threshold, cooldown_seconds=breaker_cooldown_seconds)
+        self.session = _build_session(self.max_workers)
+        self._executor: ThreadPoolExecutor | None = None
+        self._clean_pool: ProcessPoolExecutor | None = None
+        self._host_slots: dict[str, threading.BoundedSemaphore] = {}
+        self._lock = threading.Lock()
 
-    def _clean_html(self, html: str) -> str:
-        soup = BeautifulSoup(html, "html.parser")
-        for tag in soup(["script", "style", "noscript", "header", "footer", "nav"]):
-            tag.decompose()
-        text = soup.get_text(" ")
-        text = compact_whitespace(text)
-        return text[: self.max_chars]
+    def _clean(self, raw: bytes, content_type: str | None) -> str:
+        pool = self._get_clean_pool()
+        # Oversized tasks stay in-process rather than being pickled across.
+        if pool is None or len(raw) > self.clean_task_max_bytes:
+            return clean_html_bytes(raw, content_type, self.max_chars, self.extractor)
+        try:
+            return pool.submit(clean_html_bytes, raw, content_type, self.max_chars, self.extractor).result()
+        except BrokenProcessPool:
+            logger.warning("HTML cleaning pool broke; restarting it and cleaning in-process")
+            with self._lock:
+                if self._clean_pool is pool:
+                    self._clean_pool = None
+            return clean_html_bytes(raw, content_type, self.max_chars, self.extractor)
 
     def fetch(self, url: str) -> str:
-        path = cache_path(self.cache_dir, url)
-        if path.exists():
-            return path.read_text(encoding="utf-8")
+        return self.fetch_page(url).text
+
+    def fetch_page(self, url: str) -> FetchResult:
+        if url.startswith("file://"):
+            return self._fetch_local(url)
+        cached = self.cache.lookup(url)
+        metrics.cache_lookup("pages", cached is not None and not cached.expired)
+        if cached is not None and not cached.expired:
+            return FetchResult(url=url, text=cached.text, status="cached")
+
+        failure = self.negative_cache.get(url)
+        if failure is not None:
+            return FetchResult(url=url, status="negative_cached")
+        host = _host_of(url)
+        if not self.breaker.allow(host):
+            return FetchResult(url=url, status="circuit_open")
+
+        headers: dict[str, str] = {}
+        if cached is not None:
+            if cached.etag:
+                headers["If-None-Match"] = cached.etag
+            if cached.last_modified:
+                headers["If-Modified-Since"] = cached.last_modified
+
+        try:
+            response = self.session.get(url, timeout=self.timeout_seconds, headers=headers, stream=True)
+        except (requests.Timeout, requests.ConnectionError) as exc:
+            logger.warning("Fetch timeout for %s: %s", url, exc)
+            self.breaker.record_failure(host)
+            return self._failed(url, "timeout")
+        except Exception as exc:
+            logger.warning("Fetch failure for %s: %s", url, exc)
+            # Not a host availability problem; just release any half-open trial.
+            self.breaker.record_success(host)
+            return self._failed(url, "error")
+        self.breaker.record_success(host)
 
         try:
-            response = requests.get(
-                url,
-                timeout=self.timeout_seconds,
-                headers={"User-Agent": "Mozilla/5.0 (DueDiligenceAgent/1.0)"},
-            )
+            etag = response.headers.get("ETag")
+            last_modified = response.headers.get("Last-Modified")
+            content_type = response.headers.get("Content-Type")
+            if response.status_code == 304 and cached is not None:
+                self.cache.refresh(url, etag=etag, last_modified=last_modified)
+                return FetchResult(url=url, text=cached.text, status="revalidated")
             if response.status_code >= 400:
-                return ""
-            cleaned = self._clean_html(response.text)
+                return self._failed(url, "http_error")
+            if not is_html_content_type(content_type):
+                return self._failed(url, "unsupported_type")
+            raw = self._read_capped(response)
+            metrics.FETCH_BYTES.inc(len(raw))
+            cleaned = self._clean(raw, content_type)
             if len(cleaned) < self.min_chars:
-                return ""
-            path.write_text(cleaned, encoding="utf-8")
-            return cleaned
+                return self._failed(url, "too_short")
+            self.cache.put(url, cleaned, etag=etag, last_modified=last_modified)
+            return FetchResult(url=url, text=cleaned)
         except Exception as exc:
             logger.warning("Fetch failure for %s: %s", url, exc)
-            return ""
+            return self._failed(url, "error")
+        finally:
+            response.close()
+
+    def _read_capped(self, response: requests.Response) -> bytes:
+        buffer = bytearray()
+        for chunk in response.iter_content(chunk_size=64 * 1024):
+            buffer.extend(chunk)
+            if len(buffer) >= self.max_bytes:
+                del buffer[self.max_bytes :]
+                break
+        return bytes(buffer)
+
+    def _fetch_local(self, url: str) -> FetchResult:
+        # Documents served by the local search corpus backend.
+        path = Path(url2pathname(urlsplit(url).path)).resolve()
+        if self.local_corpus_dir is None or not path.is_relative_to(self.local_corpus_dir):
+            logger.warning("Refusing local fetch outside the search corpus: %s", url)
+            return FetchResult(url=url, status="error")
+        try:
+            with path.open("rb") as f:
+                raw = f.read(self.max_bytes)
+        except OSError as exc:
+            logger.warning("Local fetch failure for %s: %s", url, exc)
+            return FetchResult(url=url, status="error")
+        cleaned = self._clean(raw, None)
+        if len(cleaned) < self.min_chars:
+            return FetchResult(url=url, status="too_short")
+        return FetchResult(url=url, text=cleaned)
+
+    def _failed(self, url: str, kind: str) -> FetchResult:
+        self.negative_cache.put(url, kind)
+        return FetchResult(url=url, status=kind)
+
+    def fetch_many(self, urls: list[str], deadline_seconds: float | None = None) -> list[FetchResult]:
+        if not urls:
+            return []
+        deadline = self.stage_deadline_seconds if deadline_seconds is None else deadline_seconds
+        futures: dict[int, Future] = {}
+        for idx in _interleave_by_host(urls):
+            futures[idx] = self.submit(urls[idx])
+        done, pending = wait(futures.values(), timeout=max(0.0, deadline))
+        for future in pending:
+            future.cancel()
+
+        results: list[FetchResult] = []
+        for idx, url in enumerate(urls):
+            future = futures[idx]
+            if future not in done:
+                results.append(FetchResult(url=url, status="deadline"))
+                continue
+            try:
+                results.append(future.result())
+            except Exception as exc:
+                logger.warning("Fetch worker failed for %s: %s", url, exc)
+                results.append(FetchResult(url=url, status="error"))
+        if pending:
+            logger.info("Fetch deadline of %ss reached with %s of %s pages pending", deadline, len(pending), len(urls))
+        return results
+
+    def submit(self, url: str) -> Future:
+        return self._get_executor().submit(self._fetch_limited, url)
+
+    def _fetch_limited(self, url: str) -> FetchResult:
+        with self._host_slot(url):
+            metrics.FETCH_IN_FLIGHT.inc()
+            start = time.perf_counter()
+            status = "error"
+            try:
+                result = self.fetch_page(url)
+                status = result.status
+                return result
+            finally:
+                metrics.FETCH_SECONDS.labels(status=status).observe(time.perf_counter() - start)
+                metrics.FETCH_IN_FLIGHT.dec()
+
+    def _host_slot(self, url: str) -> threading.BoundedSemaphore:
+        host = _host_of(url)
+        with self._lock:
+            slot = self._host_slots.get(host)
+            if slot is None:
+                slot = threading.BoundedSemaphore(self.per_host_limit)
+                self._host_slots[host] = slot
+            return slot
+
+    def _get_executor(self) -> ThreadPoolExecutor:
+        with self._lock:
+            if self._executor is None:
+                self._executor = ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix="fetch")
+            return self._executor
+
+    def _get_clean_pool(self) -> ProcessPoolExecutor | None:
+        if not self.clean_workers:
+            return None
+        with self._lock:
+            if self._clean_pool is None:
+                # spawn, not fork: the parent is multi-threaded by the time we get here.
+                self._clean_pool = ProcessPoolExecutor(
+                    max_workers=self.clean_workers,
+                    mp_context=multiprocessing.get_context("spawn"),
+                )
+            return self._clean_pool
+
+
+
+def _build_session(pool_size: int) -> requests.Session:
+    session = requests.Session()
+    adapter = HTTPAdapter(pool_connections=32, pool_maxsize=pool_size, max_retries=0)
+    session.mount("http://", adapter)
+    session.mount("https://", adapter)
+    session.headers.update({"User-Agent": USER_AGENT})
+    return session
+
+
+
+def _host_of(url: str) -> str:
+    return (urlsplit(url).hostname or "").lower()
+
+
+
+def _interleave_by_host(urls: list[str]) -> list[int]:
+    # Round-robin across hosts so a run of same-host URLs does not park
+    # every pool worker on that host's semaphore.
+    buckets: dict[str, list[int]] = {}
+    for idx, url in enumerate(urls):
+        buckets.setdefault(_host_of(url), []).append(idx)
+    order: list[int] = []
+    queues = list(buckets.values())
+    while queues:
+        for queue in queues:
+            order.append(queue.pop(0))
+        queues = [q for q in queues if q]
+    return order
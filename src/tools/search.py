@@ -1,33 +1,228 @@
 from __future__ import annotations
 
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import ExitStack, contextmanager
+import json
 import logging
+from pathlib import Path
+import random
+import re
+import sqlite3
+import threading
+import time
+from typing import Callable, Iterator
 
 from duckduckgo_search import DDGS
+from duckduckgo_search.exceptions import RatelimitException
+
+from src.core import metrics
+from src.tools.cache import SearchCache
+from src.tools.extract import extract_text
+from src.tools.ratelimit import TokenBucket
 
 
 logger = logging.getLogger(__name__)
 
+QueryFn = Callable[[str, int], list[dict]]
+
+
+class SearchRateLimitError(RuntimeError):
+    pass
+
+
+class SearchBackend:
+    name = "base"
+
+    @contextmanager
+    def session(self) -> Iterator[QueryFn]:
+        yield self.text
+
+    def text(self, query: str, max_results: int) -> list[dict]:
+        raise NotImplementedError
+
+
+class DuckDuckGoBackend(SearchBackend):
+    name = "duckduckgo"
+
+    @contextmanager
+    def session(self) -> Iterator[QueryFn]:
+        with DDGS() as ddgs:
+            yield lambda query, max_results: self._query(ddgs, query, max_results)
+
+    def text(self, query: str, max_results: int) -> list[dict]:
+        with self.session() as run:
+            return run(query, max_results)
+
+    def _query(self, ddgs: DDGS, query: str, max_results: int) -> list[dict]:
+        try:
+            rows = ddgs.text(query, max_results=max_results)
+        except RatelimitException as exc:
+            raise SearchRateLimitError(str(exc)) from exc
+        return [
+            {
+                "url": row.get("href", ""),
+                "title": row.get("title", ""),
+                "snippet": row.get("body", ""),
+            }
+            for row in rows or []
+        ]
+
+
+class LocalCorpusBackend(SearchBackend):
+    name = "local"
+
+    def __init__(self, corpus_dir: Path, index_path: Path | None = None) -> None:
+        self.corpus_dir = corpus_dir
+        self.index_path = index_path or corpus_dir / ".search_index.sqlite3"
+        self.corpus_dir.mkdir(parents=True, exist_ok=True)
+        self._lock = threading.Lock()
+        self._db = sqlite3.connect(str(self.index_path), check_same_thread=False, isolation_level=None)
+        self._db.execute("CREATE VIRTUAL TABLE IF NOT EXISTS docs USING fts5(url UNINDEXED, title, body, file UNINDEXED)")
+        self._db.execute("CREATE TABLE IF NOT EXISTS files (path TEXT PRIMARY KEY, mtime REAL NOT NULL)")
+        self.refresh()
+
+    def refresh(self) -> int:
+        indexed = 0
+        with self._lock:
+            known = dict(self._db.execute("SELECT path, mtime FROM files").fetchall())
+            seen: set[str] = set()
+            for path in sorted(self.corpus_dir.rglob("*")):
+                if not path.is_file() or path.suffix.lower() not in {".jsonl", ".txt", ".md", ".html", ".htm"}:
+                    continue
+                key = str(path)
+                seen.add(key)
+                mtime = path.stat().st_mtime
+                if known.get(key) == mtime:
+                    continue
+                self._db.execute("DELETE FROM docs WHERE file = ?", (key,))
+                for url, title, body in _corpus_records(path):
+                    self._db.execute("INSERT INTO docs (url, title, body, file) VALUES (?, ?, ?, ?)", (url, title, body, key))
+                    indexed += 1
+                self._db.execute("INSERT OR REPLACE INTO files (path, mtime) VALUES (?, ?)", (key, mtime))
+            for key in set(known) - seen:
+                self._db.execute("DELETE FROM docs WHERE file = ?", (key,))
+                self._db.execute("DELETE FROM files WHERE path = ?", (key,))
+        if indexed:
+            logger.info("Indexed %s local corpus documents from %s", indexed, self.corpus_dir)
+        return indexed
+
+    def text(self, query: str, max_results: int) -> list[dict]:
+        terms = re.findall(r"\w+", query.lower())
+        if not terms:
+            return []
+        match = " OR ".join(f'"{t}"' for t in terms)
+        with self._lock:
+            rows = self._db.execute(
+                "SELECT url, title, snippet(docs, 2, '', '', ' ... ', 24) FROM docs "
+                "WHERE docs MATCH ? ORDER BY rank LIMIT ?",
+                (match, max_results),
+            ).fetchall()
+        return [{"url": url, "title": title, "snippet": snippet} for url, title, snippet in rows]
+
+
+
+def _corpus_records(path: Path) -> Iterator[tuple[str, str, str]]:
+    if path.suffix.lower() == ".jsonl":
+        for line in path.read_text(encoding="utf-8").splitlines():
+            if not line.strip():
+                continue
+            row = json.loads(line)
+            yield str(row.get("url", "")), str(row.get("title", "")), str(row.get("text", row.get("body", "")))
+        return
+    raw = path.read_text(encoding="utf-8", errors="replace")
+    if path.suffix.lower() in {".html", ".htm"}:
+        raw = extract_text(raw, len(raw))
+    yield path.resolve().as_uri(), path.stem.replace("_", " ").replace("-", " "), raw
+
 
 class DuckDuckGoSearchTool:
-    def __init__(self, enabled: bool = True) -> None:
+    def __init__(
+        self,
+        enabled: bool = True,
+        max_workers: int = 4,
+        cache: SearchCache | None = None,
+        backend: SearchBackend | None = None,
+        rate_limiter: TokenBucket | None = None,
+        max_retries: int = 3,
+        backoff_seconds: float = 1.0,
+    ) -> None:
         self.enabled = enabled
+        self.max_workers = max(1, max_workers)
+        self.cache = cache
+        self.backend = backend or DuckDuckGoBackend()
+        self.rate_limiter = rate_limiter
+        self.max_retries = max(0, max_retries)
+        self.backoff_seconds = backoff_seconds
+        self._executor: ThreadPoolExecutor | None = None
+        self._lock = threading.Lock()
 
     def search(self, query: str, max_results: int = 5) -> list[dict]:
+        return self.search_many([query], max_results=max_results)[0]
+
+    @contextmanager
+    def session(self, max_results: int = 5) -> Iterator[Callable[[str], list[dict]]]:
+        # One backend session for queries submitted one at a time, e.g. by the pipelined graph.
         if not self.enabled:
-            return []
+            yield lambda query: []
+            return
+        with ExitStack() as stack:
+            try:
+                run = stack.enter_context(self.backend.session())
+            except Exception as exc:
+                logger.warning("Search session failure: %s", exc)
+                run = None
+            if run is None:
+                yield lambda query: []
+            else:
+                yield lambda query: self.search_many([query], max_results=max_results, run=run)[0]
+
+    def search_many(self, queries: list[str], max_results: int = 5, run: QueryFn | None = None) -> list[list[dict]]:
+        if not self.enabled or not queries:
+            return [[] for _ in queries]
+        if self.cache is None:
+            return self._search_uncached(queries, max_results, run=run)
+
+        results: list[list[dict] | None] = [self.cache.get_rows(q, max_results) for q in queries]
+        missing = [idx for idx, rows in enumerate(results) if rows is None]
+        fresh = self._search_uncached([queries[idx] for idx in missing], max_results, run=run) if missing else []
+        for idx, rows in zip(missing, fresh):
+            results[idx] = rows
+            if rows:
+                self.cache.put_rows(queries[idx], max_results, rows)
+        return [rows or [] for rows in results]
+
+    def _search_uncached(self, queries: list[str], max_results: int, run: QueryFn | None = None) -> list[list[dict]]:
+        if run is not None:
+            return [self._text(run, q, max_results) for q in queries]
         try:
-            with DDGS() as ddgs:
-                rows = ddgs.text(query, max_results=max_results)
-                output: list[dict] = []
-                for row in rows:
-                    output.append(
-                        {
-                            "url": row.get("href", ""),
-                            "title": row.get("title", ""),
-                            "snippet": row.get("body", ""),
-                        }
-                    )
-                return output
+            with self.backend.session() as run:
+                executor = self._get_executor()
+                return list(executor.map(lambda q: self._text(run, q, max_results), queries))
         except Exception as exc:
-            logger.warning("Search failure for query '%s': %s", query, exc)
-            return []
+            logger.warning("Search session failure for %s queries: %s", len(queries), exc)
+            return [[] for _ in queries]
+
+    def _text(self, run: QueryFn, query: str, max_results: int) -> list[dict]:
+        for attempt in range(self.max_retries + 1):
+            if self.rate_limiter is not None:
+                self.rate_limiter.acquire()
+            try:
+                with metrics.timed(metrics.SEARCH_SECONDS, metrics.SEARCH_IN_FLIGHT):
+                    return run(query, max_results)
+            except SearchRateLimitError as exc:
+                if attempt == self.max_retries:
+                    logger.warning("Search rate limited for query '%s' after %s attempts: %s", query, attempt + 1, exc)
+                    return []
+                delay = self.backoff_seconds * (2**attempt) * random.uniform(0.5, 1.5)
+                logger.info("Search rate limited for query '%s'; retrying in %.2fs", query, delay)
+                time.sleep(delay)
+            except Exception as exc:
+                logger.warning("Search failure for query '%s': %s", query, exc)
+                return []
+        return []
+
+    def _get_executor(self) -> ThreadPoolExecutor:
+        with self._lock:
+            if self._executor is None:
+                self._executor = ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix="search")
+            return self._executor
@@ -3,6 +3,33 @@ from __future__ import annotations
 from hashlib import md5
 from pathlib import Path
 import re
+from urllib.parse import parse_qsl, urlencode, urlsplit, urlunsplit
+
+
+TRACKING_PARAMS = {"fbclid", "gclid", "msclkid", "yclid", "igshid", "mc_cid", "mc_eid", "ref_src", "_hsenc", "_hsmi"}
+
+
+
+def canonicalize_url(url: str) -> str:
+    raw = (url or "").strip()
+    parts = urlsplit(raw)
+    if parts.scheme.lower() not in {"http", "https"} or not parts.hostname:
+        return raw.rstrip("/")
+    host = parts.hostname.lower()
+    if host.startswith("www."):
+        host = host[4:]
+    if parts.port and parts.port not in {80, 443}:
+        host = f"{host}:{parts.port}"
+    path = re.sub(r"/{2,}", "/", parts.path).rstrip("/")
+    query = urlencode(
+        sorted(
+            (k, v)
+            for k, v in parse_qsl(parts.query, keep_blank_values=True)
+            if not k.lower().startswith("utm_") and k.lower() not in TRACKING_PARAMS
+        )
+    )
+    # http and https variants collapse onto one key; the original URL is still what gets fetched.
+    return urlunsplit(("https", host, path, query, ""))
 
 
 
@@ -10,11 +37,12 @@ def dedupe_urls(urls: list[str]) -> list[str]:
     seen: set[str] = set()
     out: list[str] = []
     for url in urls:
-        normalized = (url or "").strip().rstrip("/")
-        if not normalized or normalized in seen:
+        stripped = (url or "").strip()
+        key = canonicalize_url(stripped)
+        if not key or key in seen:
             continue
-        seen.add(normalized)
-        out.append(normalized)
+        seen.add(key)
+        out.append(stripped)
     return out
 
 
@@ -0,0 +1,290 @@
+from __future__ import annotations
+
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
+import json
+import threading
+import time
+
+from src.core.agents import SECTION_TITLES, AgentBundle, LLMClient, OpenAIClient
+from src.core.llm_cache import CachingLLMClient
+from src.core.llm_router import RouterLLMClient
+from src.core.state import Source
+from src.core.streaming import AnalystTokenStream
+from src.rag.packing import ContextPacker
+from src.tools.cache import JsonCache
+from src.tools.circuit import CircuitBreaker
+
+
+class CountingClient(LLMClient):
+    def __init__(self, delay: float = 0.0) -> None:
+        self.model = "counting"
+        self.delay = delay
+        self.calls = 0
+        self._lock = threading.Lock()
+
+    def complete(self, system_prompt: str, user_prompt: str, temperature: float = 0.2) -> str:
+        with self._lock:
+            self.calls += 1
+        time.sleep(self.delay)
+        return f'{{"echo": "{user_prompt}"}}'
+
+
+
+def test_llm_cache_serves_repeats_and_coalesces_concurrent_prompts(tmp_path):
+    inner = CountingClient(delay=0.2)
+    llm = CachingLLMClient(inner, JsonCache(tmp_path / "llm.sqlite3", "completions"))
+
+    with ThreadPoolExecutor(max_workers=5) as pool:
+        outputs = list(pool.map(lambda _: llm.complete("sys", "plan Stripe"), range(5)))
+    assert len(set(outputs)) == 1
+    assert inner.calls == 1
+
+    assert llm.complete("sys", "plan Stripe") == outputs[0]
+    assert llm.complete("sys", "plan Stripe", temperature=0.7) == outputs[0]
+    assert inner.calls == 2
+
+    stats = llm.stats()
+    assert stats["coalesced"] == 4
+    assert stats["hits"] == 1
+    assert stats["saved_seconds"] > 0.8
+
+
+
+def test_llm_cache_coalesces_concurrent_async_prompts(tmp_path):
+    inner = CountingClient(delay=0.2)
+    llm = CachingLLMClient(inner, JsonCache(tmp_path / "llm.sqlite3", "completions"))
+
+    async def fan_out() -> list[str]:
+        return await asyncio.gather(*(llm.acomplete("sys", "analyse Stripe") for _ in range(4)))
+
+    outputs = asyncio.run(fan_out())
+    assert len(set(outputs)) == 1
+    assert inner.calls == 1
+    assert llm.stats()["coalesced"] == 3
+
+
+
+def test_analyst_token_stream_surfaces_summary_and_section_text():
+    raw = (
+        '```json\n{"executive_summary": "Stripe \\"leads\\" payments.\\nStrong moat.", '
+        '"sections": [{"title": "Market", "content": "Large \\u0026 growing.", "citation_urls": ["https://a.com"]}, '
+        '{"title": "Risks", "content": "Regulation."}]}\n```'
+    )
+    stream = AnalystTokenStream()
+    events = [event for i in range(0, len(raw), 7) for event in stream.feed(raw[i : i + 7])]
+
+    summary = "".join(e["delta"] for e in events if e["field"] == "executive_summary")
+    assert summary == 'Stripe "leads" payments.\nStrong moat.'
+    by_section: dict[str, str] = {}
+    for e in events:
+        if e["field"] == "section":
+            by_section[e["section"]] = by_section.get(e["section"], "") + e["delta"]
+    assert by_section == {"Market": "Large & growing.", "Risks": "Regulation."}
+
+
+
+class SectionClient(LLMClient):
+    def __init__(self) -> None:
+        self.requests: list[list[str]] = []
+        self._lock = threading.Lock()
+
+    def complete(self, system_prompt: str, user_prompt: str, temperature: float = 0.2) -> str:
+        request = json.loads(user_prompt)
+        titles = request["required_sections"]
+        with self._lock:
+            self.requests.append(titles)
+            attempts = self.requests.count(titles)
+        if "Risks" in titles and attempts == 1:
+            return "not json"
+        if "Competitors" in titles:
+            raise TimeoutError("model timed out")
+        body = {"sections": [{"title": t, "content": f"{t} analysis", "citation_urls": []} for t in titles]}
+        if "executive_summary" in request["format"]:
+            body["executive_summary"] = "Stripe summary"
+        return json.dumps(body)
+
+
+
+def test_sectioned_analyst_retries_and_falls_back_per_section():
+    llm = SectionClient()
+    agents = AgentBundle(llm=llm, analyst_mode="sections", section_group_size=2)
+    sources = [
+        Source(url="https://a.com/risk", title="Regulatory risk", text="risk regulation litigation"),
+        Source(url="https://a.com/pricing", title="Pricing", text="pricing fees revenue"),
+    ]
+    analysis = agents.analyst(company="Stripe", focus=[], sources=sources, memory_docs=[])
+
+    assert [s["title"] for s in analysis["sections"]] == SECTION_TITLES
+    assert analysis["executive_summary"] == "Stripe summary"
+    contents = {s["title"]: s["content"] for s in analysis["sections"]}
+    assert contents["Risks"] == "Risks analysis"
+    assert contents["Competitors"].startswith("[Not fully confirmed]")
+    assert contents["SWOT"].startswith("[Not fully confirmed]")
+    assert contents["Market"] == "Market analysis"
+    assert len(llm.requests) == 4 + 1 + 1
+
+
+
+def test_context_packer_keeps_relevant_chunks_within_budget(monkeypatch):
+    def unavailable(name):
+        raise OSError("model unavailable")
+
+    monkeypatch.setattr("src.rag.packing.get_embedding_model", unavailable)
+    boilerplate = "Cookie settings and newsletter signup links. " * 40
+    sources = [
+        Source(url="https://a.com/nav", title="Home", text=boilerplate),
+        Source(url="https://a.com/pricing", title="Pricing", text=boilerplate + "Stripe pricing fees are 2.9% per card transaction. " + boilerplate),
+    ]
+    packer = ContextPacker(token_budget=300, chunk_size=200, overlap=0)
+    packed = packer.pack("Stripe pricing fees", sources, [{"text": "Stripe pricing history", "score": 0.1, "metadata": {}}])
+
+    assert packed.tokens <= 300
+    assert packed.sources[0]["url"] == "https://a.com/pricing"
+    assert "2.9%" in packed.sources[0]["excerpt"]
+    assert packed.memory[0]["text"] == "Stripe pricing history"
+
+    llm = SectionClient()
+    agents = AgentBundle(llm=llm, packer=packer)
+    analysis = agents.analyst(company="Stripe", focus=["pricing"], sources=sources, memory_docs=[])
+    assert 0 < analysis["context_tokens"] < 300 + 200
+
+
+class SlowEncoder:
+    def encode(self, texts: list[str], normalize_embeddings: bool = True) -> list[list[float]]:
+        time.sleep(0.3)
+        return [[1.0, 0.0] for _ in texts]
+
+
+def test_async_analyst_packs_context_off_the_event_loop(monkeypatch):
+    monkeypatch.setattr("src.rag.packing.get_embedding_model", lambda name: SlowEncoder())
+    sources = [Source(url="https://a.com/pricing", title="Pricing", text="Stripe pricing fees are 2.9% per card.")]
+    packer = ContextPacker(token_budget=300, chunk_size=200, overlap=0)
+
+    async def main(agents: AgentBundle) -> int:
+        ticks = 0
+        task = asyncio.create_task(agents.aanalyst(company="Stripe", focus=[], sources=sources, memory_docs=[]))
+        while not task.done():
+            ticks += 1
+            await asyncio.sleep(0.02)
+        await task
+        return ticks
+
+    assert asyncio.run(main(AgentBundle(llm=CountingClient(), packer=packer))) >= 10
+    sectioned = AgentBundle(llm=SectionClient(), packer=packer, analyst_mode="sections", section_group_size=4)
+    assert asyncio.run(main(sectioned)) >= 10
+
+
+class HangingClient(LLMClient):
+    model = "hanging"
+
+    def __init__(self) -> None:
+        self.calls = 0
+        self.probes = 0
+
+    def complete(self, system_prompt: str, user_prompt: str, temperature: float = 0.2) -> str:
+        self.calls += 1
+        time.sleep(0.5)
+        return "late"
+
+    async def acomplete(self, system_prompt: str, user_prompt: str, temperature: float = 0.2) -> str:
+        self.calls += 1
+        await asyncio.sleep(0.5)
+        return "late"
+
+    def health_check(self, timeout_seconds: float = 3.0) -> bool:
+        self.probes += 1
+        return False
+
+
+
+def test_router_fails_over_on_deadline_and_skips_open_circuit():
+    dead, live = HangingClient(), CountingClient()
+    router = RouterLLMClient(
+        [dead, live],
+        call_timeout_seconds=0.05,
+        breaker=CircuitBreaker(failure_threshold=1, cooldown_seconds=60),
+        probe_interval_seconds=60,
+    )
+
+    assert router.complete("sys", "first") == '{"echo": "first"}'
+    assert dead.calls == 1
+
+    start = time.perf_counter()
+    assert router.complete("sys", "second") == '{"echo": "second"}'
+    assert asyncio.run(router.acomplete("sys", "third")) == '{"echo": "third"}'
+    assert time.perf_counter() - start < 0.4
+    assert dead.calls == 1
+
+    stats = router.backend_stats()
+    assert stats["0:HangingClient:hanging"]["circuit_open"] is True
+    assert stats["1:CountingClient:counting"]["error_rate"] == 0.0
+
+
+def test_hung_backend_does_not_starve_the_healthy_one():
+    dead, live = HangingClient(), CountingClient()
+    router = RouterLLMClient(
+        [dead, live],
+        call_timeout_seconds=0.1,
+        breaker=CircuitBreaker(failure_threshold=100, cooldown_seconds=60),
+        probe_interval_seconds=60,
+        max_workers=2,
+    )
+    with ThreadPoolExecutor(max_workers=6) as pool:
+        outputs = list(pool.map(lambda i: router.complete("sys", f"q{i}"), range(6)))
+
+    assert outputs == [f'{{"echo": "q{i}"}}' for i in range(6)]
+    assert router.backend_stats()["1:CountingClient:counting"]["circuit_open"] is False
+
+
+def test_openai_client_timeout_bounds_abandoned_calls():
+    client = OpenAIClient("sk-test", "gpt-4.1-mini", timeout_seconds=5.0, max_retries=0)
+    assert client.client.timeout == 5.0
+    assert client.client.max_retries == 0
+
+
+class ReachableHangingClient(HangingClient):
+    def health_check(self, timeout_seconds: float = 3.0) -> bool:
+        self.probes += 1
+        return True
+
+
+def test_probe_closes_circuit_only_after_a_real_completion():
+    hung, recovered = ReachableHangingClient(), CountingClient()
+    router = RouterLLMClient(
+        [hung, recovered],
+        call_timeout_seconds=0.05,
+        breaker=CircuitBreaker(failure_threshold=1, cooldown_seconds=60),
+        probe_timeout_seconds=0.1,
+    )
+    for name in router.names:
+        router.breaker.record_failure(name)
+
+    router._probe(0)
+    router._probe(1)
+    assert hung.probes == 1 and hung.calls == 1
+    assert router.breaker.is_open("0:ReachableHangingClient:hanging")
+    assert not router.breaker.is_open("1:CountingClient:counting")
+    assert recovered.calls == 1
+
+
+def test_router_caches_fail_over_replies_under_the_answering_model(tmp_path):
+    cache = JsonCache(tmp_path / "llm.sqlite3", "completions")
+    dead, fallback = HangingClient(), CountingClient()
+    fallback.model = "fallback"
+    router = RouterLLMClient(
+        [CachingLLMClient(dead, cache), CachingLLMClient(fallback, cache)],
+        call_timeout_seconds=0.05,
+        breaker=CircuitBreaker(failure_threshold=1, cooldown_seconds=60),
+        probe_interval_seconds=60,
+    )
+    assert router.complete("sys", "q") == '{"echo": "q"}'
+    assert router.names == ["0:HangingClient:hanging", "1:CountingClient:fallback"]
+
+    # The primary's cache must not replay the fallback's reply as its own.
+    primary = CountingClient()
+    primary.model = dead.model
+    recovered = CachingLLMClient(primary, cache)
+    assert recovered.complete("sys", "q") == '{"echo": "q"}'
+    assert primary.calls == 1
+    assert router.stats()["entries"] == 2
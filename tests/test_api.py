@@ -1,14 +1,27 @@
 from __future__ import annotations
 
+import json
+import threading
+import time
+
 from fastapi.testclient import TestClient
 
-from apps.api.deps import get_graph_runner
+from apps.api.deps import get_batch_runner, get_graph_runner, get_job_manager
 from apps.api.main import app
+from src.core.batch import BatchRunner
+from src.core.graph import RunNotFoundError
+from src.core.jobs import JobManager
 from src.core.state import Citation, Report, ReportSection
 
 
+class FakeMemory:
+    ingest = None
+
+
 class FakeGraph:
-    def run(self, company: str, focus: list[str], depth: str, use_memory: bool):
+    memory_manager = FakeMemory()
+
+    def run(self, company: str, focus: list[str], depth: str, use_memory: bool, use_cache: bool = True, deadline_seconds: float | None = None):
         report = Report(
             company=company,
             generated_at="2026-01-01T00:00:00Z",
@@ -30,7 +43,20 @@ class FakeGraph:
             memory_used=use_memory,
             memory_updates={"added_docs": 1, "added_sources": 1},
         )
-        return {"report": report}
+        return {"report": report, "run_id": "run-1"}
+
+    def resume(self, run_id: str):
+        if run_id != "run-1":
+            raise RunNotFoundError(f"Unknown run {run_id}")
+        return self.run("Stripe", [], "quick", True)
+
+    async def arun(self, company: str, focus: list[str], depth: str, use_memory: bool, use_cache: bool = True, deadline_seconds: float | None = None):
+        return {**self.run(company, focus, depth, use_memory), "report_cache": "hit" if use_cache else "miss"}
+
+    def stream_run(self, company: str, focus: list[str], depth: str, use_memory: bool, deadline_seconds: float | None = None):
+        yield "node", {"node": "planner", "elapsed_ms": 1.0}
+        yield "token", {"field": "executive_summary", "delta": "Test "}
+        yield "report", self.run(company, focus, depth, use_memory)["report"].model_dump()
 
 
 app.dependency_overrides[get_graph_runner] = lambda: FakeGraph()
@@ -52,3 +78,109 @@ def test_research():
     assert body["company"] == "Stripe"
     assert len(body["sections"]) == 8
     assert "executive_summary" in body
+    assert body["served_from_cache"] is True
+    assert resp.headers["X-Report-Cache"] == "hit"
+
+    resp = client.post("/research", json={**payload, "refresh": True})
+    assert resp.json()["served_from_cache"] is False
+    assert resp.headers["X-Report-Cache"] == "miss"
+
+
+
+def test_metrics_endpoint():
+    resp = client.get("/metrics")
+    assert resp.status_code == 200
+    assert resp.headers["content-type"].startswith("text/plain")
+    assert "dd_node_seconds" in resp.text or "not installed" in resp.text
+
+
+
+def test_research_stream():
+    payload = {"company": "Stripe", "focus": [], "depth": "quick", "use_memory": False}
+    with client.stream("POST", "/research/stream", json=payload) as resp:
+        assert resp.status_code == 200
+        assert resp.headers["content-type"].startswith("text/event-stream")
+        body = "".join(resp.iter_text())
+    assert body.startswith("event: node\ndata: ")
+    assert "event: token" in body
+    assert body.rstrip().split("\n\n")[-1].startswith("event: report")
+
+
+
+def test_resume_returns_report_or_404():
+    resp = client.post("/research/run-1/resume")
+    assert resp.status_code == 200
+    assert resp.json()["run_id"] == "run-1"
+    assert client.post("/research/nope/resume").status_code == 404
+
+
+
+def test_research_jobs_report_status_and_backpressure():
+    release = threading.Event()
+    order: list[str] = []
+
+    def run(**request):
+        if request["company"] == "Blocker":
+            release.wait(5)
+        order.append(request["company"])
+        return FakeGraph().run(**request)
+
+    jobs = JobManager(run, workers=1, max_queue=2)
+    app.dependency_overrides[get_job_manager] = lambda: jobs
+    try:
+        base = {"focus": [], "use_memory": False}
+        first = client.post("/research/jobs", json={**base, "company": "Blocker", "depth": "quick"})
+        assert first.status_code == 202
+        deadline = time.time() + 5
+        while jobs.get(first.json()["job_id"]).status != "running" and time.time() < deadline:
+            time.sleep(0.01)
+
+        deep = client.post("/research/jobs", json={**base, "company": "Deep", "depth": "deep"}).json()
+        quick = client.post("/research/jobs", json={**base, "company": "Quick", "depth": "quick"}).json()
+        assert quick["queue_position"] == 0
+        assert client.get(f"/research/jobs/{deep['job_id']}").json()["queue_position"] == 1
+
+        saturated = client.post("/research/jobs", json={**base, "company": "Extra", "depth": "standard"})
+        assert saturated.status_code == 429
+        assert "Retry-After" in saturated.headers
+
+        release.set()
+        deadline = time.time() + 5
+        while client.get(f"/research/jobs/{deep['job_id']}").json()["status"] != "succeeded" and time.time() < deadline:
+            time.sleep(0.01)
+        body = client.get(f"/research/jobs/{deep['job_id']}").json()
+        assert body["status"] == "succeeded"
+        assert body["report"]["company"] == "Deep"
+        assert order == ["Blocker", "Quick", "Deep"]
+        assert client.get("/research/jobs/missing").status_code == 404
+    finally:
+        jobs.shutdown(timeout=5)
+        app.dependency_overrides.pop(get_job_manager, None)
+
+
+
+def test_research_batch_streams_ndjson():
+    class FailingGraph(FakeGraph):
+        def run(self, company: str, focus: list[str], depth: str, use_memory: bool, use_cache: bool = True, deadline_seconds: float | None = None):
+            if company == "Broken":
+                raise RuntimeError("boom")
+            return super().run(company, focus, depth, use_memory, use_cache)
+
+    batch = BatchRunner(FailingGraph(), max_concurrency=2)
+    app.dependency_overrides[get_batch_runner] = lambda: batch
+    try:
+        payload = {"requests": [{"company": "Stripe"}, {"company": "Broken"}, {"company": "Adyen", "depth": "quick"}]}
+        with client.stream("POST", "/research/batch", json=payload) as resp:
+            assert resp.status_code == 200
+            assert resp.headers["content-type"].startswith("application/x-ndjson")
+            lines = [json.loads(line) for line in resp.iter_lines() if line]
+        assert client.post("/research/batch", json={"requests": []}).status_code == 422
+    finally:
+        batch.shutdown()
+        app.dependency_overrides.pop(get_batch_runner, None)
+
+    by_company = {line["company"]: line for line in lines}
+    assert set(by_company) == {"Stripe", "Broken", "Adyen"}
+    assert by_company["Broken"]["status"] == "failed" and by_company["Broken"]["error"] == "boom"
+    assert by_company["Broken"]["index"] == 1 and "report" not in by_company["Broken"]
+    assert by_company["Adyen"]["report"]["company"] == "Adyen"
@@ -0,0 +1,312 @@
+from __future__ import annotations
+
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+import time
+from typing import Iterator
+
+import requests
+
+from src.tools.cache import PageCache, SearchCache
+from src.tools.dedupe import near_duplicate_indices
+from src.tools.extract import extract_text
+from src.tools.fetch import FetchResult, FetchTool
+from src.tools.search import DuckDuckGoSearchTool, LocalCorpusBackend, QueryFn, SearchBackend, SearchRateLimitError
+from src.tools.utils import cache_path, canonicalize_url, dedupe_urls
+
+
+class SlowFetch(FetchTool):
+    def __init__(self, cache_dir, delays: dict[str, float], **kwargs) -> None:
+        super().__init__(cache_dir, **kwargs)
+        self.delays = delays
+
+    def fetch_page(self, url: str) -> FetchResult:
+        time.sleep(self.delays.get(url, 0.0))
+        return FetchResult(url=url, text=f"body of {url}")
+
+
+
+def test_fetch_many_keeps_source_order(tmp_path):
+    urls = ["https://a.com/1", "https://b.com/1", "https://a.com/2", "https://c.com/1"]
+    tool = SlowFetch(tmp_path, {"https://a.com/1": 0.2, "https://b.com/1": 0.05}, max_workers=4)
+    results = tool.fetch_many(urls)
+    assert [r.url for r in results] == urls
+    assert all(r.text == f"body of {r.url}" for r in results)
+
+
+
+def test_fetch_many_returns_partial_results_at_deadline(tmp_path):
+    urls = ["https://fast.com/1", "https://slow.com/1"]
+    tool = SlowFetch(tmp_path, {"https://slow.com/1": 1.0}, max_workers=2)
+    start = time.perf_counter()
+    results = tool.fetch_many(urls, deadline_seconds=0.3)
+    assert time.perf_counter() - start < 0.9
+    assert results[0].text
+    assert results[1].status == "deadline" and not results[1].text
+
+
+
+def test_page_cache_expires_and_evicts(tmp_path):
+    cache = PageCache(tmp_path, ttl_seconds=60, max_bytes=10_000, compress=False)
+    cache.put("https://a.com/old", "a" * 6000, fetched_at=time.time() - 120)
+    assert cache.get("https://a.com/old") is None
+
+    cache.put("https://a.com/1", "x" * 4000)
+    cache.put("https://a.com/2", "y" * 4000)
+    assert cache.get("https://a.com/1") == "x" * 4000
+    cache.put("https://a.com/3", "z" * 4000)
+    assert cache.get("https://a.com/2") is None
+    assert cache.get("https://a.com/1") == "x" * 4000
+    assert cache.stats()["bytes"] <= 10_000
+    assert not list(tmp_path.glob("*.txt"))
+
+
+
+def test_page_cache_migrates_legacy_entries(tmp_path):
+    cache_path(tmp_path, "https://a.com/legacy").write_text("legacy body", encoding="utf-8")
+    cache = PageCache(tmp_path)
+    assert cache.get("https://a.com/legacy") == "legacy body"
+    assert not cache_path(tmp_path, "https://a.com/legacy").exists()
+    assert cache.stats()["entries"] == 1
+
+
+
+class FakeResponse:
+    def __init__(self, status_code: int, text: str = "", headers: dict | None = None) -> None:
+        self.status_code = status_code
+        self.content = text.encode("utf-8")
+        self.headers = headers or {}
+        self.bytes_read = 0
+
+    def iter_content(self, chunk_size: int):
+        for start in range(0, len(self.content), chunk_size):
+            self.bytes_read += len(self.content[start : start + chunk_size])
+            yield self.content[start : start + chunk_size]
+
+    def close(self) -> None:
+        pass
+
+
+class FakeSession:
+    def __init__(self, responses: list[FakeResponse]) -> None:
+        self.responses = responses
+        self.sent_headers: list[dict] = []
+
+    def get(self, url: str, timeout: float, headers: dict, stream: bool = False) -> FakeResponse:
+        self.sent_headers.append(dict(headers))
+        response = self.responses.pop(0)
+        if isinstance(response, Exception):
+            raise response
+        return response
+
+
+
+def test_fetch_revalidates_expired_pages_with_conditional_get(tmp_path):
+    body = "<html><body><p>" + "Stripe builds payments infrastructure. " * 20 + "</p></body></html>"
+    tool = FetchTool(tmp_path, cache_ttl_seconds=60, min_chars=50)
+    tool.session = FakeSession(
+        [
+            FakeResponse(200, body, {"ETag": '"v1"', "Last-Modified": "Wed, 01 Jan 2026 00:00:00 GMT"}),
+            FakeResponse(304, "", {"ETag": '"v1"'}),
+        ]
+    )
+    first = tool.fetch_page("https://a.com/page")
+    assert first.status == "ok"
+
+    tool.cache.put("https://a.com/page", first.text, fetched_at=time.time() - 120, etag='"v1"')
+    second = tool.fetch_page("https://a.com/page")
+    assert second.status == "revalidated"
+    assert second.text == first.text
+    assert tool.session.sent_headers[1]["If-None-Match"] == '"v1"'
+    assert tool.fetch_page("https://a.com/page").status == "cached"
+
+
+
+def test_failed_fetches_are_negative_cached_and_trip_host_breaker(tmp_path):
+    tool = FetchTool(tmp_path, breaker_threshold=2, breaker_cooldown_seconds=60)
+    tool.session = FakeSession([FakeResponse(404), requests.Timeout("slow"), requests.Timeout("slow")])
+
+    assert tool.fetch_page("https://dead.com/a").status == "http_error"
+    assert tool.fetch_page("https://dead.com/a").status == "negative_cached"
+
+    assert tool.fetch_page("https://slow.com/1").status == "timeout"
+    assert tool.fetch_page("https://slow.com/2").status == "timeout"
+    assert tool.fetch_page("https://slow.com/3").status == "circuit_open"
+    assert len(tool.session.sent_headers) == 3
+
+
+
+def test_stream_extractor_matches_bs4_and_stops_early():
+    html = (
+        "<html><head><style>p {}</style><script>var x = 1;</script></head><body>"
+        "<nav>Home | About</nav><h1>Stripe &amp; Co</h1><p>Payments   infrastructure.</p>"
+        "<footer>Footer links</footer></body></html>"
+    )
+    assert extract_text(html, 1000, backend="stream") == extract_text(html, 1000, backend="bs4")
+    assert extract_text(html, 1000, backend="stream") == "Stripe & Co Payments infrastructure."
+
+    long_html = "<p>" + "word " * 100000 + "</p>"
+    assert len(extract_text(long_html, 500, backend="stream")) == 500
+
+
+
+def test_fetch_caps_bytes_and_skips_non_html(tmp_path):
+    big = FakeResponse(200, "<p>" + "a " * 200000 + "</p>", {"Content-Type": "text/html"})
+    pdf = FakeResponse(200, "%PDF-1.7", {"Content-Type": "application/pdf"})
+    tool = FetchTool(tmp_path, min_chars=10, max_bytes=100_000)
+    tool.session = FakeSession([big, pdf])
+
+    assert tool.fetch_page("https://a.com/big").status == "ok"
+    assert big.bytes_read <= 100_000 + 64 * 1024
+    assert tool.fetch_page("https://a.com/file.pdf").status == "unsupported_type"
+    assert pdf.bytes_read == 0
+
+
+
+def test_process_pool_cleaning_matches_in_process(tmp_path):
+    html = "<html><body><nav>Menu</nav>" + "<p>Stripe &amp; Adyen compete on payments.</p>" * 200 + "</body></html>"
+    in_process = FetchTool(tmp_path / "a", max_chars=5000)
+    pooled = FetchTool(tmp_path / "b", max_chars=5000, clean_workers=1)
+    raw = html.encode("utf-8")
+    assert pooled._clean(raw, "text/html; charset=utf-8") == in_process._clean(raw, "text/html; charset=utf-8")
+    pooled._clean_pool.shutdown()
+
+
+
+class CountingSearch(DuckDuckGoSearchTool):
+    def __init__(self, cache: SearchCache) -> None:
+        super().__init__(enabled=True, cache=cache)
+        self.network_queries: list[str] = []
+
+    def _search_uncached(self, queries: list[str], max_results: int, run: QueryFn | None = None) -> list[list[dict]]:
+        self.network_queries.extend(queries)
+        return [[{"url": f"https://r.com/{q}/{i}", "title": q, "snippet": ""} for i in range(max_results)] for q in queries]
+
+
+
+def test_search_cache_serves_repeat_and_smaller_queries(tmp_path):
+    search = CountingSearch(SearchCache(tmp_path / "search.sqlite3", max_entries=10))
+    first = search.search_many(["Stripe  competitors", "Stripe pricing"], max_results=4)
+    again = search.search_many(["stripe competitors"], max_results=2)
+    assert again[0] == first[0][:2]
+    assert search.network_queries == ["Stripe  competitors", "Stripe pricing"]
+
+    search.search_many(["stripe competitors"], max_results=6)
+    assert search.network_queries[-1] == "stripe competitors"
+    assert search.cache.stats() == {"entries": 2, "hits": 1, "misses": 3}
+
+
+
+class FlakyBackend(SearchBackend):
+    def __init__(self, failures: int) -> None:
+        self.failures = failures
+        self.calls = 0
+
+    def text(self, query: str, max_results: int) -> list[dict]:
+        self.calls += 1
+        if self.calls <= self.failures:
+            raise SearchRateLimitError("202 Ratelimit")
+        return [{"url": "https://r.com/1", "title": query, "snippet": ""}]
+
+
+
+def test_search_retries_rate_limit_errors_with_backoff():
+    backend = FlakyBackend(failures=2)
+    search = DuckDuckGoSearchTool(backend=backend, max_retries=3, backoff_seconds=0.01)
+    assert search.search("stripe", max_results=1)[0]["url"] == "https://r.com/1"
+    assert backend.calls == 3
+
+    gives_up = DuckDuckGoSearchTool(backend=FlakyBackend(failures=5), max_retries=1, backoff_seconds=0.01)
+    assert gives_up.search("stripe") == []
+
+
+
+class SessionCountingBackend(SearchBackend):
+    def __init__(self) -> None:
+        self.sessions = 0
+
+    @contextmanager
+    def session(self) -> Iterator[QueryFn]:
+        self.sessions += 1
+        yield self.text
+
+    def text(self, query: str, max_results: int) -> list[dict]:
+        return [{"url": f"https://r.com/{query}", "title": query, "snippet": ""}]
+
+
+def test_search_session_shares_one_backend_session_across_queries(tmp_path):
+    backend = SessionCountingBackend()
+    search = DuckDuckGoSearchTool(backend=backend, cache=SearchCache(tmp_path / "search.sqlite3", max_entries=10))
+    with search.session(max_results=3) as query, ThreadPoolExecutor(max_workers=3) as pool:
+        rows = list(pool.map(query, ["stripe", "adyen", "stripe pricing"]))
+    assert [r[0]["url"] for r in rows] == ["https://r.com/stripe", "https://r.com/adyen", "https://r.com/stripe pricing"]
+    assert backend.sessions == 1
+    assert search.search("stripe", max_results=3) == rows[0]
+    assert backend.sessions == 1
+
+
+class BrokenSessionBackend(SearchBackend):
+    @contextmanager
+    def session(self) -> Iterator[QueryFn]:
+        raise RuntimeError("ddgs unavailable")
+        yield self.text
+
+
+def test_search_session_setup_failure_returns_no_rows():
+    search = DuckDuckGoSearchTool(backend=BrokenSessionBackend())
+    with search.session(max_results=3) as query:
+        assert query("stripe") == []
+
+
+def test_local_corpus_backend_ranks_matching_documents(tmp_path):
+    corpus = tmp_path / "corpus"
+    corpus.mkdir()
+    (corpus / "stripe.jsonl").write_text(
+        '{"url": "https://stripe.com/pricing", "title": "Stripe pricing", "text": "Stripe charges 2.9% per card payment."}\n'
+        '{"url": "https://adyen.com", "title": "Adyen", "text": "Adyen is a payments platform."}\n',
+        encoding="utf-8",
+    )
+    (corpus / "stripe_competitors.md").write_text("Stripe competitors include Adyen and PayPal.", encoding="utf-8")
+    search = DuckDuckGoSearchTool(backend=LocalCorpusBackend(corpus))
+    rows = search.search("Stripe pricing", max_results=5)
+    assert rows[0]["url"] == "https://stripe.com/pricing"
+    assert any(r["url"].startswith("file://") for r in rows)
+
+    local = FetchTool(tmp_path / "cache", min_chars=10, local_corpus_dir=corpus)
+    assert "PayPal" in local.fetch((corpus / "stripe_competitors.md").resolve().as_uri())
+
+
+def test_local_fetch_is_confined_to_the_search_corpus(tmp_path):
+    corpus = tmp_path / "corpus"
+    corpus.mkdir()
+    (corpus / "notes.md").write_text("Stripe competitors include Adyen and PayPal.", encoding="utf-8")
+    secret = tmp_path / "secret.txt"
+    secret.write_text("api_key=do-not-leak " * 5, encoding="utf-8")
+
+    local = FetchTool(tmp_path / "cache", min_chars=10, local_corpus_dir=corpus)
+    assert local.fetch_page(secret.resolve().as_uri()).status == "error"
+    assert local.fetch_page((corpus / ".." / "secret.txt").as_uri()).status == "error"
+    assert local.fetch_page((corpus / "notes.md").resolve().as_uri()).status == "ok"
+
+    remote = FetchTool(tmp_path / "cache2", min_chars=10)
+    assert remote.fetch_page((corpus / "notes.md").resolve().as_uri()).status == "error"
+
+
+
+def test_dedupe_urls_uses_canonical_form():
+    urls = [
+        "https://www.stripe.com/pricing/?utm_source=x&b=2&a=1",
+        "http://stripe.com/pricing?a=1&b=2#plans",
+        "https://stripe.com/pricing?a=1",
+        "  https://stripe.com/about/  ",
+    ]
+    assert dedupe_urls(urls) == [urls[0], urls[2], "https://stripe.com/about/"]
+    assert canonicalize_url(urls[1]) == "https://stripe.com/pricing?a=1&b=2"
+
+
+
+def test_near_duplicate_pages_are_detected():
+    release = " ".join(f"Stripe announced product {i} for enterprise customers in market {i % 7}." for i in range(60))
+    mirrored = release + " Republished by Example Wire."
+    other = " ".join(f"Adyen reported revenue growth of {i} percent across region {i % 5}." for i in range(60))
+    assert near_duplicate_indices([release, other, mirrored]) == [2]